@@ -0,0 +1,103 @@
+"""
+Benchmark of the pandas and polars engines on the clean and transform stages
+
+Builds synthetic BOMs with transform_scaling.make_bom, times each stage on
+both engines and checks that they produce the same result. Cleaning starts
+from the BOM with its original Excel headers, as read_excel returns it.
+
+Needs the polars extra. Run from the project directory with the environment
+configured:
+    poetry run python benchmarks/engine_comparison.py --sizes 100000 400000
+"""
+
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bom_processing import polars_engine  # noqa: E402
+from bom_processing.constants import COLUMN_RENAME_MAPS  # noqa: E402
+from bom_processing.extract import read_boms_from_excel  # noqa: E402
+from bom_processing.transform.transformations import transform_bom  # noqa: E402
+from transform_scaling import make_bom  # noqa: E402
+
+
+ENGINES = ["pandas", "polars"]
+
+
+def make_raw_bom(rows: int, category: str) -> pd.DataFrame:
+    # read_excel gives object columns for text and floats for part numbers
+    bom_df = make_bom(rows)
+    text_columns = bom_df.select_dtypes("string").columns
+    bom_df[text_columns] = bom_df[text_columns].astype(object)
+    bom_df["part_tag"] = bom_df["part_tag"].astype(float)
+    original_names = {v: k for k, v in COLUMN_RENAME_MAPS[category].items()}
+    return bom_df.rename(columns=original_names)
+
+
+def time_stage(function, trials: int) -> tuple[float, pd.DataFrame]:
+    times = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[25_000, 100_000, 400_000]
+    )
+    parser.add_argument("--trials", type=int, default=3)
+    args = parser.parse_args()
+
+    cleaners = {"pandas": read_boms_from_excel, "polars": polars_engine}
+
+    mismatched = False
+    for category in ["primary_a", "primary_b"]:
+        for rows in sorted(args.sizes):
+            raw_df = make_raw_bom(rows, category)
+            cleaned_df = make_bom(rows)
+            results = {}
+            for engine in ENGINES:
+                clean = getattr(cleaners[engine], f"clean_{category}_bom")
+                clean_seconds, cleaned = time_stage(
+                    lambda: clean(raw_df.copy()), args.trials
+                )
+                transform_seconds, transformed = time_stage(
+                    lambda: transform_bom(
+                        cleaned_df.copy(), category, engine=engine
+                    ),
+                    args.trials,
+                )
+                results[engine] = (cleaned, transformed)
+                print(
+                    f"{category} {rows:>9,} rows {engine:>6}: "
+                    f"clean {clean_seconds:7.3f}s, "
+                    f"transform {transform_seconds:7.3f}s"
+                )
+
+            try:
+                pd.testing.assert_frame_equal(
+                    results["polars"][1], results["pandas"][1], rtol=1e-9
+                )
+            except AssertionError as e:
+                print(
+                    f"{category} {rows:,} rows: transform results differ: {e}"
+                )
+                mismatched = True
+
+    if mismatched:
+        print("MISMATCH")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark for how long the upload GUI takes to show its window
+
+Each trial starts a fresh interpreter, imports upload_gui.gui, builds the
+window and waits for it to be drawn. Reports import time and time to first
+window, and fails if the median exceeds --max-seconds or if a heavy module
+was imported before the window appeared.
+
+Run from the project directory with the environment configured:
+    poetry run python benchmarks/gui_startup.py --trials 5
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "openpyxl", "xlrd"]
+
+TRIAL_SCRIPT = """
+import json, sys, time, tkinter
+start = time.perf_counter()
+import upload_gui.gui as gui
+imported = time.perf_counter()
+result = {
+    "import_seconds": imported - start,
+    "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+}
+try:
+    root = gui.Tk()
+except tkinter.TclError as e:
+    result["window_error"] = str(e)
+else:
+    app = gui.BOMUploaderGUI(root)
+    root.update()
+    result["first_window_seconds"] = time.perf_counter() - start
+    app.close()
+print(json.dumps(result))
+"""
+
+
+def run_trial() -> dict:
+    src_dir = Path(__file__).resolve().parents[1] / "src"
+    env = {**os.environ, "PYTHONPATH": str(src_dir)}
+    script = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n" + TRIAL_SCRIPT
+
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=1.0,
+        help="fail if median time to first window exceeds this",
+    )
+    args = parser.parse_args()
+
+    results = [run_trial() for _ in range(args.trials)]
+
+    process_seconds = statistics.median(r["process_seconds"] for r in results)
+    import_seconds = statistics.median(r["import_seconds"] for r in results)
+    print(f"median process wall time:    {process_seconds:.3f}s")
+    print(f"median import time:          {import_seconds:.3f}s")
+
+    heavy_modules = sorted({m for r in results for m in r["heavy_modules"]})
+    if heavy_modules:
+        print(f"heavy modules loaded before window: {heavy_modules}")
+
+    window_times = [
+        r["first_window_seconds"]
+        for r in results
+        if "first_window_seconds" in r
+    ]
+    if window_times:
+        first_window = statistics.median(window_times)
+        print(f"median time to first window: {first_window:.3f}s")
+    else:
+        first_window = import_seconds
+        print(f"no display available: {results[0]['window_error']}")
+
+    if heavy_modules or first_window > args.max_seconds:
+        print("REGRESSION")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Benchmark of the SQL load and refresh steps against the SQLite stand-in
+
+Loads synthetic processed BOM rows into a fresh SQLite database through
+the same functions and SQL scripts the ETLs use, and reports rows per
+second for each step. With --min-rows-per-second it fails if the staging
+load is slower than that, for use in CI.
+
+Run from the project directory with the environment configured, the
+database settings are overridden:
+    poetry run python benchmarks/load_throughput.py --rows 10000 100000
+"""
+
+import argparse
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+temp_dir = tempfile.TemporaryDirectory()
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["DB_SCHEMA"] = "bom_schema"
+os.environ["SQLITE_DB_PATH"] = str(Path(temp_dir.name) / "bom.sqlite3")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sqlalchemy as sa  # noqa: E402
+
+from bom_processing.constants import REQUIRED_SQL_COLUMNS  # noqa: E402
+from bom_processing.load import load_to_sql  # noqa: E402
+
+
+def make_processed_boms(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Output of process_boms: a few hundred PONs of primary BOM rows
+    """
+    rng = np.random.default_rng(seed)
+
+    def choice(values: list) -> np.ndarray:
+        return rng.choice(np.array(values, dtype=object), rows)
+
+    bom_df = pd.DataFrame(
+        {
+            "pon": rng.integers(
+                10000, 10000 + max(rows // 200, 1), rows
+            ).astype(str),
+            "part_tag": rng.integers(1, 500, rows),
+            "quantity": rng.integers(1, 10, rows),
+            "material_category": choice(["primary_a", "primary_b"]),
+            "material_type": choice(["TYPE-A", "TYPE-B", "TYPE-C", "PLAIN"]),
+            "material_subtype": choice(["TYPE-A-S", "TYPE-B-S", None]),
+            "height": rng.integers(38, 400, rows),
+            "width": rng.integers(38, 400, rows),
+            "length": rng.integers(300, 12000, rows),
+            "usage_quantity": rng.random(rows) * 10,
+            "finish_quantity": rng.random(rows) * 5,
+            "designation": choice(["beam", "INSERT", None]),
+            "element": choice(["wall", "floor"]),
+            "additional_info": choice(["", None]),
+            "load_method": "upload",
+            "snapshot_time_utc": "2026-01-05T10:00:00+00:00",
+            "bom_filename": "bom.xlsx",
+            "uploaded_by": "user",
+        }
+    )
+    return bom_df[REQUIRED_SQL_COLUMNS["primary"]]
+
+
+def seed_item_ids(engine: sa.engine.Engine) -> None:
+    items = pd.DataFrame(
+        [
+            {
+                "item_id": f"{material_type}-{height}x{width}",
+                "material_type": material_type,
+                "material_subtype": subtype,
+                "height": height,
+                "width": width,
+                "material_status": "stock",
+            }
+            for material_type, subtype in [
+                ("TYPE-A", "TYPE-A-S"),
+                ("TYPE-B", "TYPE-B-S"),
+            ]
+            for height in range(50, 450, 50)
+            for width in range(50, 450, 50)
+        ]
+    )
+    with engine.begin() as conn:
+        conn.execute(sa.text("DELETE FROM bom_schema.item_id_reference"))
+        items.to_sql(
+            "item_id_reference",
+            con=conn,
+            schema="bom_schema",
+            if_exists="append",
+            index=False,
+        )
+
+
+STEPS = {
+    "staging load": lambda bom_df: load_to_sql.load_df_to_sql_in_batches(
+        "example_bom_staging", bom_df, clear_first=True
+    ),
+    "history insert": lambda bom_df: (
+        load_to_sql.insert_uploads_into_history_table(
+            bom_df["snapshot_time_utc"].iloc[0]
+        )
+    ),
+    "current refresh": lambda _: load_to_sql.refresh_final_current_bom_table(),
+    "rollup refresh": lambda bom_df: (
+        load_to_sql.refresh_material_rollup_table(
+            bom_df["snapshot_time_utc"].iloc[0]
+        )
+    ),
+    "final refresh": lambda _: load_to_sql.refresh_final_bom_table(),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000]
+    )
+    parser.add_argument(
+        "--min-rows-per-second",
+        type=float,
+        default=0,
+        help="fail if the staging load is slower than this",
+    )
+    args = parser.parse_args()
+
+    engine = load_to_sql._get_db_engine()
+    seed_item_ids(engine)
+
+    failed = False
+    for rows in sorted(args.rows):
+        bom_df = make_processed_boms(rows)
+        for step, run in STEPS.items():
+            start = time.perf_counter()
+            run(bom_df)
+            seconds = time.perf_counter() - start
+            print(
+                f"{rows:>9,} rows {step:>15}: {seconds:7.3f}s "
+                f"({rows / seconds:,.0f} rows/s)"
+            )
+            if step == "staging load" and rows / seconds < (
+                args.min_rows_per_second
+            ):
+                failed = True
+
+        # history keeps growing between sizes otherwise
+        with engine.begin() as conn:
+            conn.execute(
+                sa.text("DELETE FROM bom_schema.example_bom_final_history")
+            )
+
+    engine.dispose()
+    temp_dir.cleanup()
+
+    if failed:
+        print("REGRESSION")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark for how the transform stage scales with BOM size
+
+Builds synthetic primary_a and primary_b BOMs of increasing row counts,
+times transform_bom on each and reports rows per second. Fails if the time
+per row at the largest size exceeds --max-growth times the time per row at
+the smallest size, i.e. if the transform stops scaling linearly.
+
+Run from the project directory with the environment configured:
+    poetry run python benchmarks/transform_scaling.py --sizes 25000 100000 400000
+"""
+
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bom_processing.transform.transformations import transform_bom  # noqa: E402
+
+
+MATERIAL_TYPES = [
+    "Glulam type-A-X",
+    "type-a",
+    "TYPE-B",
+    "2x4",
+    "2x6",
+    "composite-a",
+    "Composite-B",
+    "plain",
+    "other",
+]
+MATERIAL_SUBTYPES = ["spf", "type-a-x", "birch", None]
+DESIGNATIONS = ["beam", "column", "Insert 1", "panel", None]
+
+
+def make_bom(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Cleaned BOM with realistic repetition: a few thousand distinct parts
+    and a small material vocabulary
+    """
+    rng = np.random.default_rng(seed)
+    parts = max(rows // 20, 1)
+
+    def choice(values: list) -> pd.arrays.StringArray:
+        return pd.array(
+            rng.choice(np.array(values, dtype=object), rows), dtype="string"
+        )
+
+    return pd.DataFrame(
+        {
+            "element": choice(["wall", "floor", "roof"]),
+            "quantity": rng.integers(1, 10, rows),
+            "part_tag": pd.array(
+                rng.integers(0, parts, rows).astype(str), dtype="string"
+            ),
+            "material_type": choice(MATERIAL_TYPES),
+            "designation": choice(DESIGNATIONS),
+            "material_subtype": choice(MATERIAL_SUBTYPES),
+            "width": rng.integers(38, 400, rows),
+            "height": rng.integers(38, 400, rows),
+            "length": rng.integers(300, 12000, rows),
+            "additional_info": choice(["", "pre-drilled", None]),
+            "usage_quantity": rng.random(rows) * 10,
+            "finish_quantity": rng.random(rows) * 5,
+        }
+    )
+
+
+def time_transform(bom_df: pd.DataFrame, category: str, trials: int) -> float:
+    times = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        transform_bom(bom_df.copy(), category)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[25_000, 50_000, 100_000, 200_000],
+    )
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=1.5,
+        help="fail if time per row grows by more than this factor",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for category in ["primary_a", "primary_b"]:
+        per_row = []
+        for rows in sorted(args.sizes):
+            seconds = time_transform(make_bom(rows), category, args.trials)
+            per_row.append(seconds / rows)
+            print(
+                f"{category} {rows:>9,} rows: {seconds:7.3f}s "
+                f"({rows / seconds:,.0f} rows/s)"
+            )
+
+        growth = per_row[-1] / per_row[0]
+        print(f"{category} time per row growth: {growth:.2f}x")
+        if growth > args.max_growth:
+            failed = True
+
+    if failed:
+        print("REGRESSION")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -150,3 +150,73 @@ REQUIRED_SQL_COLUMNS = {
     ],
     "secondary": [],
 }
+
+
+# Material standardization rules per BOM category, applied in order so a
+# rule sees the values set by the rules before it. A rule applies to rows
+# where any of its match patterns is found and none of its exclude
+# patterns are. Patterns are case-insensitive regular expressions searched
+# for in the column, missing values never match.
+MATERIAL_CLASSIFICATION_COLUMNS = [
+    "material_type",
+    "material_subtype",
+    "designation",
+]
+
+MATERIAL_CLASSIFICATION_RULES = {
+    "primary_a": [
+        # Douglas Fir Glulam
+        {
+            "match": [
+                ("material_type", "type-A-X"),
+                ("material_subtype", "type-A-X"),
+            ],
+            "set": {"material_type": "TYPE-A", "material_subtype": "TYPE-A-X"},
+        },
+        # standard SPF glulam (excluding Douglas Fir Glulam)
+        {
+            "match": [("material_type", "type-a")],
+            "exclude": [("material_subtype", "type-A-X")],
+            "set": {"material_type": "TYPE-A", "material_subtype": "TYPE-A-S"},
+        },
+        # RBK
+        {
+            "match": [("material_type", "type-b")],
+            "set": {"material_type": "TYPE-B", "material_subtype": "TYPE-B-S"},
+        },
+        # dimensional lumber (e.g. 2x4, 2x6, etc.)
+        {
+            "match": [("material_type", r"^\d+x\d+$")],
+            "set": {"material_type": "TYPE-C"},
+        },
+    ],
+    "primary_b": [
+        # composite material A
+        {
+            "match": [("material_type", "composite-a")],
+            "set": {
+                "material_type": "COMPOSITE-A",
+                "material_subtype": "COMPOSITE-A-S",
+            },
+        },
+        # composite material B
+        {
+            "match": [("material_type", "composite-b")],
+            "set": {
+                "material_type": "COMPOSITE-B",
+                "material_subtype": "COMPOSITE-B-S",
+            },
+        },
+        # plain material
+        {
+            "match": [("material_type", "plain")],
+            "set": {"material_type": "PLAIN"},
+        },
+        # inserts
+        {
+            "match": [("designation", "insert")],
+            "set": {"designation": "INSERT"},
+        },
+    ],
+    "secondary": [],
+}
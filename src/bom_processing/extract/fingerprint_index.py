@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+from bom_processing.file_lock import file_lock
+from config.config import FINGERPRINT_INDEX_PATH
+
+
+logger = logging.getLogger(__name__)
+
+# wait this long for another run writing the index
+INDEX_LOCK_TIMEOUT_SECONDS = 60
+INDEX_LOCK_POLL_SECONDS = 0.05
+
+
+def load_fingerprint_index(
+    index_path: Path = FINGERPRINT_INDEX_PATH,
+) -> dict[str, dict]:
+    """
+    Read the index of the BOM files last processed for each PON
+
+    Return:
+        dict[str, dict]: PON to its fingerprints (file checksums) and the
+            snapshot time they were processed in. Empty if there is no index
+    """
+    if not index_path.exists():
+        return {}
+
+    try:
+        with index_path.open("r") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read fingerprint index {index_path}: {e}")
+        return {}
+
+
+def is_duplicate_upload(
+    pon: str,
+    fingerprints: set[str],
+    index_path: Path = FINGERPRINT_INDEX_PATH,
+) -> bool:
+    """
+    True if fingerprints are exactly the BOM files last processed for pon
+    """
+    entry = load_fingerprint_index(index_path).get(pon)
+    return entry is not None and set(entry["fingerprints"]) == fingerprints
+
+
+def record_fingerprints(
+    fingerprints_by_pon: dict[str, set[str]],
+    snapshot_time: str,
+    index_path: Path = FINGERPRINT_INDEX_PATH,
+) -> None:
+    """
+    Replace the indexed fingerprints of each PON processed in a run
+
+    Runs recording at once take turns through a lock file next to the
+    index, so neither loses the other's PONs. Raises TimeoutError if the
+    lock is not free within INDEX_LOCK_TIMEOUT_SECONDS
+
+    Args:
+        fingerprints_by_pon: PON to the checksums of every BOM file
+            processed for it
+        snapshot_time (str): snapshot time of the run
+        index_path (Path): index file, written atomically
+    """
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = index_path.with_name(index_path.name + ".lock")
+    with file_lock(
+        lock_path, INDEX_LOCK_TIMEOUT_SECONDS, INDEX_LOCK_POLL_SECONDS
+    ):
+        index = load_fingerprint_index(index_path)
+        for pon, fingerprints in fingerprints_by_pon.items():
+            index[pon] = {
+                "fingerprints": sorted(fingerprints),
+                "snapshot_time_utc": snapshot_time,
+            }
+
+        # readers only ever see the old or the new index
+        temp_path = index_path.with_name(index_path.name + ".tmp")
+        with temp_path.open("w") as file:
+            json.dump(index, file, indent=1, sort_keys=True)
+        os.replace(temp_path, index_path)
+
+    logger.info(f"Recorded fingerprints for {len(fingerprints_by_pon)} PONs")
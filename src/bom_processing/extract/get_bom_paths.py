@@ -1,14 +1,22 @@
+from datetime import datetime
 import logging
 import os
 from pathlib import Path
 import re
+from typing import Iterable, Optional
+import zlib
 
+from bom_processing.extract.sidecar import SIDECAR_SUFFIX, get_sidecar_path
 from config.config import DESIGN_PROJECT_DIRECTORY, STAGING_DIR
 
 
 logger = logging.getLogger(__name__)
 
 
+# PON and uploader of a BOM uploaded to staging by the GUI
+STAGED_FILENAME_PATTERN = re.compile(r"^(\d{5,7})_.*_staging_(\w+)\.xls[x]?$")
+
+
 def _get_parent_folders_from(design_directory: Path) -> list[Path]:
     """
     Find project parent folders in design Active Projects
@@ -32,7 +40,7 @@ def _get_output_folders_from(parent_folder: Path) -> list[Path]:
     """
     Find output folders in a single parent folder
     """
-    logger.debug(f"Getting output folders from {parent_folder.name}")
+    logger.debug("Getting output folders from %s", parent_folder.name)
     output_folder_name_format: str = r"^\d+ *- *.+ *- *outputs"
 
     output_folders = [
@@ -42,11 +50,38 @@ def _get_output_folders_from(parent_folder: Path) -> list[Path]:
     ]
 
     if not output_folders:
-        logger.warning(f"No output folders in {parent_folder.name}")
+        logger.warning("No output folders in %s", parent_folder.name)
 
     return output_folders
 
 
+def _select_parent_folders(
+    parent_folders: list[Path], parent_folder_names: Iterable[str]
+) -> list[Path]:
+    """
+    Keep only the named parent folders, matched case-insensitively
+    """
+    wanted = {Path(name).name.strip().lower() for name in parent_folder_names}
+    selected = [
+        folder for folder in parent_folders if folder.name.lower() in wanted
+    ]
+
+    missing = wanted - {folder.name.lower() for folder in selected}
+    for name in sorted(missing):
+        logger.warning(f"Parent folder not found: {name}")
+
+    return selected
+
+
+def shard_of(parent_folder_name: str, shard_count: int) -> int:
+    """
+    Shard, from 1 to shard_count, that a project parent folder belongs to.
+    Stable across processes and machines, unlike hash()
+    """
+    digest = zlib.crc32(parent_folder_name.strip().lower().encode())
+    return digest % shard_count + 1
+
+
 def _get_output_folders(parent_folders: list[Path]) -> list[Path]:
     """
     Find outputs folders from multiple parent folders
@@ -62,13 +97,17 @@ def _get_output_folders(parent_folders: list[Path]) -> list[Path]:
     return output_folders
 
 
+def _output_folder_pon(output_folder: Path) -> str:
+    return output_folder.name.split("-")[0].strip()
+
+
 def _get_bom_paths_from(output_folder: Path) -> dict[str, list[Path]]:
     """
     Find bom files in a single outputs folder
     """
-    logger.debug(f"Searching for BOMs in {output_folder.name}")
+    logger.debug("Searching for BOMs in %s", output_folder.name)
     material_list_name_format = r"^\d+.*.xls(x)?$"
-    pon = output_folder.name.split("-")[0].strip()
+    pon = _output_folder_pon(output_folder)
     bom_files = []
 
     for file in os.listdir(output_folder):
@@ -76,7 +115,7 @@ def _get_bom_paths_from(output_folder: Path) -> dict[str, list[Path]]:
             bom_files.append(output_folder / file)
 
     if not bom_files:
-        logger.warning(f"No BOMs found in {output_folder.name}")
+        logger.warning("No BOMs found in %s", output_folder.name)
 
     return {pon: bom_files} if bom_files else {}
 
@@ -105,13 +144,94 @@ def _aggregate_bom_paths(output_folders: list[Path]) -> dict[str, list[Path]]:
     return bom_dict
 
 
+def filter_bom_records(
+    bom_records: list[dict],
+    pons: Optional[Iterable[str]] = None,
+    modified_since: Optional[datetime] = None,
+) -> list[dict]:
+    """
+    Keep the BOM records for the given PONs and/or PONs with a file modified
+    since a given time. Filters left as None keep every record.
+
+    A PON's rows are replaced as a whole in the final table, so every file
+    of a PON with a modified file is kept, as find_claimable_uploads does
+    for staging
+
+    Args:
+        bom_records (list[dict]): records with keys pon and path
+        pons (Iterable[str], optional): PONs to keep
+        modified_since (datetime, optional): keep PONs with a file modified
+            at or after this time, naive times are local time
+    """
+    if pons is not None:
+        pons = set(pons)
+        bom_records = [
+            record for record in bom_records if record["pon"] in pons
+        ]
+
+    if modified_since is not None:
+        cutoff = modified_since.timestamp()
+        modified_pons = {
+            record["pon"]
+            for record in bom_records
+            if record["path"].stat().st_mtime >= cutoff
+        }
+        bom_records = [
+            record for record in bom_records if record["pon"] in modified_pons
+        ]
+
+    return bom_records
+
+
 def scrape_bom_paths_from_design_directory(
     root_folder: Path = DESIGN_PROJECT_DIRECTORY,
+    pons: Optional[Iterable[str]] = None,
+    parent_folder_names: Optional[Iterable[str]] = None,
+    modified_since: Optional[datetime] = None,
+    shard: Optional[tuple[int, int]] = None,
 ) -> list[dict]:
+    """
+    Find BOM files in the output folders of every project in root_folder
+
+    Args:
+        root_folder (Path): design Active Projects folder
+        pons (Iterable[str], optional): only scrape these PONs
+        parent_folder_names (Iterable[str], optional): only scrape these
+            project parent folders
+        modified_since (datetime, optional): only PONs with a BOM modified
+            since then
+        shard (tuple[int, int], optional): (shard, shard_count), only
+            scrape the parent folders assigned to that shard by shard_of
+    """
     logger.info(f"Scraping BOM paths from {root_folder}")
 
     parent_folders = _get_parent_folders_from(root_folder)
+    if parent_folder_names is not None:
+        parent_folders = _select_parent_folders(
+            parent_folders, parent_folder_names
+        )
+    if shard is not None:
+        shard_number, shard_count = shard
+        parent_folders = [
+            folder
+            for folder in parent_folders
+            if shard_of(folder.name, shard_count) == shard_number
+        ]
+        logger.info(
+            f"Shard {shard_number}/{shard_count}: "
+            f"{len(parent_folders)} parent folders"
+        )
+
     outputs_folders = _get_output_folders(parent_folders)
+    if pons is not None:
+        # skip listing the output folders of every other project
+        pons = set(pons)
+        outputs_folders = [
+            folder
+            for folder in outputs_folders
+            if _output_folder_pon(folder) in pons
+        ]
+
     bom_paths = _aggregate_bom_paths(outputs_folders)
 
     bom_records = []
@@ -125,7 +245,7 @@ def scrape_bom_paths_from_design_directory(
                 }
             )
 
-    return bom_records
+    return filter_bom_records(bom_records, modified_since=modified_since)
 
 
 def scrape_bom_paths_from_staging_folder(
@@ -133,15 +253,23 @@ def scrape_bom_paths_from_staging_folder(
 ) -> list[dict]:
     logger.info(f"Collecting BOM paths from {staging_folder}")
 
-    valid_filename_pattern = re.compile(
-        r"^(\d{5,7})_.*_staging_(\w+)\.xls[x]?$"
-    )
-
     bom_records = []
     invalid_filenames = []
 
     for path in staging_folder.iterdir():
-        match = valid_filename_pattern.match(path.name)
+        # in-progress GUI uploads are written to temporary folders
+        if path.is_dir():
+            continue
+
+        # parsed sidecars are picked up with their workbook below
+        if path.suffix == SIDECAR_SUFFIX:
+            if not path.with_suffix("").exists():
+                logger.warning(
+                    f"Sidecar without a BOM in staging: {path.name}"
+                )
+            continue
+
+        match = STAGED_FILENAME_PATTERN.match(path.name)
         if not match:
             logger.error(f"Unexpected file type in staging: {path.name}")
             invalid_filenames.append(path.name)
@@ -149,16 +277,35 @@ def scrape_bom_paths_from_staging_folder(
 
         pon = match.group(1)
         username = match.group(2)
-        bom_records.append(
-            {
-                "pon": pon,
-                "username": username,
-                "path": path,
-            }
-        )
+        bom_record = {
+            "pon": pon,
+            "username": username,
+            "path": path,
+        }
+        sidecar_path = get_sidecar_path(path)
+        if sidecar_path.exists():
+            bom_record["sidecar"] = sidecar_path
+        bom_records.append(bom_record)
 
     if invalid_filenames:
         raise ValueError(f"Unexpected file names: {sorted(invalid_filenames)}")
 
     return bom_records
 
+
+def log_bom_records(bom_records: list[dict]) -> None:
+    """
+    Log the BOM files a run would process, grouped by PON
+    """
+    files_by_pon: dict[str, list[Path]] = {}
+    for record in bom_records:
+        files_by_pon.setdefault(record["pon"], []).append(record["path"])
+
+    logger.info(
+        f"{len(bom_records)} BOMs across {len(files_by_pon)} PONs "
+        f"would be processed"
+    )
+    for pon in sorted(files_by_pon):
+        logger.info(f"PON {pon}: {len(files_by_pon[pon])} BOMs")
+        for path in sorted(files_by_pon[pon]):
+            logger.info(f"    {path}")
@@ -0,0 +1,169 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from pathlib import Path
+import threading
+from typing import Iterable, Iterator, Optional
+
+from config.config import PREFETCH_FILES, PREFETCH_MAX_MB
+
+
+logger = logging.getLogger(__name__)
+
+
+def _read_file(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except OSError as e:
+        logger.warning("%s: Could not prefetch: %s", path.name, e)
+        return None
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def prefetch_files(
+    paths: Iterable[Path],
+    read_ahead: int = PREFETCH_FILES,
+    max_bytes: int = PREFETCH_MAX_MB * 1024**2,
+) -> Iterator[tuple[Path, Optional[bytes]]]:
+    """
+    Yields each path with its contents, in order, while the next files are
+    read in background threads. Reading a workbook over the network share
+    is many small round trips, reading it in one go ahead of time overlaps
+    that latency with parsing the file before it
+
+    Args:
+        paths: files to read
+        read_ahead (int): files read ahead of the one being parsed, 0 to
+            yield None contents and leave reading to the caller
+        max_bytes (int): files read ahead hold at most this much memory,
+            a larger file is still read once nothing else is held
+
+    Return:
+        Iterator of (path, contents), contents is None if the file could
+            not be read so the caller reads the path and reports the error
+    """
+    paths = list(paths)
+    if read_ahead <= 0:
+        for path in paths:
+            yield path, None
+        return
+
+    pending = deque()
+    held_bytes = 0
+    next_index = 0
+    with ThreadPoolExecutor(
+        max_workers=read_ahead, thread_name_prefix="bom_prefetch"
+    ) as executor:
+        try:
+            while pending or next_index < len(paths):
+                while next_index < len(paths) and len(pending) < read_ahead:
+                    path = paths[next_index]
+                    size = _file_size(path)
+                    if pending and held_bytes + size > max_bytes:
+                        break
+                    pending.append(
+                        (path, executor.submit(_read_file, path), size)
+                    )
+                    held_bytes += size
+                    next_index += 1
+
+                path, future, size = pending.popleft()
+                contents = future.result()
+                held_bytes -= size
+                yield path, contents
+        finally:
+            # stopped early, skip the reads that have not started
+            for _, future, _ in pending:
+                future.cancel()
+
+
+class ReadAhead:
+    """
+    Reads the next read_ahead of paths in background threads, for callers
+    that must not wait on a read, e.g. extract_in_workers, which only puts
+    a time limit on the worker processes. A file whose read has not
+    finished when it is taken is left to the caller to read, and a read
+    stuck on the share only holds its daemon thread. Its size counts
+    against max_bytes until it finishes and its contents are dropped
+
+    Files are taken in order, see take
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        read_ahead: int = PREFETCH_FILES,
+        max_bytes: int = PREFETCH_MAX_MB * 1024**2,
+    ):
+        self.paths = list(paths)
+        self.read_ahead = read_ahead
+        self.max_bytes = max_bytes
+        # reads started, by index in paths: (finished, contents, size)
+        self._reads: dict[int, tuple[threading.Event, list, int]] = {}
+        # reads taken before they finished, still holding their bytes
+        self._unfinished: list[tuple[threading.Event, list, int]] = []
+        self._held_bytes = 0
+        self._next_index = 0
+        self._start_reads()
+
+    def _release_finished(self) -> None:
+        for read in [read for read in self._unfinished if read[0].is_set()]:
+            finished, contents, size = read
+            # the caller read the file itself, drop these contents
+            contents.clear()
+            self._unfinished.remove(read)
+            self._held_bytes -= size
+
+    def _start_reads(self) -> None:
+        self._release_finished()
+        while (
+            self._next_index < len(self.paths)
+            and len(self._reads) < self.read_ahead
+        ):
+            path = self.paths[self._next_index]
+            size = _file_size(path)
+            if self._reads and self._held_bytes + size > self.max_bytes:
+                break
+
+            finished = threading.Event()
+            contents = []
+
+            def _read(path=path, finished=finished, contents=contents):
+                contents.append(_read_file(path))
+                finished.set()
+
+            threading.Thread(
+                target=_read, name="bom_prefetch", daemon=True
+            ).start()
+            self._reads[self._next_index] = (finished, contents, size)
+            self._held_bytes += size
+            self._next_index += 1
+
+    def take(self, index: int) -> Optional[bytes]:
+        """
+        Contents of paths[index], or None if its read has not finished or
+        failed. Starts reading the files after it
+
+        Args:
+            index (int): the file after the one taken before
+        """
+        read = self._reads.pop(index, None)
+        self._next_index = max(self._next_index, index + 1)
+        contents = None
+        if read is not None:
+            finished, file_contents, size = read
+            if finished.is_set():
+                contents = file_contents[0]
+                self._held_bytes -= size
+            else:
+                # its bytes stay held until the read finishes
+                self._unfinished.append(read)
+        self._start_reads()
+
+        return contents
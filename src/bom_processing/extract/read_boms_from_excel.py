@@ -1,21 +1,22 @@
+from io import BytesIO
 import logging
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import numpy as np
 import pandas as pd
 
 from bom_processing.constants import (
     COLUMN_RENAME_MAPS,
-    REQUIRED_COLUMNS_AFTER_RENAME,
     NUMERIC_AS_STRING_COLUMNS,
     EXPECTED_DTYPES_CLEANING,
-    NULLABLE_COLUMNS,
 )
-from bom_processing.validation.column_validation import (
-    validate_required_columns,
-    validate_non_null_columns,
-    ValidationError,
+from config.config import PROCESSING_ENGINE
+from bom_processing.validation.column_validation import ValidationError
+from bom_processing.validation.validation_report import (
+    BOMValidationError,
+    summary_row_mask,
+    validate_bom,
 )
 
 
@@ -42,20 +43,10 @@ def _identify_bom_category(bom_df: pd.DataFrame) -> Optional[str]:
     elif "Dia [mm]" in bom_df.columns:
         bom_type = "secondary"
 
-    logger.debug(f"BOM type: {bom_type}")
+    logger.debug("BOM type: %s", bom_type)
     return bom_type
 
 
-def is_summary_row(row: pd.Series) -> bool:
-    blank_columns_in_summary_rows = [
-        "part_tag",
-        "height",
-        "width",
-        "length",
-    ]
-    return all(pd.isna(row[col]) for col in blank_columns_in_summary_rows)
-
-
 def assign_dtypes(
     df: pd.DataFrame,
     expected_dtypes: dict,
@@ -101,23 +92,13 @@ def clean_primary_a_bom(primary_a_df: pd.DataFrame) -> pd.DataFrame:
     reverse_renaming = {v: k for k, v in column_renaming.items()}
     primary_a_df = primary_a_df.rename(columns=column_renaming)
 
-    required_columns = REQUIRED_COLUMNS_AFTER_RENAME["primary"]
-    validate_required_columns(
-        primary_a_df,
-        required_columns,
-        stage="cleaning",
-        reverse_renaming=reverse_renaming,
-    )
-
-    primary_a_df = primary_a_df[~primary_a_df.apply(is_summary_row, axis=1)]
+    primary_a_df = primary_a_df[~summary_row_mask(primary_a_df)]
 
-    nullable_columns = NULLABLE_COLUMNS["primary"]
-    validate_non_null_columns(
-        primary_a_df,
-        nullable_columns,
-        stage="cleaning",
-        reverse_renaming=reverse_renaming,
-    )
+    # every problem in the BOM is reported at once, so the dtypes below
+    # can only fail on something unexpected
+    issues = validate_bom(primary_a_df, "primary", reverse_renaming)
+    if issues:
+        raise BOMValidationError(issues)
 
     expected_dtypes = EXPECTED_DTYPES_CLEANING["primary"]
     numeric_strings = NUMERIC_AS_STRING_COLUMNS["primary"]
@@ -133,23 +114,11 @@ def clean_primary_b_bom(primary_b_df: pd.DataFrame) -> pd.DataFrame:
     reverse_renaming = {v: k for k, v in column_renaming.items()}
     primary_b_df = primary_b_df.rename(columns=column_renaming)
 
-    required_columns = REQUIRED_COLUMNS_AFTER_RENAME["primary"]
-    validate_required_columns(
-        primary_b_df,
-        required_columns,
-        "cleaning",
-        reverse_renaming=reverse_renaming,
-    )
-
-    primary_b_df = primary_b_df[~primary_b_df.apply(is_summary_row, axis=1)]
+    primary_b_df = primary_b_df[~summary_row_mask(primary_b_df)]
 
-    nullable_columns = NULLABLE_COLUMNS["primary"]
-    validate_non_null_columns(
-        primary_b_df,
-        nullable_columns,
-        stage="cleaning",
-        reverse_renaming=reverse_renaming,
-    )
+    issues = validate_bom(primary_b_df, "primary", reverse_renaming)
+    if issues:
+        raise BOMValidationError(issues)
 
     expected_dtypes = EXPECTED_DTYPES_CLEANING["primary"]
     numeric_strings = NUMERIC_AS_STRING_COLUMNS["primary"]
@@ -165,34 +134,55 @@ def clean_secondary_bom(metal_df: pd.DataFrame) -> pd.DataFrame:
     return metal_df
 
 
-def extract_bom_data(bom_path: Path) -> Optional[dict[str, Any]]:
+def _primary_cleaners(engine: str) -> dict[str, Callable]:
+    if engine == "polars":
+        from bom_processing import polars_engine
+
+        return {
+            "primary_a": polars_engine.clean_primary_a_bom,
+            "primary_b": polars_engine.clean_primary_b_bom,
+        }
+    if engine != "pandas":
+        raise ValueError(f"Unknown processing engine: {engine}")
+    return {
+        "primary_a": clean_primary_a_bom,
+        "primary_b": clean_primary_b_bom,
+    }
+
+
+def extract_bom_data(
+    bom_path: Path,
+    engine: str = PROCESSING_ENGINE,
+    data: Optional[bytes] = None,
+) -> Optional[dict[str, Any]]:
     """
     Extract and perform basic cleaning for a single BOM
 
     Args:
         bom_path (Path): A single BOM file path.
+        engine (str): pandas or polars, see PROCESSING_ENGINE
+        data (bytes, optional): the file's contents if already read, e.g.
+            by prefetch_files, instead of reading bom_path
 
     Return:
         dict[str, Any] | None: Dictionary containing cleaned BOM and category, or None if extraction fails
     """
-    logger.debug(f"Extracting BOM {bom_path.name}")
+    logger.debug("Extracting BOM %s", bom_path.name)
 
     try:
-        bom_df = pd.read_excel(bom_path)
+        bom_df = pd.read_excel(BytesIO(data) if data is not None else bom_path)
 
         bom_category = _identify_bom_category(bom_df)
 
         if bom_category is None:
             raise BOMTypeError(f"Unknown BOM category for: {bom_path.name}")
 
-        if bom_category == "primary_a":
-            cleaned_bom = clean_primary_a_bom(bom_df)
-        elif bom_category == "primary_b":
-            cleaned_bom = clean_primary_b_bom(bom_df)
+        if bom_category in ("primary_a", "primary_b"):
+            cleaned_bom = _primary_cleaners(engine)[bom_category](bom_df)
         elif bom_category == "secondary":
             cleaned_bom = clean_secondary_bom(bom_df)
         else:
-            logger.warning(f"Unknown BOM category for {bom_path.name}")
+            logger.warning("Unknown BOM category for %s", bom_path.name)
             raise BOMTypeError(f"Unhandled BOM category for: {bom_path.name}")
 
         bom_dict = {"df": cleaned_bom, "category": bom_category}
@@ -200,15 +190,14 @@ def extract_bom_data(bom_path: Path) -> Optional[dict[str, Any]]:
         return bom_dict
 
     except ValidationError as ve:
-        logger.debug(f"{bom_path.name}: Validation error: {ve}")
+        logger.debug("%s: Validation error: %s", bom_path.name, ve)
         raise ve
     except KeyError as ke:
-        logger.debug(f"{bom_path.name}: Missing column: {ke}")
+        logger.debug("%s: Missing column: %s", bom_path.name, ke)
         raise ke
     except ValueError as ve:
-        logger.debug(f"{bom_path.name}: Dtype conversion error: {ve}")
+        logger.debug("%s: Dtype conversion error: %s", bom_path.name, ve)
         raise ve
     except Exception as e:
-        logger.warning(f"{bom_path.name}: Unexpected error: {e}")
+        logger.warning("%s: Unexpected error: %s", bom_path.name, e)
         raise e
-
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+SIDECAR_SUFFIX = ".parquet"
+CHECKSUM_KEY = b"bom_checksum"
+CATEGORY_KEY = b"bom_category"
+
+
+def file_checksum(path: Path) -> str:
+    """
+    SHA-256 of a file's contents
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_sidecar_path(bom_path: Path) -> Path:
+    """
+    Sidecar location for a BOM, e.g. 12345_primary_a.xls.parquet
+    """
+    return bom_path.with_name(bom_path.name + SIDECAR_SUFFIX)
+
+
+def write_sidecar(
+    bom_dict: dict[str, Any], sidecar_path: Path, checksum: str
+) -> None:
+    """
+    Write an extracted BOM to a Parquet sidecar
+
+    Args:
+        bom_dict: output of extract_bom_data, with keys df and category
+        sidecar_path (Path): file to write
+        checksum (str): checksum of the workbook the BOM was extracted from
+    """
+    # imported here so the upload GUI can start without loading pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(bom_dict["df"])
+    metadata = {
+        **(table.schema.metadata or {}),
+        CHECKSUM_KEY: checksum.encode(),
+        CATEGORY_KEY: bom_dict["category"].encode(),
+    }
+    pq.write_table(table.replace_schema_metadata(metadata), sidecar_path)
+
+
+def read_sidecar(
+    bom_path: Path,
+    sidecar_path: Optional[Path] = None,
+    data: Optional[bytes] = None,
+) -> Optional[dict[str, Any]]:
+    """
+    Read the extracted BOM from a workbook's sidecar
+
+    Args:
+        bom_path (Path): the workbook
+        sidecar_path (Path, optional): defaults to get_sidecar_path(bom_path)
+        data (bytes, optional): the workbook's contents if already read, to
+            checksum instead of reading bom_path again
+
+    Return:
+        dict[str, Any] | None: Dictionary containing cleaned BOM and
+            category, or None if there is no usable sidecar or its checksum
+            does not match the workbook
+    """
+    import pyarrow.parquet as pq
+
+    sidecar_path = sidecar_path or get_sidecar_path(bom_path)
+    if not sidecar_path.exists():
+        return None
+
+    try:
+        table = pq.read_table(sidecar_path)
+    except Exception as e:
+        logger.warning("%s: Unreadable sidecar: %s", sidecar_path.name, e)
+        return None
+
+    metadata = table.schema.metadata or {}
+    checksum = metadata.get(CHECKSUM_KEY, b"").decode()
+    bom_checksum = (
+        hashlib.sha256(data).hexdigest()
+        if data is not None
+        else file_checksum(bom_path)
+    )
+    if checksum != bom_checksum:
+        logger.warning(
+            "%s: Checksum does not match %s", sidecar_path.name, bom_path.name
+        )
+        return None
+
+    return {
+        "df": table.to_pandas(),
+        "category": metadata[CATEGORY_KEY].decode(),
+    }
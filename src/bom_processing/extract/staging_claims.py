@@ -0,0 +1,203 @@
+from datetime import datetime
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+from typing import Iterable, Optional
+
+from bom_processing.extract.get_bom_paths import STAGED_FILENAME_PATTERN
+from bom_processing.extract.sidecar import SIDECAR_SUFFIX, get_sidecar_path
+from config.config import (
+    PROCESSED_DIR,
+    QUARANTINE_DIR,
+    STAGING_CLAIM_SETTLE_SECONDS,
+    STAGING_DIR,
+    STAGING_PROCESSING_DIR,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_claimable_uploads(
+    staging_folder: Path = STAGING_DIR,
+    pons: Optional[Iterable[str]] = None,
+    modified_since: Optional[datetime] = None,
+    settle_seconds: float = STAGING_CLAIM_SETTLE_SECONDS,
+) -> tuple[dict[str, list[Path]], list[Path]]:
+    """
+    Find the uploads waiting in staging, grouped by PON. An upload replaces
+    the PON's whole snapshot, so a PON's files are only ever claimed
+    together, and only once none of them changed in the last
+    settle_seconds.
+
+    Args:
+        staging_folder (Path): folder the GUI uploads to
+        pons (Iterable[str], optional): only PONs in pons
+        modified_since (datetime, optional): only PONs with a file
+            modified since then
+        settle_seconds (float): minimum age of the newest file of a PON
+
+    Return:
+        tuple: PON to its BOM files, and files with unexpected names
+    """
+    uploads: dict[str, list[Path]] = {}
+    invalid_paths = []
+
+    for path in staging_folder.iterdir():
+        # temporary upload folders and the claim, archive and quarantine
+        # folders are never claimed
+        if path.is_dir():
+            continue
+
+        # sidecars are claimed with their workbook
+        if path.suffix == SIDECAR_SUFFIX:
+            continue
+
+        match = STAGED_FILENAME_PATTERN.match(path.name)
+        if not match:
+            invalid_paths.append(path)
+            continue
+
+        uploads.setdefault(match.group(1), []).append(path)
+
+    if pons is not None:
+        pons = set(pons)
+        uploads = {pon: paths for pon, paths in uploads.items() if pon in pons}
+
+    settled_before = time.time() - settle_seconds
+    claimable = {}
+    for pon, paths in uploads.items():
+        try:
+            newest = max(path.stat().st_mtime for path in paths)
+        except FileNotFoundError:
+            # claimed by another run or replaced by a new upload
+            continue
+
+        if newest > settled_before:
+            logger.info(f"Upload for PON {pon} is still settling, skipping")
+            continue
+        if modified_since is not None and newest < modified_since.timestamp():
+            continue
+        claimable[pon] = sorted(paths)
+
+    return claimable, invalid_paths
+
+
+def _move_with_sidecar(path: Path, destination_dir: Path) -> bool:
+    """
+    Move a BOM and its sidecar, if it has one, into destination_dir
+
+    Return:
+        bool: False if the BOM was gone, e.g. claimed by another run
+    """
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        shutil.move(path, destination_dir / path.name)
+    except FileNotFoundError:
+        return False
+
+    sidecar_path = get_sidecar_path(path)
+    try:
+        shutil.move(
+            sidecar_path, get_sidecar_path(destination_dir / path.name)
+        )
+    except FileNotFoundError:
+        pass
+
+    return True
+
+
+def claim_uploads(
+    uploads: dict[str, list[Path]],
+    run_id: str,
+    processing_root: Path = STAGING_PROCESSING_DIR,
+) -> Path:
+    """
+    Claim uploads for a run by moving them into processing_root/run_id.
+    The move is an atomic rename, so when runs overlap each upload is
+    claimed by exactly one of them.
+
+    Return:
+        Path: the run's processing folder
+    """
+    processing_dir = processing_root / run_id
+    processing_dir.mkdir(parents=True, exist_ok=True)
+
+    claimed = 0
+    for pon, paths in uploads.items():
+        # whichever run moves the PON's first file owns the whole upload,
+        # so overlapping runs never split a PON between them
+        for position, path in enumerate(sorted(paths)):
+            try:
+                os.rename(path, processing_dir / path.name)
+            except FileNotFoundError:
+                if position == 0:
+                    logger.info(f"PON {pon} already claimed by another run")
+                    break
+                logger.warning(f"{path.name} removed from staging mid claim")
+                continue
+            claimed += 1
+
+            sidecar_path = get_sidecar_path(path)
+            try:
+                os.rename(
+                    sidecar_path, get_sidecar_path(processing_dir / path.name)
+                )
+            except FileNotFoundError:
+                pass
+
+    logger.info(f"Claimed {claimed} BOMs into {processing_dir}")
+    return processing_dir
+
+
+def quarantine_files(paths: Iterable[Path], run_id: str, reason: str) -> None:
+    """
+    Move files that could not be processed to QUARANTINE_DIR/run_id
+    """
+    for path in paths:
+        if _move_with_sidecar(path, QUARANTINE_DIR / run_id):
+            logger.error(f"Quarantined {path.name}: {reason}")
+
+
+def archive_files(paths: Iterable[Path], run_id: str) -> None:
+    """
+    Move processed files to PROCESSED_DIR/run_id
+    """
+    for path in paths:
+        if _move_with_sidecar(path, PROCESSED_DIR / run_id):
+            logger.info(f"Archived {path.name}")
+
+
+def release_claim(
+    processing_dir: Path, staging_folder: Path = STAGING_DIR
+) -> None:
+    """
+    Return the files of a failed run to staging for the next run. Files of
+    a PON that has been uploaded again in the meantime are superseded by
+    the new upload and are archived instead.
+    """
+    waiting_pons = {
+        match.group(1)
+        for path in staging_folder.iterdir()
+        if (match := STAGED_FILENAME_PATTERN.match(path.name))
+    }
+
+    for path in sorted(processing_dir.iterdir()):
+        if path.suffix == SIDECAR_SUFFIX:
+            continue
+
+        match = STAGED_FILENAME_PATTERN.match(path.name)
+        if match and match.group(1) in waiting_pons:
+            archive_files([path], processing_dir.name)
+            logger.info(f"{path.name} superseded by a newer upload")
+        else:
+            _move_with_sidecar(path, staging_folder)
+
+    try:
+        processing_dir.rmdir()
+    except OSError:
+        logger.warning(f"Files left behind in {processing_dir}")
+
+    logger.info(f"Released claim {processing_dir.name} back to staging")
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import time
+
+
+@contextmanager
+def file_lock(
+    lock_path: Path, timeout_seconds: float, poll_seconds: float = 1.0
+):
+    """
+    Exclusive lock between processes, including on other machines sharing
+    the folder: a lock file created exclusively by the holder and deleted
+    when it is released
+
+    Args:
+        lock_path (Path): the lock file
+        timeout_seconds (float): wait for the holder this long
+        poll_seconds (float): how often to check the lock again
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Could not lock {lock_path} within {timeout_seconds}s, "
+                    "delete it if nothing else holds it"
+                )
+            time.sleep(poll_seconds)
+
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    try:
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta, timezone
+import logging
+from pathlib import Path
+import time
+from typing import Iterable, Optional
+
+import pandas as pd
+import sqlalchemy as sa
+
+from bom_processing.load.load_to_sql import (
+    _db_settings,
+    _get_db_connection,
+)
+from bom_processing.load.sqlite_backend import read_sql_script
+from config.config import (
+    AS_OF_CACHE_DIR,
+    AS_OF_CACHE_HOURS,
+    AS_OF_CACHE_MARGIN_HOURS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+AS_OF_SCRIPT = "select_example_bom_final_history_as_of.sql"
+
+# PONs per query, SQL Server takes at most 2100 parameters
+AS_OF_QUERY_BATCH_SIZE = 1000
+
+HISTORY_DTYPES = {
+    "pon": "string",
+    "part_tag": "Int64",
+    "quantity": "float64",
+    "material_category": "string",
+    "material_type": "string",
+    "material_subtype": "string",
+    "height": "Int64",
+    "width": "Int64",
+    "length": "Int64",
+    "usage_quantity": "float64",
+    "finish_quantity": "float64",
+    "designation": "string",
+    "element": "string",
+    "additional_info": "string",
+    "load_method": "string",
+    "snapshot_time_utc": "string",
+    "bom_filename": "string",
+    "uploaded_by": "string",
+    "item_id": "string",
+    "material_status": "string",
+    "is_item_unmatched": "Int64",
+}
+
+
+def _as_utc(as_of: datetime) -> datetime:
+    """
+    as_of in UTC without tzinfo, the way snapshot_datetime_utc holds it.
+    Naive datetimes are taken to be UTC already
+    """
+    if as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    return as_of.replace(microsecond=0)
+
+
+def _history_dtypes(bom_df: pd.DataFrame) -> pd.DataFrame:
+    return bom_df.astype(HISTORY_DTYPES)[list(HISTORY_DTYPES)]
+
+
+def _cache_path(cache_dir: Path, pon: str, as_of: datetime) -> Path:
+    return cache_dir / f"{as_of:%Y%m%dT%H%M%S}_{pon}.parquet"
+
+
+def _read_cached(path: Path, max_age_seconds: float) -> Optional[pd.DataFrame]:
+    try:
+        if time.time() - path.stat().st_mtime > max_age_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        return pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"{path.name}: Unreadable as-of cache entry: {e}")
+        return None
+
+
+def _write_cached(bom_df: pd.DataFrame, path: Path) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        bom_df.to_parquet(temp_path, index=False)
+        temp_path.replace(path)
+    except OSError as e:
+        logger.warning(f"Could not cache {path.name}: {e}")
+
+
+def _query_as_of(pons: list[str], as_of: datetime) -> pd.DataFrame:
+    backend = _db_settings()["backend"]
+    query = sa.text(read_sql_script(AS_OF_SCRIPT, backend)).bindparams(
+        sa.bindparam("pons", expanding=True),
+        sa.bindparam("as_of", type_=sa.DateTime()),
+    )
+
+    frames = []
+    with _get_db_connection() as conn:
+        for start in range(0, len(pons), AS_OF_QUERY_BATCH_SIZE):
+            result = conn.execute(
+                query,
+                {
+                    "pons": pons[start : start + AS_OF_QUERY_BATCH_SIZE],
+                    "as_of": as_of,
+                },
+            )
+            frames.append(
+                pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+            )
+
+    return _history_dtypes(pd.concat(frames, ignore_index=True))
+
+
+def read_boms_as_of(
+    pons: Iterable[str],
+    as_of: datetime,
+    cache_hours: float = AS_OF_CACHE_HOURS,
+    cache_dir: Path = AS_OF_CACHE_DIR,
+    cache_margin_hours: float = AS_OF_CACHE_MARGIN_HOURS,
+) -> pd.DataFrame:
+    """
+    The BOMs of pons as they were at as_of: for each PON, the rows of its
+    latest snapshot in example_bom_final_history taken at or before as_of.
+    Needs the create_history_as_of_index.sql migration, see
+    apply_migrations
+
+    PONs already queried for the same as_of within cache_hours are read
+    from the local cache instead. Results for an as_of less than
+    cache_margin_hours ago are never cached, a run still loading a
+    snapshot taken before as_of would change them
+
+    Args:
+        pons (Iterable[str]): PONs to reconstruct
+        as_of (datetime): point in time, naive datetimes are taken as UTC
+        cache_hours (float): reuse cached results this recent, 0 to always
+            query the database
+        cache_dir (Path): folder of the local cache
+        cache_margin_hours (float): only cache as_of times at least this
+            old, longer than any ETL run
+
+    Return:
+        pd.DataFrame: history rows with HISTORY_DTYPES, sorted by PON. PONs
+            with no snapshot at as_of have no rows
+    """
+    as_of = _as_utc(as_of)
+    pons = sorted({str(pon) for pon in pons})
+    settled_before = datetime.now(timezone.utc).replace(
+        tzinfo=None
+    ) - timedelta(hours=cache_margin_hours)
+    cacheable = cache_hours > 0 and as_of < settled_before
+
+    frames = []
+    missing_pons = pons
+    if cacheable:
+        missing_pons = []
+        for pon in pons:
+            cached = _read_cached(
+                _cache_path(cache_dir, pon, as_of), cache_hours * 3600
+            )
+            if cached is None:
+                missing_pons.append(pon)
+            else:
+                frames.append(cached)
+        logger.debug(
+            f"As-of {as_of}: {len(pons) - len(missing_pons)} of {len(pons)} "
+            "PONs cached"
+        )
+
+    if missing_pons:
+        queried_df = _query_as_of(missing_pons, as_of)
+        frames.append(queried_df)
+        if cacheable:
+            # PONs with no snapshot are cached as empty frames
+            pon_frames = dict(tuple(queried_df.groupby("pon", sort=False)))
+            for pon in missing_pons:
+                _write_cached(
+                    pon_frames.get(pon, queried_df.iloc[:0]),
+                    _cache_path(cache_dir, pon, as_of),
+                )
+
+    if not frames:
+        return _history_dtypes(pd.DataFrame(columns=list(HISTORY_DTYPES)))
+
+    bom_df = pd.concat(frames, ignore_index=True)
+    return bom_df.sort_values("pon", kind="stable").reset_index(drop=True)
@@ -0,0 +1,129 @@
+import logging
+import time
+
+import sqlalchemy as sa
+
+from bom_processing.load.load_to_sql import (
+    _db_settings,
+    _get_db_connection,
+    execute_sql_script,
+)
+from config.config import (
+    HISTORY_COMPACTION_BATCH_SIZE,
+    HISTORY_COMPACTION_MAX_BATCHES,
+    HISTORY_COMPACTION_PAUSE_SECONDS,
+    HISTORY_RETENTION_DAYS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _count_history_rows(conn: sa.engine.Connection) -> int:
+    schema = _db_settings()["schema"]
+    return conn.execute(
+        sa.text(f"SELECT COUNT(*) FROM {schema}.example_bom_final_history")
+    ).scalar_one()
+
+
+def _time_current_view(conn: sa.engine.Connection) -> float:
+    """
+    Seconds taken to read the current view, which is what
+    refresh_final_current_bom_table materializes
+    """
+    schema = _db_settings()["schema"]
+    start = time.perf_counter()
+    conn.execute(
+        sa.text(f"SELECT COUNT(*) FROM {schema}.vw_example_bom_final_current")
+    ).scalar_one()
+    return time.perf_counter() - start
+
+
+def compact_history_table(
+    retention_days: int = HISTORY_RETENTION_DAYS,
+    batch_size: int = HISTORY_COMPACTION_BATCH_SIZE,
+    max_batches: int = HISTORY_COMPACTION_MAX_BATCHES,
+    pause_seconds: float = HISTORY_COMPACTION_PAUSE_SECONDS,
+) -> dict:
+    """
+    Compacts example_bom_final_history. Every snapshot from the last
+    retention_days is kept, older snapshots are reduced to the last
+    snapshot per PON per ISO week, Monday to Sunday. The latest snapshot
+    of every PON is always kept, so the current view is unaffected.
+
+    Rows are deleted in batches of batch_size, each committed on its own
+    with a pause in between so the ETL is never blocked for long.
+
+    Args:
+        retention_days (int): days of history kept in full
+        batch_size (int): maximum rows deleted per batch
+        max_batches (int): stop after this many batches, 0 for no limit
+        pause_seconds (float): pause between batches
+
+    Return:
+        dict: rows before and after, rows reclaimed, batches run, and the
+            time to read the current view before and after compaction
+    """
+    db = _db_settings()
+    logger.info(
+        f"Compacting {db['host']}: {db['schema']}.example_bom_final_history, "
+        f"keeping {retention_days} days of full history"
+    )
+
+    if not db["schema"]:
+        raise ValueError(
+            "Missing DB_SCHEMA environment variable. Please set the schema for the database."
+        )
+
+    with _get_db_connection() as conn:
+        rows_before = _count_history_rows(conn)
+        view_seconds_before = _time_current_view(conn)
+        conn.commit()
+
+        rows_reclaimed = 0
+        batches = 0
+        while not max_batches or batches < max_batches:
+            try:
+                deleted = execute_sql_script(
+                    conn,
+                    "compact_example_bom_final_history.sql",
+                    {
+                        "retention_days": retention_days,
+                        "batch_size": batch_size,
+                    },
+                ).rowcount
+                conn.commit()
+            except sa.exc.SQLAlchemyError as e:
+                logger.error(f"History compaction batch failed: {e}")
+                conn.rollback()
+                raise
+
+            batches += 1
+            rows_reclaimed += deleted
+            logger.debug(f"Compaction batch {batches}: {deleted} rows deleted")
+
+            if deleted < batch_size:
+                break
+            time.sleep(pause_seconds)
+
+        rows_after = _count_history_rows(conn)
+        view_seconds_after = _time_current_view(conn)
+        conn.commit()
+
+    report = {
+        "rows_before": rows_before,
+        "rows_after": rows_after,
+        "rows_reclaimed": rows_reclaimed,
+        "batches": batches,
+        "current_view_seconds_before": round(view_seconds_before, 3),
+        "current_view_seconds_after": round(view_seconds_after, 3),
+    }
+
+    logger.info(
+        f"History compaction reclaimed {rows_reclaimed} of {rows_before} rows "
+        f"in {batches} batches. Current view read time "
+        f"{report['current_view_seconds_before']}s -> "
+        f"{report['current_view_seconds_after']}s"
+    )
+
+    return report
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from pathlib import Path
+import time
+from typing import Callable
+
+from dotenv import dotenv_values
+
+from bom_processing.load.load_to_sql import use_load_target
+
+
+logger = logging.getLogger(__name__)
+
+
+def read_load_target(name: str, env_dir: Path = Path(".")) -> dict:
+    """
+    Connection settings of a named load target from the DB_ variables of
+    its .env file, e.g. .env.prod for prod. Only the database is taken from
+    the file, everything else comes from the run's own .env file
+
+    Args:
+        name (str): target name, e.g. dev or prod
+        env_dir (Path): folder holding the .env files
+    """
+    env_path = env_dir / f".env.{name}"
+    if not env_path.is_file():
+        raise ValueError(f"No settings for load target {name}: {env_path}")
+
+    values = dotenv_values(env_path)
+    return {
+        "name": name,
+        "backend": (values.get("DB_BACKEND") or "mssql").lower(),
+        "host": values.get("DB_HOST"),
+        "database": values.get("DB_NAME"),
+        "schema": values.get("DB_SCHEMA"),
+        "user": values.get("DB_USER"),
+        "password": values.get("DB_PASS"),
+        "sqlite_path": Path(
+            values.get("SQLITE_DB_PATH") or "local_db/bom_schema.sqlite3"
+        ),
+    }
+
+
+def load_into_targets(
+    targets: list[dict], load: Callable[[], None]
+) -> list[dict]:
+    """
+    Run load once for every target, all at once in their own threads. Each
+    run sends its loads and refreshes to its target's database over its own
+    connections and transactions, so a target that fails leaves the others
+    loaded
+
+    Args:
+        targets: settings from read_load_target
+        load: the load steps, e.g. loading staging and refreshing the final
+            table, run with use_load_target set to the target
+
+    Return:
+        list[dict]: per target, its name, status (success or failed), the
+            seconds its load took and the error if it failed
+    """
+
+    def _load_target(target: dict) -> dict:
+        start = time.perf_counter()
+        logger.info(f"Loading target {target['name']}")
+        try:
+            with use_load_target(target):
+                load()
+        except Exception as e:
+            logger.exception(f"Load into target {target['name']} failed")
+            return {
+                "target": target["name"],
+                "status": "failed",
+                "seconds": time.perf_counter() - start,
+                "error": str(e),
+            }
+
+        seconds = time.perf_counter() - start
+        logger.info(f"Loaded target {target['name']} in {seconds:.1f}s")
+        return {
+            "target": target["name"],
+            "status": "success",
+            "seconds": seconds,
+            "error": None,
+        }
+
+    with ThreadPoolExecutor(
+        max_workers=len(targets), thread_name_prefix="load_target"
+    ) as executor:
+        results = list(executor.map(_load_target, targets))
+
+    for result in results:
+        logger.info(
+            f"Target {result['target']}: {result['status']} "
+            f"in {result['seconds']:.1f}s"
+            + (f", {result['error']}" if result["error"] else "")
+        )
+    return results
+
+
+def raise_for_failed_targets(results: list[dict]) -> None:
+    """
+    Fail the run if any target failed to load, after every target has had
+    its turn
+    """
+    failed = [
+        result["target"] for result in results if result["status"] != "success"
+    ]
+    if failed:
+        raise RuntimeError(f"Load failed for targets: {', '.join(failed)}")
@@ -1,40 +1,211 @@
-from importlib import resources
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 import logging
 from pathlib import Path
+from typing import Callable, Optional
 
+import numpy as np
 import pandas as pd
 import sqlalchemy as sa
 
-from config.config import DB_HOST, DB_NAME, DB_SCHEMA, DB_USER, DB_PASS
+from bom_processing.load.sqlite_backend import (
+    create_sqlite_engine,
+    read_sql_script,
+    split_sql_statements,
+    sqlite_load_lock,
+)
+from config.config import (
+    DB_BACKEND,
+    DB_HOST,
+    DB_NAME,
+    DB_SCHEMA,
+    DB_USER,
+    DB_PASS,
+    LOAD_BATCH_SIZE,
+    LOAD_PARALLELISM,
+    LOAD_PARTITION_BY,
+    SQLITE_DB_PATH,
+    STAGING_LOCK_TIMEOUT_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
+# database loaded by the current thread when loading into several targets,
+# None for the database configured in the .env file, see use_load_target
+_load_target: ContextVar[Optional[dict]] = ContextVar(
+    "load_target", default=None
+)
 
-def _get_db_connection() -> sa.engine.Connection:
+
+def _db_settings() -> dict:
     """
-    Creates and returns a connection to the database using environment variables
+    Connection settings of the database loads go to: the load target set
+    by use_load_target, or the DB_ variables of the .env file
+    """
+    target = _load_target.get()
+    if target is not None:
+        return target
+    return {
+        "name": "default",
+        "backend": DB_BACKEND,
+        "host": DB_HOST,
+        "database": DB_NAME,
+        "schema": DB_SCHEMA,
+        "user": DB_USER,
+        "password": DB_PASS,
+        "sqlite_path": SQLITE_DB_PATH,
+    }
+
+
+@contextmanager
+def use_load_target(target: dict):
     """
+    Send every load, refresh and lock in this thread to target instead of
+    the database of the .env file, see read_load_target
+    """
+    token = _load_target.set(target)
+    try:
+        yield
+    finally:
+        _load_target.reset(token)
+
+
+def _get_db_engine(pool_size: int = 5) -> sa.engine.Engine:
+    """
+    Creates and returns an engine for the database using environment variables
+
+    Args:
+        pool_size (int): number of pooled connections the engine keeps open
+    """
+    db = _db_settings()
+    if db["backend"] == "sqlite":
+        if not db["schema"]:
+            raise ValueError(
+                "Missing DB_SCHEMA environment variable. Please set the schema for the database."
+            )
+        return create_sqlite_engine(db["sqlite_path"], db["schema"])
+    if db["backend"] != "mssql":
+        raise ValueError(f"Unknown database backend: {db['backend']}")
+
     driver = "ODBC Driver 18 for SQL Server"
 
-    if not all([DB_HOST, DB_NAME, DB_USER, DB_PASS]):
+    if not all([db["host"], db["database"], db["user"], db["password"]]):
         logger.error("Missing database connection environment variables.")
         raise ValueError("Missing database connection environment variables.")
 
-    logger.info(
-        f"Attempting to connect to {DB_NAME} on {DB_HOST}"
+    connection_string = f"mssql+pyodbc://{db['user']}:{db['password']}@{db['host']}/{db['database']}?TrustServerCertificate=yes&Driver={driver}"
+
+    return sa.create_engine(
+        connection_string, pool_size=pool_size, max_overflow=0
     )
-    connection_string = f"mssql+pyodbc://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?TrustServerCertificate=yes&Driver={driver}"
+
+
+def _get_db_connection() -> sa.engine.Connection:
+    """
+    Creates and returns a connection to the database using environment variables
+    """
+    db = _db_settings()
+    logger.info(f"Attempting to connect to {db['database']} on {db['host']}")
 
     try:
-        engine = sa.create_engine(connection_string)
+        engine = _get_db_engine()
         conn = engine.connect()
-        logger.info(f"Successfully connected to {DB_NAME} on {DB_HOST}.")
+        logger.info(
+            f"Successfully connected to {db['database']} on {db['host']}."
+        )
         return conn
     except Exception as e:
         logger.error(f"Error connecting to the database {str(e)}")
         raise
 
 
+@contextmanager
+def staging_load_lock(timeout_seconds: float = STAGING_LOCK_TIMEOUT_SECONDS):
+    """
+    Holds an exclusive application lock on the staging table, so runs that
+    overlap take turns loading staging and refreshing from it
+
+    Args:
+        timeout_seconds (float): wait for another run to finish this long
+    """
+    db = _db_settings()
+    if db["backend"] == "sqlite":
+        with sqlite_load_lock(db["sqlite_path"], timeout_seconds):
+            yield
+        return
+
+    lock_resource = f"{db['schema']}.example_bom_staging"
+    with _get_db_connection() as conn:
+        result = conn.execute(
+            sa.text(
+                "DECLARE @result INT; "
+                "EXEC @result = sp_getapplock @Resource = :resource, "
+                "@LockMode = 'Exclusive', @LockOwner = 'Session', "
+                "@LockTimeout = :timeout_ms; "
+                "SELECT @result"
+            ),
+            {
+                "resource": lock_resource,
+                "timeout_ms": int(timeout_seconds * 1000),
+            },
+        ).scalar_one()
+        conn.commit()
+        if result < 0:
+            raise TimeoutError(
+                f"Could not lock {lock_resource} within {timeout_seconds}s "
+                f"(sp_getapplock returned {result})"
+            )
+
+        logger.info(f"Locked {lock_resource} for loading")
+        try:
+            yield
+        finally:
+            conn.execute(
+                sa.text(
+                    "EXEC sp_releaseapplock @Resource = :resource, "
+                    "@LockOwner = 'Session'"
+                ),
+                {"resource": lock_resource},
+            )
+            conn.commit()
+            logger.info(f"Released {lock_resource}")
+
+
+def execute_sql_script(
+    conn: sa.engine.Connection, script: str, params: Optional[dict] = None
+) -> sa.engine.CursorResult:
+    """
+    Runs an SQL script from bom_processing.sql on conn, without committing
+
+    Args:
+        conn : SQL Alchemy connection to Database
+        script (str): file name of the script
+        params (dict, optional): bound parameters of the script
+
+    Return:
+        CursorResult: result of the script's last statement
+    """
+    db = _db_settings()
+    sql = read_sql_script(script, db["backend"])
+    statements = (
+        split_sql_statements(sql) if db["backend"] == "sqlite" else [sql]
+    )
+    for statement in statements:
+        result = conn.execute(sa.text(statement), params or {})
+    return result
+
+
+def _supported_parallelism(parallelism: int) -> int:
+    db = _db_settings()
+    # SQLite has one writer at a time, partitions held open in parallel
+    # transactions would wait on each other until they time out
+    if db["backend"] == "sqlite" and parallelism > 1:
+        logger.info("SQLite backend, loading over a single connection")
+        return 1
+    return parallelism
+
+
 def clear_table(table_name: str, conn: sa.engine.Connection) -> None:
     """
     Deletes all rows in existing table_name in SQL Server
@@ -43,18 +214,167 @@ def clear_table(table_name: str, conn: sa.engine.Connection) -> None:
         table_name (str): table to load the BOM df into
         conn : SQL Alchemy connection to Database
     """
-    logger.info(f"Deleting data from {DB_SCHEMA}.{table_name}")
-    if not DB_SCHEMA:
+    db = _db_settings()
+    logger.info(f"Deleting data from {db['schema']}.{table_name}")
+    if not db["schema"]:
         raise ValueError(
             "Missing DB_SCHEMA environment variable. Please set the schema for the database."
         )
 
     try:
-        conn.execute(sa.text(f"DELETE FROM {DB_SCHEMA}.{table_name}"))
+        conn.execute(sa.text(f"DELETE FROM {db['schema']}.{table_name}"))
+        conn.commit()
+        logger.info(f"Successfully cleared {db['schema']}.{table_name}")
+    except sa.exc.SQLAlchemyError as e:
+        logger.error(f"Delete failed for {db['schema']}.{table_name}: {e}")
+        raise
+
+
+def clear_stale_rows(
+    table_name: str, snapshot_time: str, conn: sa.engine.Connection
+) -> None:
+    """
+    Deletes all rows in table_name not from the snapshot at snapshot_time,
+    e.g. rows left in staging by earlier runs when several shards load a
+    run into it. Run under staging_load_lock, staging folder runs delete
+    their own rows before releasing it, so only rows of runs that stopped
+    before finishing are deleted
+
+    Args:
+        table_name (str): table with a snapshot_time_utc column
+        snapshot_time (str): snapshot whose rows are kept
+        conn : SQL Alchemy connection to Database
+    """
+    db = _db_settings()
+    logger.info(
+        f"Deleting rows from {db['schema']}.{table_name} not from snapshot "
+        f"{snapshot_time}"
+    )
+    if not db["schema"]:
+        raise ValueError(
+            "Missing DB_SCHEMA environment variable. Please set the schema for the database."
+        )
+
+    try:
+        deleted = conn.execute(
+            sa.text(
+                f"DELETE FROM {db['schema']}.{table_name} "
+                "WHERE snapshot_time_utc <> :snapshot_time"
+            ),
+            {"snapshot_time": snapshot_time},
+        ).rowcount
+        conn.commit()
+        logger.info(
+            f"Deleted {deleted} stale rows from {db['schema']}.{table_name}"
+        )
+    except sa.exc.SQLAlchemyError as e:
+        logger.error(f"Delete failed for {db['schema']}.{table_name}: {e}")
+        raise
+
+
+def clear_snapshot_rows(
+    table_name: str,
+    snapshot_time: str,
+    load_method: str,
+    conn: sa.engine.Connection,
+) -> None:
+    """
+    Deletes the rows of one run from table_name, e.g. an upload run's rows
+    from staging once it has refreshed from them, so staging only holds the
+    committed batches of full scrapes between runs. Snapshot times are to
+    the second, so runs are told apart by load method as well
+
+    Args:
+        table_name (str): table with snapshot_time_utc and load_method
+        snapshot_time (str): snapshot time of the run
+        load_method (str): load method of the run, e.g. upload
+        conn : SQL Alchemy connection to Database
+    """
+    db = _db_settings()
+    logger.info(
+        f"Deleting {load_method} rows of snapshot {snapshot_time} from "
+        f"{db['schema']}.{table_name}"
+    )
+    if not db["schema"]:
+        raise ValueError(
+            "Missing DB_SCHEMA environment variable. Please set the schema for the database."
+        )
+
+    try:
+        conn.execute(
+            sa.text(
+                f"DELETE FROM {db['schema']}.{table_name} "
+                "WHERE snapshot_time_utc = :snapshot_time "
+                "AND load_method = :load_method"
+            ),
+            {"snapshot_time": snapshot_time, "load_method": load_method},
+        )
+        conn.commit()
+    except sa.exc.SQLAlchemyError as e:
+        logger.error(f"Delete failed for {db['schema']}.{table_name}: {e}")
+        raise
+
+
+def count_snapshot_rows(
+    table_name: str, snapshot_time: str, conn: sa.engine.Connection
+) -> int:
+    """
+    Number of rows in table_name from the snapshot at snapshot_time
+
+    Args:
+        table_name (str): table with a snapshot_time_utc column
+        snapshot_time (str): snapshot whose rows are counted
+        conn : SQL Alchemy connection to Database
+    """
+    db = _db_settings()
+    return conn.execute(
+        sa.text(
+            f"SELECT COUNT(*) FROM {db['schema']}.{table_name} "
+            "WHERE snapshot_time_utc = :snapshot_time"
+        ),
+        {"snapshot_time": snapshot_time},
+    ).scalar_one()
+
+
+def clear_batch_rows(
+    table_name: str, batch_df: pd.DataFrame, conn: sa.engine.Connection
+) -> None:
+    """
+    Deletes the rows of batch_df's PONs from its snapshot and load method,
+    e.g. the partitions a parallel load committed before a later commit
+    failed, so a batch is either loaded whole or not at all
+
+    Args:
+        table_name (str): table with snapshot_time_utc and load_method
+        batch_df (pd.DataFrame): the batch whose rows are deleted
+        conn : SQL Alchemy connection to Database
+    """
+    db = _db_settings()
+    pons = sorted(batch_df["pon"].unique())
+    snapshot_time = batch_df["snapshot_time_utc"].iloc[0]
+    load_method = batch_df["load_method"].iloc[0]
+    logger.info(
+        f"Deleting {len(pons)} PONs of snapshot {snapshot_time} from "
+        f"{db['schema']}.{table_name}"
+    )
+
+    query = sa.text(
+        f"DELETE FROM {db['schema']}.{table_name} "
+        "WHERE pon IN :pons AND snapshot_time_utc = :snapshot_time "
+        "AND load_method = :load_method"
+    ).bindparams(sa.bindparam("pons", expanding=True))
+    try:
+        conn.execute(
+            query,
+            {
+                "pons": pons,
+                "snapshot_time": snapshot_time,
+                "load_method": load_method,
+            },
+        )
         conn.commit()
-        logger.info(f"Successfully cleared {DB_SCHEMA}.{table_name}")
     except sa.exc.SQLAlchemyError as e:
-        logger.error(f"Delete failed for {DB_SCHEMA}.{table_name}: {e}")
+        logger.error(f"Delete failed for {db['schema']}.{table_name}: {e}")
         raise
 
 
@@ -69,12 +389,13 @@ def load_df_to_sql(
         bom_df (pd.DataFrame, optional): df to load into table_name
         conn : SQL Alchemy connection to Database
     """
+    db = _db_settings()
 
     logger.info(
-        f"Saving BOMs to {DB_SCHEMA}.{table_name} in {DB_NAME} on {DB_HOST}"
+        f"Saving BOMs to {db['schema']}.{table_name} in {db['database']} on {db['host']}"
     )
 
-    if not DB_SCHEMA:
+    if not db["schema"]:
         raise ValueError(
             "Missing DB_SCHEMA environment variable. Please set the schema for the database."
         )
@@ -83,57 +404,263 @@ def load_df_to_sql(
         bom_df.to_sql(
             table_name,
             con=conn,
-            schema=DB_SCHEMA,
+            schema=db["schema"],
             if_exists="append",
             index=False,
         )
-        logger.info(f"Data loaded in to {DB_SCHEMA}.{table_name}")
+        logger.info(f"Data loaded in to {db['schema']}.{table_name}")
 
     except sa.exc.SQLAlchemyError as e:
         logger.error(
-            f"Error loading data into {DB_SCHEMA}.{table_name}: {str(e)}"
+            f"Error loading data into {db['schema']}.{table_name}: {str(e)}"
         )
         raise
 
 
-def delete_and_insert_to_sql(table_name: str, bom_df: pd.DataFrame) -> None:
+def partition_df(
+    bom_df: pd.DataFrame, partitions: int, partition_by: str = "pon"
+) -> list[pd.DataFrame]:
     """
-    Assumes df columns have been validated
+    Splits bom_df into at most `partitions` non-empty frames for loading
+
+    Args:
+        bom_df (pd.DataFrame): df to split
+        partitions (int): maximum number of frames to return
+        partition_by (str): "pon" keeps all rows of a PON in one frame and
+            balances frames by row count, "rows" splits into contiguous
+            row ranges of near equal size
+
+    Return:
+        list[pd.DataFrame]: frames that together contain every row once
+    """
+    if partitions <= 1 or len(bom_df) <= 1:
+        return [bom_df]
+
+    if partition_by == "rows":
+        bounds = np.linspace(0, len(bom_df), partitions + 1, dtype=int)
+        frames = [
+            bom_df.iloc[start:stop]
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+    elif partition_by == "pon":
+        # largest PONs first, each onto the partition with the fewest rows
+        pon_sizes = (
+            bom_df.groupby("pon", sort=False)
+            .size()
+            .sort_values(ascending=False, kind="stable")
+        )
+        partition_rows = [0] * partitions
+        pon_partitions = {}
+        for pon, size in pon_sizes.items():
+            smallest = partition_rows.index(min(partition_rows))
+            pon_partitions[pon] = smallest
+            partition_rows[smallest] += size
+
+        labels = bom_df["pon"].map(pon_partitions)
+        frames = [bom_df[labels == i] for i in range(partitions)]
+    else:
+        raise ValueError(f"Unknown partition_by value: {partition_by}")
+
+    return [frame for frame in frames if not frame.empty]
+
+
+def _insert_partition(
+    table_name: str,
+    partition: pd.DataFrame,
+    conn: sa.engine.Connection,
+    schema: str,
+) -> int:
+    """
+    Inserts one partition inside the transaction already open on conn
+    """
+    partition.to_sql(
+        table_name,
+        con=conn,
+        schema=schema,
+        if_exists="append",
+        index=False,
+    )
+    return len(partition)
+
+
+def load_df_to_sql_parallel(
+    table_name: str,
+    bom_df: pd.DataFrame,
+    engine: sa.engine.Engine,
+    parallelism: int = LOAD_PARALLELISM,
+    partition_by: str = LOAD_PARTITION_BY,
+) -> None:
+    """
+    Appends bom_df into table_name over several pooled connections at once.
+    Each partition is inserted in its own open transaction, and the
+    transactions are only committed once every partition has been inserted,
+    so if any insert fails all of them are rolled back.
+
+    The commits themselves run one after another and are not atomic
+    together: if one fails, the partitions committed before it stay in
+    table_name. load_df_to_sql_in_batches deletes the batch's rows when
+    that happens
 
     Args:
         table_name (str): table to load the BOM df into
-        bom_df (pd.DataFrame, optional): df to load into table_name
+        bom_df (pd.DataFrame): df to load into table_name
+        engine : SQL Alchemy engine with a pool of at least parallelism
+        parallelism (int): number of concurrent connections
+        partition_by (str): "pon" or "rows", see partition_df
     """
-    with _get_db_connection() as conn:
-        clear_table(table_name, conn)
-        load_df_to_sql(table_name, bom_df, conn)
+    db = _db_settings()
+    if not db["schema"]:
+        raise ValueError(
+            "Missing DB_SCHEMA environment variable. Please set the schema for the database."
+        )
+
+    partitions = partition_df(bom_df, parallelism, partition_by)
+    logger.info(
+        f"Saving BOMs to {db['schema']}.{table_name} in {len(partitions)} "
+        f"partitions by {partition_by}"
+    )
+
+    connections = []
+    transactions = []
+    try:
+        for _ in partitions:
+            conn = engine.connect()
+            connections.append(conn)
+            transactions.append(conn.begin())
+
+        with ThreadPoolExecutor(max_workers=len(partitions)) as executor:
+            futures = [
+                executor.submit(
+                    _insert_partition, table_name, part, conn, db["schema"]
+                )
+                for part, conn in zip(partitions, connections)
+            ]
+            inserted = sum(future.result() for future in futures)
+
+        for transaction in transactions:
+            transaction.commit()
+        logger.info(
+            f"Data loaded in to {db['schema']}.{table_name}: {inserted} rows"
+        )
+
+    except Exception as e:
+        logger.error(
+            f"Error loading data into {db['schema']}.{table_name}, rolling back all partitions: {str(e)}"
+        )
+        for transaction in transactions:
+            if transaction.is_active:
+                transaction.rollback()
+        raise
+
+    finally:
+        for conn in connections:
+            conn.close()
 
 
-def refresh_final_bom_table():
+def load_df_to_sql_in_batches(
+    table_name: str,
+    bom_df: pd.DataFrame,
+    on_batch_committed: Optional[Callable[[pd.DataFrame], None]] = None,
+    clear_first: bool = False,
+    batch_size: int = LOAD_BATCH_SIZE,
+    parallelism: int = LOAD_PARALLELISM,
+    lock_batches: bool = False,
+) -> None:
+    """
+    Appends bom_df into table_name in batches of batch_size PONs, committing
+    each batch before starting the next so an interrupted load can continue
+    from the last committed batch. A batch that fails to load leaves none
+    of its rows behind
+
+    Args:
+        table_name (str): table to load the BOM df into
+        bom_df (pd.DataFrame): df to load into table_name
+        on_batch_committed: called with each batch's rows once committed
+        clear_first (bool): delete existing rows before the first batch
+        batch_size (int): number of PONs per batch
+        parallelism (int): connections each batch is loaded over
+        lock_batches (bool): hold staging_load_lock while loading each
+            batch, for loads that do not hold it throughout, e.g. shards
+    """
+    db = _db_settings()
+    parallelism = _supported_parallelism(parallelism)
+    pons = sorted(bom_df["pon"].unique())
+    batch_count = -(-len(pons) // batch_size)
+    logger.info(
+        f"Loading {len(pons)} PONs into {db['schema']}.{table_name} in "
+        f"{batch_count} batches"
+    )
+
+    engine = _get_db_engine(pool_size=max(parallelism, 1) + 1)
+    try:
+        if clear_first:
+            with engine.connect() as conn:
+                clear_table(table_name, conn)
+
+        for batch_number, start in enumerate(
+            range(0, len(pons), batch_size), start=1
+        ):
+            batch_pons = pons[start : start + batch_size]
+            batch_df = bom_df[bom_df["pon"].isin(batch_pons)]
+
+            with staging_load_lock() if lock_batches else nullcontext():
+                if parallelism > 1:
+                    try:
+                        load_df_to_sql_parallel(
+                            table_name, batch_df, engine, parallelism
+                        )
+                    except Exception:
+                        # partitions committed before a failed commit are
+                        # not recorded as committed, remove them so a
+                        # resumed run does not load them twice
+                        with engine.connect() as conn:
+                            clear_batch_rows(table_name, batch_df, conn)
+                        raise
+                else:
+                    with engine.connect() as conn:
+                        load_df_to_sql(table_name, batch_df, conn)
+
+            logger.info(f"Committed batch {batch_number}/{batch_count}")
+            if on_batch_committed is not None:
+                on_batch_committed(batch_df)
+
+    finally:
+        engine.dispose()
+
+
+def refresh_final_bom_table(staged_snapshot: Optional[str] = None):
     """
     Refreshes the forecast_timber_bom_final table from the view by deleting
     existing rows and inserting fresh data.
 
     Uses an SQL script to delete and insert the most recent BOM data.
-    For a full table refresh only
+    For a full table refresh, or with staged_snapshot for a scoped
+    reprocess that only replaces the rows of the PONs it staged
+
+    Args:
+        staged_snapshot (str, optional): snapshot time of the scoped
+            reprocess, PONs it did not stage are left untouched
     """
+    db = _db_settings()
     logger.info(
-        f"Refreshing final table in {DB_HOST}: {DB_SCHEMA}.example_bom_final"
+        f"Refreshing final table in {db['host']}: {db['schema']}.example_bom_final"
+        + (" for staged PONs" if staged_snapshot is not None else "")
     )
 
+    if staged_snapshot is None:
+        script = "refresh_example_bom_final_table.sql"
+        params = None
+    else:
+        script = "refresh_example_bom_final_table_for_staged_pons.sql"
+        params = {"snapshot_time": staged_snapshot}
+
     try:
-        with (
-            resources.files("bom_processing.sql")
-            .joinpath("refresh_example_final_table.sql")
-            .open("r") as file
-        ):
-            sql_refresh_query = file.read()
         with _get_db_connection() as conn:
-            conn.execute(sa.text(sql_refresh_query))
+            execute_sql_script(conn, script, params)
             conn.commit()
 
         logger.info(
-            f"Final table refreshed in {DB_SCHEMA}.example_bom_final"
+            f"Final table refreshed in {db['schema']}.example_bom_final"
         )
 
     except Exception as e:
@@ -143,30 +670,33 @@ def refresh_final_bom_table():
     return
 
 
-def insert_uploads_into_history_table():
+def insert_uploads_into_history_table(snapshot_time: str):
     """
     Inserts data from the view into the historic final BOM table
 
     Uses an SQL script to insert the most recent processed uploaded BOMs.
     For user uploaded BOMs only
+
+    Args:
+        snapshot_time (str): snapshot time of the upload run, other runs'
+            rows in staging are left out
     """
+    db = _db_settings()
     logger.info(
-        f"Inserting staging data into {DB_HOST}: {DB_SCHEMA}.example_bom_final_history"
+        f"Inserting staging data into {db['host']}: {db['schema']}.example_bom_final_history"
     )
 
     try:
-        with (
-            resources.files("bom_processing.sql")
-            .joinpath("insert_staging_into_history_table.sql")
-            .open("r") as file
-        ):
-            sql_refresh_query = file.read()
         with _get_db_connection() as conn:
-            conn.execute(sa.text(sql_refresh_query))
+            execute_sql_script(
+                conn,
+                "insert_staging_into_history_table.sql",
+                {"snapshot_time": snapshot_time},
+            )
             conn.commit()
 
         logger.info(
-            f"Final table refreshed in {DB_SCHEMA}.example_bom_final_history"
+            f"Final table refreshed in {db['schema']}.example_bom_final_history"
         )
 
     except Exception as e:
@@ -184,23 +714,20 @@ def refresh_final_current_bom_table():
     Uses an SQL script to delete and insert the most recent BOM data.
     For a full table refresh only
     """
+    db = _db_settings()
     logger.info(
-        f"Refreshing final table in {DB_HOST}: {DB_SCHEMA}.example_bom_final_current"
+        f"Refreshing final table in {db['host']}: {db['schema']}.example_bom_final_current"
     )
 
     try:
-        with (
-            resources.files("bom_processing.sql")
-            .joinpath("refresh_example_final_current_table.sql")
-            .open("r") as file
-        ):
-            sql_refresh_query = file.read()
         with _get_db_connection() as conn:
-            conn.execute(sa.text(sql_refresh_query))
+            execute_sql_script(
+                conn, "refresh_example_bom_final_current_table.sql"
+            )
             conn.commit()
 
         logger.info(
-            f"Final table refreshed in {DB_SCHEMA}.example_bom_final_current"
+            f"Final table refreshed in {db['schema']}.example_bom_final_current"
         )
 
     except Exception as e:
@@ -209,3 +736,80 @@ def refresh_final_current_bom_table():
 
     return
 
+
+def refresh_material_rollup_table(snapshot_time: str):
+    """
+    Refreshes the material demand rollup for the PONs in the staging table
+
+    Uses an SQL script to delete and re-aggregate total quantity, usage
+    quantity and finish quantity per PON and material from the current
+    table. PONs not in staging are left untouched.
+    For user uploaded BOMs only, run after the current table is refreshed
+
+    Args:
+        snapshot_time (str): snapshot time of the upload run whose PONs
+            are refreshed
+    """
+    db = _db_settings()
+    logger.info(
+        f"Refreshing rollup table in {db['host']}: {db['schema']}.example_bom_material_rollup"
+    )
+
+    try:
+        with _get_db_connection() as conn:
+            execute_sql_script(
+                conn,
+                "refresh_example_bom_material_rollup.sql",
+                {"snapshot_time": snapshot_time},
+            )
+            conn.commit()
+
+        logger.info(
+            f"Rollup table refreshed in {db['schema']}.example_bom_material_rollup"
+        )
+
+    except Exception as e:
+        logger.error(f"Error refreshing rollup table: {e}")
+        raise
+
+    return
+
+
+def read_current_boms_for_staged_pons(snapshot_time: str) -> pd.DataFrame:
+    """
+    Parts of the PONs in the staging table as example_bom_final_current
+    holds them, i.e. their previous revision until the current table is
+    refreshed. Empty for PONs uploaded for the first time
+
+    Args:
+        snapshot_time (str): snapshot time of the upload run whose PONs
+            are read
+    """
+    db = _db_settings()
+    logger.info(
+        f"Reading current BOMs of staged PONs from {db['schema']}.example_bom_final_current"
+    )
+
+    with _get_db_connection() as conn:
+        result = execute_sql_script(
+            conn,
+            "select_current_boms_for_staged_pons.sql",
+            {"snapshot_time": snapshot_time},
+        )
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def append_revision_changes(changes_df: pd.DataFrame) -> None:
+    """
+    Appends the output of diff_bom_snapshots to the revision change table
+
+    Args:
+        changes_df (pd.DataFrame): parts added, removed and changed by the
+            uploaded revisions
+    """
+    if changes_df.empty:
+        logger.info("No revision changes to record")
+        return
+
+    with _get_db_connection() as conn:
+        load_df_to_sql("example_bom_revision_changes", changes_df, conn)
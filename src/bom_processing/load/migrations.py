@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+import logging
+
+import sqlalchemy as sa
+
+from bom_processing.load.load_to_sql import (
+    _db_settings,
+    _get_db_connection,
+    execute_sql_script,
+    staging_load_lock,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# one-time schema changes, applied in this order and recorded in
+# schema_migrations. Each script skips what already exists, SQLite's
+# versions are no-ops since create_bom_schema.sql creates everything
+MIGRATIONS = [
+    "create_history_as_of_index.sql",
+    "create_example_bom_material_rollup.sql",
+    # the rollup of PONs not uploaded since it was added
+    "rebuild_example_bom_material_rollup.sql",
+    "create_example_bom_revision_changes.sql",
+]
+
+
+def _record_migration(conn: sa.engine.Connection, script: str) -> None:
+    db = _db_settings()
+    conn.execute(
+        sa.text(
+            f"INSERT INTO {db['schema']}.schema_migrations "
+            "([script], [applied_at_utc]) VALUES (:script, :applied_at)"
+        ),
+        {
+            "script": script,
+            "applied_at": datetime.now(timezone.utc).isoformat(
+                timespec="seconds"
+            ),
+        },
+    )
+
+
+def apply_migrations() -> list[str]:
+    """
+    Applies the MIGRATIONS not yet recorded in schema_migrations, creating
+    it if missing. Once they have all been applied this only reads
+    schema_migrations, so the staging folder ETL calls it before every load.
+    Runs under staging_load_lock, migrations may rewrite tables runs refresh
+
+    Return:
+        list[str]: the scripts applied by this call
+    """
+    db = _db_settings()
+    logger.info(f"Checking schema migrations in {db['host']}: {db['schema']}")
+
+    applied = []
+    try:
+        with staging_load_lock(), _get_db_connection() as conn:
+            execute_sql_script(conn, "create_schema_migrations.sql")
+            conn.commit()
+
+            recorded = set(
+                conn.execute(
+                    sa.text(
+                        f"SELECT [script] FROM {db['schema']}.schema_migrations"
+                    )
+                ).scalars()
+            )
+            for script in MIGRATIONS:
+                if script in recorded:
+                    continue
+
+                logger.info(f"Applying migration {script}")
+                execute_sql_script(conn, script)
+                _record_migration(conn, script)
+                conn.commit()
+                applied.append(script)
+
+    except Exception as e:
+        logger.error(f"Error applying migrations: {e}")
+        raise
+
+    return applied
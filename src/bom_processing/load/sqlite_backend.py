@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from importlib import resources
+import logging
+from pathlib import Path
+
+import sqlalchemy as sa
+
+from bom_processing.file_lock import file_lock
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA_SCRIPT = "create_bom_schema.sql"
+
+# how often a run waiting for the staging lock checks it again
+LOCK_POLL_SECONDS = 1.0
+
+
+def read_sql_script(script: str, backend: str = "mssql") -> str:
+    """
+    Text of an SQL script from bom_processing.sql. SQLite uses its own
+    version from sql/sqlite where the SQL Server one will not run
+
+    Args:
+        script (str): file name, e.g. refresh_example_bom_final_table.sql
+        backend (str): mssql or sqlite
+    """
+    scripts = resources.files("bom_processing.sql")
+    if backend == "sqlite" and scripts.joinpath("sqlite", script).is_file():
+        scripts = scripts.joinpath("sqlite")
+
+    with scripts.joinpath(script).open("r") as file:
+        return file.read()
+
+
+def split_sql_statements(sql: str) -> list[str]:
+    """
+    SQLite runs one statement per execute, SQL Server runs a whole script
+    as one batch. The scripts have no semicolons inside strings
+    """
+    return [
+        statement.strip() for statement in sql.split(";") if statement.strip()
+    ]
+
+
+def create_sqlite_engine(db_path: Path, schema: str) -> sa.engine.Engine:
+    """
+    Engine for a local SQLite stand-in of the SQL Server database. The file
+    at db_path is attached on every connection under the schema name, so
+    schema.table names and the SQL scripts work unchanged, and the schema's
+    tables and emulated views are created if missing
+
+    Args:
+        db_path (Path): database file holding the schema's tables
+        schema (str): schema name the SQL scripts use, e.g. bom_schema
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # each connection opens the file itself, so nothing is shared between
+    # threads or kept open between loads
+    engine = sa.create_engine("sqlite://", poolclass=sa.pool.NullPool)
+
+    @sa.event.listens_for(engine, "connect")
+    def _attach_schema(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ? AS " + schema, (str(db_path),))
+        # wait for another connection's write instead of failing at once
+        cursor.execute("PRAGMA busy_timeout = 30000")
+        cursor.execute(f"PRAGMA {schema}.journal_mode = WAL")
+        cursor.close()
+
+    with engine.begin() as conn:
+        sql = read_sql_script(SCHEMA_SCRIPT, "sqlite")
+        for statement in split_sql_statements(sql):
+            conn.execute(sa.text(statement))
+
+    return engine
+
+
+@contextmanager
+def sqlite_load_lock(db_path: Path, timeout_seconds: float):
+    """
+    Stand-in for the sp_getapplock staging lock: a lock file next to the
+    database, created exclusively by the run holding the lock
+
+    Args:
+        db_path (Path): the SQLite database file
+        timeout_seconds (float): wait for another run to finish this long
+    """
+    lock_path = db_path.with_name(db_path.name + ".staging.lock")
+    with file_lock(lock_path, timeout_seconds, LOCK_POLL_SECONDS):
+        logger.info(f"Locked {lock_path} for loading")
+        try:
+            yield
+        finally:
+            logger.info(f"Released {lock_path}")
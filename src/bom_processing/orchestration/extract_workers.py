@@ -0,0 +1,408 @@
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+import sys
+import time
+from typing import Iterator, Optional
+
+from bom_processing.extract.prefetch import ReadAhead, prefetch_files
+from bom_processing.extract.read_boms_from_excel import extract_bom_data
+from bom_processing.extract.sidecar import read_sidecar
+from config.config import (
+    EXTRACT_MEMORY_LIMIT_MB,
+    EXTRACT_WORKERS,
+    PREFETCH_FILES,
+)
+from config.logging_config import (
+    configure_worker_logging,
+    get_worker_log_queue,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# why a worker gave up on a file, as opposed to extraction raising
+TIMED_OUT = "timed out"
+MEMORY_LIMIT = "memory limit exceeded"
+WORKER_DIED = "worker died"
+
+# results held for files finished out of order, per worker
+BUFFERED_RESULTS_PER_WORKER = 4
+
+# how long a stopped worker gets to exit before it is killed
+WORKER_STOP_SECONDS = 5
+
+
+def extract_record(
+    record: dict, data: Optional[bytes] = None
+) -> Optional[dict]:
+    """
+    Extracted BOM of a record, from its sidecar when it has a usable one,
+    else by parsing the workbook. Raises what extract_bom_data raises
+
+    Args:
+        record (dict): BOM record with path and optionally sidecar
+        data (bytes, optional): the file's contents if already read
+    """
+    if "sidecar" in record:
+        bom_dict = read_sidecar(record["path"], record["sidecar"], data)
+        if bom_dict is not None:
+            logger.debug("Read BOM from sidecar: %s", record["path"].name)
+            return bom_dict
+    return extract_bom_data(record["path"], data=data)
+
+
+def _outcome(
+    bom: Optional[dict] = None,
+    error: Optional[Exception] = None,
+    reason: Optional[str] = None,
+) -> dict:
+    return {"bom": bom, "error": error, "reason": reason}
+
+
+def extract_in_process(
+    records: list[dict], read_ahead: int
+) -> Iterator[tuple[dict, dict]]:
+    """
+    Extract records one after another in this process, reading the next
+    read_ahead files in the background, see prefetch_files
+
+    Return:
+        Iterator[tuple[dict, dict]]: each record with its outcome, a dict of
+            bom (extracted BOM or None), error (exception raised or None)
+            and reason (always None here), in the order of records
+    """
+    files = prefetch_files([record["path"] for record in records], read_ahead)
+    for record, (_, data) in zip(records, files):
+        try:
+            outcome = _outcome(bom=extract_record(record, data))
+        except Exception as e:
+            outcome = _outcome(error=e)
+        yield record, outcome
+
+
+def _limit_memory_windows(limit_bytes: int) -> bool:
+    """
+    Put this process in a job object capping its committed memory
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    class BasicLimitInformation(ctypes.Structure):
+        _fields_ = [
+            ("PerProcessUserTimeLimit", ctypes.c_int64),
+            ("PerJobUserTimeLimit", ctypes.c_int64),
+            ("LimitFlags", wintypes.DWORD),
+            ("MinimumWorkingSetSize", ctypes.c_size_t),
+            ("MaximumWorkingSetSize", ctypes.c_size_t),
+            ("ActiveProcessLimit", wintypes.DWORD),
+            ("Affinity", ctypes.c_size_t),
+            ("PriorityClass", wintypes.DWORD),
+            ("SchedulingClass", wintypes.DWORD),
+        ]
+
+    class IoCounters(ctypes.Structure):
+        _fields_ = [
+            ("ReadOperationCount", ctypes.c_uint64),
+            ("WriteOperationCount", ctypes.c_uint64),
+            ("OtherOperationCount", ctypes.c_uint64),
+            ("ReadTransferCount", ctypes.c_uint64),
+            ("WriteTransferCount", ctypes.c_uint64),
+            ("OtherTransferCount", ctypes.c_uint64),
+        ]
+
+    class ExtendedLimitInformation(ctypes.Structure):
+        _fields_ = [
+            ("BasicLimitInformation", BasicLimitInformation),
+            ("IoInfo", IoCounters),
+            ("ProcessMemoryLimit", ctypes.c_size_t),
+            ("JobMemoryLimit", ctypes.c_size_t),
+            ("PeakProcessMemoryUsed", ctypes.c_size_t),
+            ("PeakJobMemoryUsed", ctypes.c_size_t),
+        ]
+
+    job_object_limit_process_memory = 0x100
+    job_object_extended_limit_information = 9
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.SetInformationJobObject.argtypes = [
+        wintypes.HANDLE,
+        ctypes.c_int,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+    ]
+    kernel32.AssignProcessToJobObject.argtypes = [
+        wintypes.HANDLE,
+        wintypes.HANDLE,
+    ]
+
+    job = kernel32.CreateJobObjectW(None, None)
+    if not job:
+        return False
+
+    limits = ExtendedLimitInformation()
+    limits.BasicLimitInformation.LimitFlags = job_object_limit_process_memory
+    limits.ProcessMemoryLimit = limit_bytes
+    # the job handle stays open for the life of the worker
+    return bool(
+        kernel32.SetInformationJobObject(
+            job,
+            job_object_extended_limit_information,
+            ctypes.byref(limits),
+            ctypes.sizeof(limits),
+        )
+        and kernel32.AssignProcessToJobObject(
+            job, kernel32.GetCurrentProcess()
+        )
+    )
+
+
+def _limit_memory(limit_mb: int) -> None:
+    """
+    Cap the memory of this process at limit_mb, allocations past it raise
+    MemoryError. Does nothing if limit_mb is 0
+    """
+    if limit_mb <= 0:
+        return
+
+    limit_bytes = limit_mb * 1024**2
+    try:
+        if sys.platform == "win32":
+            limited = _limit_memory_windows(limit_bytes)
+        else:
+            import resource
+
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+            limited = True
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning("Could not limit extraction worker memory: %s", e)
+        return
+
+    if not limited:
+        logger.warning("Could not limit extraction worker memory")
+
+
+def _worker_main(conn, log_queue, memory_limit_mb: int) -> None:
+    """
+    Extraction worker: receives (record, contents or None) over conn and
+    sends back one (kind, bom, detail) message for each, until it receives
+    None
+    """
+    configure_worker_logging(log_queue)
+    _limit_memory(memory_limit_mb)
+    conn.send(("ready", None, None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        record, data = task
+        try:
+            message = ("done", extract_record(record, data), None)
+        except MemoryError:
+            # the worker may be left in a bad state, so it exits after
+            # reporting and is replaced
+            conn.send(("failed", None, MEMORY_LIMIT))
+            return
+        except Exception as e:
+            message = ("error", None, e)
+
+        try:
+            conn.send(message)
+        except MemoryError:
+            conn.send(("failed", None, MEMORY_LIMIT))
+            return
+        except Exception as e:
+            # e.g. an exception that cannot be pickled
+            conn.send(("error", None, RuntimeError(f"{message[2] or e}")))
+
+
+def _start_worker(context, log_queue, memory_limit_mb: int) -> dict:
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(
+        target=_worker_main,
+        args=(child_conn, log_queue, memory_limit_mb),
+        name="bom_extract",
+        daemon=True,
+    )
+    process.start()
+    child_conn.close()
+    return {
+        "process": process,
+        "conn": parent_conn,
+        "ready": False,
+        "task": None,
+        "deadline": None,
+    }
+
+
+def _stop_worker(worker: dict, kill: bool = False) -> None:
+    process = worker["process"]
+    if not kill:
+        try:
+            worker["conn"].send(None)
+        except OSError:
+            pass
+        process.join(WORKER_STOP_SECONDS)
+    if process.is_alive():
+        process.kill()
+        # a read stuck in the kernel can outlive the kill, the daemon
+        # process is then left to the OS
+        process.join(WORKER_STOP_SECONDS)
+    worker["conn"].close()
+
+
+def extract_in_workers(
+    records: list[dict],
+    timeout_seconds: float,
+    read_ahead: int = PREFETCH_FILES,
+    memory_limit_mb: int = EXTRACT_MEMORY_LIMIT_MB,
+    workers: int = EXTRACT_WORKERS,
+) -> Iterator[tuple[dict, dict]]:
+    """
+    Extract records in worker processes, each file with a time and memory
+    limit. A worker that takes longer than timeout_seconds over a file,
+    e.g. stuck on a share read or a pathological workbook, is killed and
+    replaced, and the rest of the records keep going
+
+    The next read_ahead files are read in the background and sent to the
+    workers with their records, see ReadAhead. A file still being read
+    when a worker takes it is read by the worker, under its time limit
+
+    Args:
+        records (list[dict]): BOM records to extract
+        timeout_seconds (float): most time a worker may spend on one file
+        read_ahead (int): files read ahead, 0 to leave reading to workers
+        memory_limit_mb (int): most memory a worker may use, 0 for no limit
+        workers (int): worker processes extracting at once
+
+    Return:
+        Iterator[tuple[dict, dict]]: each record with its outcome, a dict of
+            bom (extracted BOM or None), error (exception raised by
+            extraction or None) and reason (TIMED_OUT, MEMORY_LIMIT or
+            WORKER_DIED when the worker gave up on the file, else None), in
+            the order of records
+    """
+    if not records:
+        return
+
+    # spawn on every platform, forking a process with threads running can
+    # leave locks held in the child
+    context = multiprocessing.get_context("spawn")
+    log_queue = get_worker_log_queue()
+    pool = [
+        _start_worker(context, log_queue, memory_limit_mb)
+        for _ in range(max(1, min(workers, len(records))))
+    ]
+    max_buffered = BUFFERED_RESULTS_PER_WORKER * len(pool)
+    files = ReadAhead([record["path"] for record in records], read_ahead)
+
+    results: dict[int, dict] = {}
+    next_task = 0
+    next_result = 0
+
+    def replace(slot: int) -> None:
+        _stop_worker(pool[slot], kill=True)
+        pool[slot] = _start_worker(context, log_queue, memory_limit_mb)
+
+    try:
+        while next_result < len(records):
+            while next_result in results:
+                yield records[next_result], results.pop(next_result)
+                next_result += 1
+            if next_result == len(records):
+                break
+
+            for worker in pool:
+                if (
+                    worker["ready"]
+                    and worker["task"] is None
+                    and next_task < len(records)
+                    and len(results) < max_buffered
+                ):
+                    worker["conn"].send(
+                        (records[next_task], files.take(next_task))
+                    )
+                    worker["task"] = next_task
+                    worker["deadline"] = time.monotonic() + timeout_seconds
+                    next_task += 1
+
+            deadlines = [
+                worker["deadline"]
+                for worker in pool
+                if worker["task"] is not None
+            ]
+            wait_seconds = (
+                max(0.0, min(deadlines) - time.monotonic())
+                if deadlines
+                else None
+            )
+            ready_conns = wait(
+                [worker["conn"] for worker in pool], wait_seconds
+            )
+
+            for slot, worker in enumerate(pool):
+                if worker["conn"] not in ready_conns:
+                    continue
+                try:
+                    kind, bom, detail = worker["conn"].recv()
+                except (EOFError, OSError):
+                    task = worker["task"]
+                    if task is not None:
+                        name = records[task]["path"].name
+                        logger.warning(
+                            "Extraction worker died on %s, exit code %s",
+                            name,
+                            worker["process"].exitcode,
+                        )
+                        results[task] = _outcome(reason=WORKER_DIED)
+                    elif not worker["ready"]:
+                        raise RuntimeError(
+                            "Extraction worker exited while starting, exit "
+                            f"code {worker['process'].exitcode}"
+                        )
+                    replace(slot)
+                    continue
+
+                if kind == "ready":
+                    worker["ready"] = True
+                    continue
+
+                task = worker["task"]
+                worker["task"] = None
+                worker["deadline"] = None
+                if kind == "done":
+                    results[task] = _outcome(bom=bom)
+                elif kind == "error":
+                    results[task] = _outcome(error=detail)
+                else:
+                    # the worker exits after running out of memory
+                    results[task] = _outcome(reason=detail)
+                    replace(slot)
+
+            now = time.monotonic()
+            for slot, worker in enumerate(pool):
+                if worker["task"] is not None and now >= worker["deadline"]:
+                    name = records[worker["task"]]["path"].name
+                    logger.warning(
+                        "Extraction of %s took over %ss, killing its worker",
+                        name,
+                        timeout_seconds,
+                    )
+                    results[worker["task"]] = _outcome(reason=TIMED_OUT)
+                    replace(slot)
+
+    finally:
+        for worker in pool:
+            # workers still starting or busy would only finish in vain
+            _stop_worker(
+                worker, kill=not worker["ready"] or worker["task"] is not None
+            )
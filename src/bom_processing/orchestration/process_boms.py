@@ -1,23 +1,37 @@
 from datetime import datetime, timezone
 import logging
+from typing import Callable, Optional
 
+import numpy as np
 import pandas as pd
 
 from bom_processing.constants import REQUIRED_SQL_COLUMNS
 from bom_processing.extract.get_bom_paths import (
     scrape_bom_paths_from_design_directory,
 )
-from bom_processing.extract.read_boms_from_excel import extract_bom_data
+from bom_processing.orchestration.extract_workers import (
+    extract_in_process,
+    extract_in_workers,
+)
+from bom_processing.orchestration.run_journal import RunJournal
 from bom_processing.transform.transformations import transform_bom
 from bom_processing.validation.column_validation import (
     validate_required_columns,
     ValidationError,
 )
+from config.config import (
+    BATCH_TRANSFORM,
+    EXTRACT_TIMEOUT_SECONDS,
+    PREFETCH_FILES,
+)
 from config.logging_config import configure_logging
 
 
 logger = logging.getLogger(__name__)
 
+# position of a row's file in the run, while transforming in batches
+FILE_ORDER_COLUMN = "_file_order"
+
 
 def _get_snapshot_time():
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -31,7 +45,7 @@ def add_metadata(
     filename: str,
     uploader: str,
 ) -> pd.DataFrame:
-    logger.debug(f"Adding metadata to {filename} for PON {pon}")
+    logger.debug("Adding metadata to %s for PON %s", filename, pon)
     df["pon"] = str(pon)
     df["material_category"] = category
     df["load_method"] = load_method
@@ -41,58 +55,237 @@ def add_metadata(
     return df
 
 
+def _collect_bom(
+    bom_df: pd.DataFrame,
+    category: str,
+    primary_boms: list[pd.DataFrame],
+    secondary_boms: list[pd.DataFrame],
+) -> None:
+    if category in ("primary_a", "primary_b"):
+        primary_boms.append(bom_df)
+    elif category == "secondary":
+        secondary_boms.append(bom_df)
+
+
+def _in_file_order(
+    ordered_boms: list[tuple[int, str, pd.DataFrame]],
+) -> tuple[list[pd.DataFrame], list[pd.DataFrame]]:
+    """
+    Primary and secondary BOM frames in the order their files were given,
+    as they are collected when transforming file by file
+
+    Args:
+        ordered_boms: (position in the run, category, transformed df),
+            batches carry each row's position in FILE_ORDER_COLUMN instead
+    """
+    primary_boms = []
+    secondary_boms = []
+    for order, category, bom_df in sorted(
+        ordered_boms, key=lambda bom: bom[0]
+    ):
+        if FILE_ORDER_COLUMN not in bom_df.columns:
+            bom_df = bom_df.assign(**{FILE_ORDER_COLUMN: order})
+        _collect_bom(bom_df, category, primary_boms, secondary_boms)
+
+    if primary_boms:
+        # rows of a file stay in their aggregated order
+        primary_df = pd.concat(primary_boms).sort_values(
+            FILE_ORDER_COLUMN, kind="stable"
+        )
+        primary_boms = [primary_df.drop(columns=FILE_ORDER_COLUMN)]
+
+    secondary_boms = [
+        bom_df.drop(columns=FILE_ORDER_COLUMN) for bom_df in secondary_boms
+    ]
+
+    return primary_boms, secondary_boms
+
+
+def _transform_batch(
+    boms: list[tuple[int, dict, pd.DataFrame]],
+    category: str,
+    load_method: str,
+) -> pd.DataFrame:
+    """
+    Transform the cleaned BOMs of one category together, with the file
+    each row came from as the leading aggregation keys
+
+    Args:
+        boms: (position in the run, BOM record, cleaned df) for each file
+
+    Return:
+        pd.DataFrame: the rows of every BOM with metadata added, in file
+            order, with their position in FILE_ORDER_COLUMN
+    """
+    lengths = [len(df) for _, _, df in boms]
+    batch_df = pd.concat([df for _, _, df in boms], ignore_index=True)
+
+    batch_df[FILE_ORDER_COLUMN] = np.repeat(
+        [order for order, _, _ in boms], lengths
+    )
+    file_metadata = {
+        "pon": [str(record["pon"]) for _, record, _ in boms],
+        "bom_filename": [record["path"].name for _, record, _ in boms],
+        "uploaded_by": [record["username"] for _, record, _ in boms],
+    }
+    for column, values in file_metadata.items():
+        batch_df[column] = np.repeat(np.array(values, dtype=object), lengths)
+
+    transformed_df = transform_bom(
+        batch_df, category, [FILE_ORDER_COLUMN, *file_metadata]
+    )
+    transformed_df["material_category"] = category
+    transformed_df["load_method"] = load_method
+
+    return transformed_df
+
+
 def process_boms(
     bom_records: list[dict],
     load_method: str,
+    journal: Optional[RunJournal] = None,
+    batched: bool = BATCH_TRANSFORM,
+    read_ahead: int = PREFETCH_FILES,
+    extract_timeout: float = EXTRACT_TIMEOUT_SECONDS,
+    on_failure: Optional[Callable[[dict, str], None]] = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Takes in list of BOM records with metadata
     Reads, validates, cleans, transforms, and re-validates
     Adds metadata
+
+    Records with a "sidecar" are read from the Parquet sidecar written at
+    upload when its checksum matches the BOM, instead of parsing the Excel
+
+    If a run journal is given, files already processed in that run are
+    reused from the journal instead of being read again, and newly
+    processed files are recorded in it. Batched BOMs are recorded cleaned
+    as soon as they are read, and transformed with the batch on resume
+
+    If batched, the cleaned BOMs of each category are transformed together
+    in one pass instead of file by file, with the same result
+
+    Files are extracted in worker processes, each killed if it spends more
+    than extract_timeout seconds on a file, see extract_in_workers. Files
+    that time out or run out of memory fail like invalid ones and the rest
+    carry on. With extract_timeout 0 files are extracted in this process.
+    Either way the next read_ahead files are read in the background
+
+    on_failure is called with the record and the reason of every file that
+    fails, e.g. "validation error" or "timed out"
     """
     primary_boms = []
     secondary_boms = []
+    # batched mode: cleaned BOMs waiting for transform, and every
+    # transformed frame with its position in the run
+    cleaned_boms: dict[str, list] = {"primary_a": [], "primary_b": []}
+    ordered_boms: list[tuple[int, str, pd.DataFrame]] = []
 
     success_count = 0
     failure_count = 0
 
     total_boms = len(bom_records)
 
-    logger.info(f"Running ETL process for {total_boms} BOMs")
+    logger.info("Running ETL process for %d BOMs", total_boms)
+
+    journaled_boms = {}
+    if journal is not None:
+        for order, record in enumerate(bom_records):
+            journaled_bom = journal.extracted_bom(record["path"])
+            if journaled_bom is not None:
+                journaled_boms[order] = journaled_bom
+
+    pending_records = [
+        record
+        for order, record in enumerate(bom_records)
+        if order not in journaled_boms
+    ]
+    if extract_timeout > 0:
+        extracted = extract_in_workers(
+            pending_records, extract_timeout, read_ahead
+        )
+    else:
+        extracted = extract_in_process(pending_records, read_ahead)
 
-    for record in bom_records:
+    for order, record in enumerate(bom_records):
         bom_path = record["path"]
         pon = record["pon"]
         uploaded_by = record["username"]
-        logger.info(f"Processing BOM: {bom_path.name}")
-
-        try:
-            bom_dict = extract_bom_data(bom_path)
-        except ValidationError as ve:
-            bom_dict = None
-            logger.warning(f"Skipping BOM due to validation error: {ve}")
-            failure_count += 1
-            continue
-        except ValueError as ve:
-            bom_dict = None
-            logger.warning(f"Skipping BOM due to value error: {ve}")
-            failure_count += 1
-            continue
-        except Exception as e:
-            bom_dict = None
-            logger.warning(f"Skipping BOM due to validation error: {e}")
-            failure_count += 1
+        journaled_bom = journaled_boms.get(order)
+        if journaled_bom is not None and not journaled_bom["cleaned"]:
+            logger.debug("Reusing journaled BOM: %s", bom_path.name)
+            if batched:
+                ordered_boms.append(
+                    (
+                        order,
+                        journaled_bom["category"],
+                        journaled_bom["df"],
+                    )
+                )
+            else:
+                _collect_bom(
+                    journaled_bom["df"],
+                    journaled_bom["category"],
+                    primary_boms,
+                    secondary_boms,
+                )
+            success_count += 1
             continue
 
-        if bom_dict is None:
-            logger.warning(
-                f"Skipping BOM due to extraction failure: {bom_path.name}"
-            )
-            failure_count += 1
-            continue
+        if journaled_bom is not None:
+            # cleaned before a batched run stopped, still to transform
+            logger.debug("Reusing journaled cleaned BOM: %s", bom_path.name)
+            bom_data = journaled_bom["df"]
+            category = journaled_bom["category"]
+        else:
+            logger.info("Processing BOM: %s", bom_path.name)
+
+            _, outcome = next(extracted)
+            bom_dict = outcome["bom"]
+            error = outcome["error"]
+            if outcome["reason"] is not None:
+                reason = outcome["reason"]
+                logger.warning("Skipping BOM, %s: %s", reason, bom_path.name)
+            elif isinstance(error, ValidationError):
+                reason = "validation error"
+                logger.warning(
+                    "Skipping BOM due to validation error: %s", error
+                )
+            elif isinstance(error, ValueError):
+                reason = "value error"
+                logger.warning("Skipping BOM due to value error: %s", error)
+            elif error is not None:
+                reason = "validation error"
+                logger.warning(
+                    "Skipping BOM due to validation error: %s", error
+                )
+            elif bom_dict is None:
+                reason = "extraction failure"
+                logger.warning(
+                    "Skipping BOM due to extraction failure: %s",
+                    bom_path.name,
+                )
+
+            if bom_dict is None:
+                failure_count += 1
+                if on_failure is not None:
+                    on_failure(record, reason)
+                continue
+
+            bom_data = bom_dict["df"]
+            category = bom_dict["category"]
 
-        bom_data = bom_dict["df"]
-        category = bom_dict["category"]
+        success_count += 1
+
+        if batched and category in cleaned_boms:
+            if journal is not None and journaled_bom is None:
+                # journaled as soon as it is read, a run that stops before
+                # the batch is transformed resumes without reading it again
+                journal.record_extracted(
+                    bom_path, bom_data, category, cleaned=True
+                )
+            cleaned_boms[category].append((order, record, bom_data))
+            continue
 
         transformed_df = transform_bom(bom_data, category)
         transformed_df = add_metadata(
@@ -104,12 +297,27 @@ def process_boms(
             uploaded_by,
         )
 
-        if category in ("timber", "sheet"):
-            primary_boms.append(transformed_df)
-        elif category == "metal":
-            secondary_boms.append(transformed_df)
+        if journal is not None:
+            journal.record_extracted(bom_path, transformed_df, category)
 
-        success_count += 1
+        if batched:
+            ordered_boms.append((order, category, transformed_df))
+        else:
+            _collect_bom(
+                transformed_df, category, primary_boms, secondary_boms
+            )
+
+    if batched:
+        for category, boms in cleaned_boms.items():
+            if not boms:
+                continue
+            logger.info(
+                "Transforming %d %s BOMs in one batch", len(boms), category
+            )
+            batch_df = _transform_batch(boms, category, load_method)
+            ordered_boms.append((-1, category, batch_df))
+
+        primary_boms, secondary_boms = _in_file_order(ordered_boms)
 
     primary_columns = REQUIRED_SQL_COLUMNS["primary"]
     primary_boms_df = (
@@ -124,7 +332,9 @@ def process_boms(
         else pd.DataFrame()
     )
 
-    snapshot_time = _get_snapshot_time()
+    snapshot_time = (
+        journal.snapshot_time if journal is not None else _get_snapshot_time()
+    )
     if not primary_boms_df.empty:
         primary_boms_df["snapshot_time_utc"] = snapshot_time
         validate_required_columns(
@@ -136,9 +346,12 @@ def process_boms(
     if not secondary_boms_df.empty:
         secondary_boms_df["snapshot_time_utc"] = snapshot_time
 
-    logger.info(f"BOM processing snapshot time: {snapshot_time}")
+    logger.info("BOM processing snapshot time: %s", snapshot_time)
     logger.info(
-        f"Finished processing {total_boms} BOMs: {success_count} succeeded, {failure_count} failed."
+        "Finished processing %d BOMs: %d succeeded, %d failed.",
+        total_boms,
+        success_count,
+        failure_count,
     )
 
     return primary_boms_df, secondary_boms_df
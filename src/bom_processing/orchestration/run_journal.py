@@ -0,0 +1,210 @@
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+from typing import Optional
+import uuid
+
+import pandas as pd
+
+from config.config import RUN_STATE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+def new_run_id(started: datetime) -> str:
+    """
+    Run ids start with their UTC start time so they sort by age
+    """
+    return f"{started:%Y%m%dT%H%M%SZ}_{uuid.uuid4().hex[:8]}"
+
+
+class RunJournal:
+    """
+    Append-only record of an ETL run, kept in RUN_STATE_DIR/<run_id>
+
+    Records the processed frame of every extracted BOM file and the files
+    whose rows have been committed to SQL, so a failed run can be resumed
+    without re-reading files or re-loading committed batches.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = run_dir
+        self.run_id = run_dir.name
+        self.journal_path = run_dir / "journal.jsonl"
+        self.frames_dir = run_dir / "frames"
+
+        self.etl_name = None
+        self.snapshot_time = None
+        self.completed = False
+        self._extracted: dict[str, dict] = {}
+        self._committed: set[tuple[str, str]] = set()
+
+        if self.journal_path.exists():
+            self._replay()
+
+    @classmethod
+    def start(
+        cls,
+        etl_name: str,
+        journal_dir: Path = RUN_STATE_DIR,
+        run_id: Optional[str] = None,
+        snapshot_time: Optional[str] = None,
+    ) -> "RunJournal":
+        """
+        Create the journal for a new run
+
+        Args:
+            etl_name (str): ETL the run belongs to
+            journal_dir (Path): folder the run's journal is created in
+            run_id (str, optional): defaults to a new_run_id
+            snapshot_time (str, optional): snapshot time shared with other
+                runs, defaults to the start time of this run
+        """
+        started = datetime.now(timezone.utc)
+        run_id = run_id or new_run_id(started)
+        journal = cls(journal_dir / run_id)
+        journal.frames_dir.mkdir(parents=True, exist_ok=True)
+        journal._append(
+            {
+                "event": "started",
+                "etl": etl_name,
+                "snapshot_time": snapshot_time
+                or started.isoformat(timespec="seconds"),
+            }
+        )
+        logger.info(f"Started run {run_id}")
+        return journal
+
+    @classmethod
+    def latest_incomplete(
+        cls, etl_name: str, journal_dir: Path = RUN_STATE_DIR
+    ) -> Optional["RunJournal"]:
+        """
+        Find the most recent run of etl_name that did not complete
+        """
+        if not journal_dir.exists():
+            return None
+
+        # run ids start with their UTC start time so they sort by age
+        for run_dir in sorted(journal_dir.iterdir(), reverse=True):
+            if not (run_dir / "journal.jsonl").exists():
+                continue
+            journal = cls(run_dir)
+            if journal.etl_name == etl_name and not journal.completed:
+                return journal
+
+        return None
+
+    def _replay(self) -> None:
+        with self.journal_path.open("r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a crash can leave a partial last line behind
+                    logger.warning(
+                        f"Ignoring corrupt journal entry in {self.run_id}"
+                    )
+                    continue
+
+                self._apply(entry)
+
+    def _apply(self, entry: dict) -> None:
+        event = entry["event"]
+        if event == "started":
+            self.etl_name = entry["etl"]
+            self.snapshot_time = entry["snapshot_time"]
+        elif event == "extracted":
+            self._extracted[entry["path"]] = entry
+        elif event == "committed":
+            self._committed.update(
+                (pon, filename) for pon, filename in entry["files"]
+            )
+        elif event == "completed":
+            self.completed = True
+
+    def _append(self, entry: dict) -> None:
+        with self.journal_path.open("a") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._apply(entry)
+
+    def extracted_bom(self, bom_path: Path) -> Optional[dict]:
+        """
+        Return the processed frame and category recorded for bom_path, and
+        whether the frame is only cleaned, or None if the file has not been
+        processed in this run
+        """
+        entry = self._extracted.get(str(bom_path))
+        if entry is None:
+            return None
+
+        frame_path = self.frames_dir / entry["frame"]
+        if not frame_path.exists():
+            return None
+
+        return {
+            "df": pd.read_pickle(frame_path),
+            "category": entry["category"],
+            "cleaned": entry.get("cleaned", False),
+        }
+
+    def record_extracted(
+        self,
+        bom_path: Path,
+        bom_df: pd.DataFrame,
+        category: str,
+        cleaned: bool = False,
+    ) -> None:
+        """
+        Save the processed frame of bom_path and record it in the journal.
+        cleaned marks a frame saved before transform, for runs that
+        transform their BOMs in one batch at the end
+        """
+        frame_name = hashlib.sha1(str(bom_path).encode()).hexdigest() + ".pkl"
+        temp_path = self.frames_dir / f"{frame_name}.tmp"
+        bom_df.to_pickle(temp_path)
+        os.replace(temp_path, self.frames_dir / frame_name)
+
+        self._append(
+            {
+                "event": "extracted",
+                "path": str(bom_path),
+                "category": category,
+                "frame": frame_name,
+                "cleaned": cleaned,
+            }
+        )
+
+    def committed_files(self) -> set[tuple[str, str]]:
+        """
+        (pon, bom_filename) pairs whose rows have been committed to SQL
+        """
+        return set(self._committed)
+
+    def record_committed(self, batch_df: pd.DataFrame) -> None:
+        """
+        Record the files of a batch that has been committed to SQL
+        """
+        files = sorted(
+            batch_df[["pon", "bom_filename"]]
+            .drop_duplicates()
+            .itertuples(index=False, name=None)
+        )
+        self._append({"event": "committed", "files": files})
+
+    def mark_complete(self) -> None:
+        """
+        Record the run as finished and remove its saved frames
+        """
+        self._append({"event": "completed"})
+        shutil.rmtree(self.frames_dir, ignore_errors=True)
+        logger.info(f"Run {self.run_id} complete")
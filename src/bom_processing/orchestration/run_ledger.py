@@ -0,0 +1,300 @@
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Optional
+
+from config.config import (
+    RUN_LEDGER_BASELINE_RUNS,
+    RUN_LEDGER_PATH,
+    RUN_LEDGER_REGRESSION_THRESHOLD,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# stage slowdowns smaller than this are treated as noise
+MIN_STAGE_REGRESSION_SECONDS = 1.0
+
+CREATE_LEDGER_TABLE = """
+CREATE TABLE IF NOT EXISTS run_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    etl_name TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    wall_seconds REAL NOT NULL,
+    stage_seconds TEXT NOT NULL,
+    files_processed INTEGER NOT NULL,
+    files_failed INTEGER NOT NULL,
+    rows_processed INTEGER NOT NULL,
+    bytes_read INTEGER NOT NULL,
+    peak_memory_mb REAL
+)
+"""
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """
+    Peak resident memory of this process, None if it cannot be read
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not get_memory_info(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / 1024**2
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def total_file_size(bom_records: list[dict]) -> int:
+    """
+    Bytes in the BOM files of bom_records, skipping files that are gone
+    """
+    total = 0
+    for record in bom_records:
+        try:
+            total += record["path"].stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def _connect(ledger_path: Path) -> sqlite3.Connection:
+    ledger_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(ledger_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(CREATE_LEDGER_TABLE)
+    return conn
+
+
+class RunRecorder:
+    """
+    Times the stages of an ETL run and appends a record of it to the local
+    run ledger when the run ends, including when it fails. Runs that found
+    no files to process are recorded as empty
+
+    Usage:
+        with RunRecorder("staging_folder_etl", run_id) as recorder:
+            with recorder.stage("extract"):
+                ...
+            recorder.add(files_processed=10, rows_processed=1000)
+    """
+
+    def __init__(
+        self,
+        etl_name: str,
+        run_id: str,
+        ledger_path: Path = RUN_LEDGER_PATH,
+    ):
+        self.etl_name = etl_name
+        self.run_id = run_id
+        self.ledger_path = ledger_path
+        self.stage_seconds: dict[str, float] = {}
+        self.counts = {
+            "files_processed": 0,
+            "files_failed": 0,
+            "rows_processed": 0,
+            "bytes_read": 0,
+        }
+        self._started_at = None
+        self._start = None
+
+    def __enter__(self) -> "RunRecorder":
+        self._started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            status = "failed"
+        elif not self.counts["files_processed"] + self.counts["files_failed"]:
+            # e.g. a staging run with nothing to claim, left out of the
+            # baseline so frequent empty runs do not drag it towards 0
+            status = "empty"
+        else:
+            status = "success"
+        try:
+            self._write(status)
+        except sqlite3.Error as e:
+            # the ledger must never fail the run itself
+            logger.warning(f"Could not write run ledger: {e}")
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_seconds[name] = (
+                self.stage_seconds.get(name, 0) + elapsed
+            )
+
+    def add(self, **counts: int) -> None:
+        """
+        Add to the run's files_processed, files_failed, rows_processed or
+        bytes_read counts
+        """
+        for key, value in counts.items():
+            if key not in self.counts:
+                raise KeyError(f"Unknown run ledger count: {key}")
+            self.counts[key] += int(value)
+
+    def _write(self, status: str) -> None:
+        wall_seconds = time.perf_counter() - self._start
+        peak_memory_mb = _peak_memory_mb()
+
+        with closing(_connect(self.ledger_path)) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO run_ledger (
+                    run_id, etl_name, started_at, status, wall_seconds,
+                    stage_seconds, files_processed, files_failed,
+                    rows_processed, bytes_read, peak_memory_mb
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    self.run_id,
+                    self.etl_name,
+                    self._started_at.isoformat(timespec="seconds"),
+                    status,
+                    wall_seconds,
+                    json.dumps(self.stage_seconds),
+                    self.counts["files_processed"],
+                    self.counts["files_failed"],
+                    self.counts["rows_processed"],
+                    self.counts["bytes_read"],
+                    peak_memory_mb,
+                ),
+            )
+
+        logger.info(
+            f"Run {self.run_id} {status} in {wall_seconds:.1f}s: "
+            f"{self.counts['files_processed']} files, "
+            f"{self.counts['rows_processed']} rows, "
+            f"{self.counts['bytes_read'] / 1024**2:.1f} MB read"
+        )
+
+
+def _throughput(run: sqlite3.Row) -> Optional[float]:
+    """
+    Files processed per second of wall time
+    """
+    if not run["wall_seconds"]:
+        return None
+    return run["files_processed"] / run["wall_seconds"]
+
+
+def compare_latest_run(
+    etl_name: str,
+    baseline_runs: int = RUN_LEDGER_BASELINE_RUNS,
+    threshold: float = RUN_LEDGER_REGRESSION_THRESHOLD,
+    ledger_path: Path = RUN_LEDGER_PATH,
+) -> Optional[dict]:
+    """
+    Compare the latest successful run of etl_name against the median of the
+    successful runs before it
+
+    Args:
+        etl_name (str): ETL to report on
+        baseline_runs (int): number of earlier runs in the rolling baseline
+        threshold (float): fractional slowdown that counts as a regression,
+            e.g. 0.2 flags throughput more than 20% below the baseline
+        ledger_path (Path): run ledger database
+
+    Return:
+        dict | None: latest and baseline throughput and stage times, with
+            the regressions found. None if there are no runs to compare
+    """
+    if not ledger_path.exists():
+        return None
+
+    with closing(_connect(ledger_path)) as conn:
+        runs = conn.execute(
+            """
+            SELECT * FROM run_ledger
+            WHERE etl_name = ? AND status = 'success'
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (etl_name, baseline_runs + 1),
+        ).fetchall()
+
+    if len(runs) < 2:
+        return None
+
+    latest, baseline = runs[0], runs[1:]
+    report = {
+        "etl_name": etl_name,
+        "run_id": latest["run_id"],
+        "baseline_runs": len(baseline),
+        "files_per_second": _throughput(latest),
+        "baseline_files_per_second": None,
+        "stage_seconds": json.loads(latest["stage_seconds"]),
+        "baseline_stage_seconds": {},
+        "regressions": [],
+    }
+
+    baseline_throughputs = [
+        value for value in map(_throughput, baseline) if value is not None
+    ]
+    if baseline_throughputs and report["files_per_second"] is not None:
+        baseline_throughput = statistics.median(baseline_throughputs)
+        report["baseline_files_per_second"] = baseline_throughput
+        if report["files_per_second"] < baseline_throughput * (1 - threshold):
+            report["regressions"].append(
+                f"throughput {report['files_per_second']:.2f} files/s is "
+                f"below baseline {baseline_throughput:.2f} files/s"
+            )
+
+    baseline_stages = [json.loads(run["stage_seconds"]) for run in baseline]
+    for stage, seconds in report["stage_seconds"].items():
+        stage_history = [s[stage] for s in baseline_stages if stage in s]
+        if not stage_history:
+            continue
+        baseline_seconds = statistics.median(stage_history)
+        report["baseline_stage_seconds"][stage] = baseline_seconds
+        if (
+            seconds > baseline_seconds * (1 + threshold)
+            and seconds - baseline_seconds > MIN_STAGE_REGRESSION_SECONDS
+        ):
+            report["regressions"].append(
+                f"stage {stage} took {seconds:.1f}s, "
+                f"baseline {baseline_seconds:.1f}s"
+            )
+
+    return report
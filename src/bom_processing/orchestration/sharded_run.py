@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Optional
+
+from bom_processing.orchestration.run_journal import RunJournal
+from config.config import (
+    RUN_STATE_DIR,
+    SHARD_POLL_SECONDS,
+    SHARD_WAIT_TIMEOUT_SECONDS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parse a shard given as "i/N", e.g. "2/4" for the second of four shards
+    """
+    try:
+        shard, shard_count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected a shard as i/N, e.g. 2/4: {value}")
+
+    if not 1 <= shard <= shard_count:
+        raise ValueError(f"Shard must be between 1 and {shard_count}: {value}")
+
+    return shard, shard_count
+
+
+class ShardedRun:
+    """
+    Shared state of a full scrape split into shards, possibly on several
+    machines, kept in RUN_STATE_DIR/<run_id>
+
+    Every shard of a run uses the same snapshot time, recorded by whichever
+    shard starts first. Each shard keeps its own run journal, so rerunning
+    a failed shard with the same run id resumes it, and writes a done
+    marker once its rows are committed to staging.
+    """
+
+    def __init__(
+        self, run_id: str, shard_count: int, state_dir: Path = RUN_STATE_DIR
+    ):
+        self.run_id = run_id
+        self.shard_count = shard_count
+        self.run_dir = state_dir / run_id
+        self.run_path = self.run_dir / "run.json"
+
+    def _shard_name(self, shard: int) -> str:
+        return f"shard_{shard}_of_{self.shard_count}"
+
+    def _done_path(self, shard: int) -> Path:
+        return self.run_dir / f"{self._shard_name(shard)}.done"
+
+    def _read_run(self) -> Optional[dict]:
+        try:
+            with self.run_path.open("r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def snapshot_time(self) -> str:
+        """
+        Snapshot time of the run, recorded by the first shard to ask for it
+        """
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            # "x" fails if another shard created the file first
+            with self.run_path.open("x") as file:
+                json.dump(
+                    {
+                        "shard_count": self.shard_count,
+                        "snapshot_time": datetime.now(timezone.utc).isoformat(
+                            timespec="seconds"
+                        ),
+                    },
+                    file,
+                )
+                file.flush()
+                os.fsync(file.fileno())
+        except FileExistsError:
+            pass
+
+        # the shard that created the file may still be writing it
+        for _ in range(50):
+            run = self._read_run()
+            if run is not None:
+                break
+            time.sleep(0.1)
+        else:
+            raise RuntimeError(f"Unreadable run file {self.run_path}")
+
+        if run["shard_count"] != self.shard_count:
+            raise ValueError(
+                f"Run {self.run_id} was started with {run['shard_count']} "
+                f"shards, not {self.shard_count}"
+            )
+        return run["snapshot_time"]
+
+    def shard_journal(self, etl_name: str, shard: int) -> RunJournal:
+        """
+        Journal of one shard, resuming it if the shard has run before
+        """
+        shard_dir = self.run_dir / self._shard_name(shard)
+        if (shard_dir / "journal.jsonl").exists():
+            logger.info(f"Resuming {self._shard_name(shard)} of {self.run_id}")
+            return RunJournal(shard_dir)
+
+        return RunJournal.start(
+            etl_name,
+            self.run_dir,
+            run_id=self._shard_name(shard),
+            snapshot_time=self.snapshot_time(),
+        )
+
+    def mark_shard_done(self, shard: int, summary: dict) -> None:
+        """
+        Report a shard as done, with a summary of what it loaded
+        """
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self._done_path(shard).with_suffix(".tmp")
+        with temp_path.open("w") as file:
+            json.dump(summary, file)
+        os.replace(temp_path, self._done_path(shard))
+        logger.info(f"{self._shard_name(shard)} of {self.run_id} done")
+
+    def pending_shards(self) -> list[int]:
+        """
+        Shards that have not reported done yet
+        """
+        return [
+            shard
+            for shard in range(1, self.shard_count + 1)
+            if not self._done_path(shard).exists()
+        ]
+
+    def wait_for_shards(
+        self,
+        timeout_seconds: float = SHARD_WAIT_TIMEOUT_SECONDS,
+        poll_seconds: float = SHARD_POLL_SECONDS,
+    ) -> dict[int, dict]:
+        """
+        Block until every shard is done
+
+        Return:
+            dict[int, dict]: summary reported by each shard
+
+        Raises:
+            TimeoutError: if shards are still pending after timeout_seconds
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            pending = self.pending_shards()
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Run {self.run_id}: shards {pending} not done after "
+                    f"{timeout_seconds:.0f}s"
+                )
+            logger.info(f"Run {self.run_id}: waiting for shards {pending}")
+            time.sleep(poll_seconds)
+
+        summaries = {}
+        for shard in range(1, self.shard_count + 1):
+            with self._done_path(shard).open("r") as file:
+                summaries[shard] = json.load(file)
+        return summaries
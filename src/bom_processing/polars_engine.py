@@ -0,0 +1,284 @@
+"""
+Polars implementation of the clean and transform stages, selected with
+PROCESSING_ENGINE=polars
+
+Each stage runs as one lazy Polars query plan, executed multithreaded. It
+takes and returns pandas frames with the same dtypes as the pandas engine,
+so everything before and after (sidecars, run journals and the SQL load) is
+shared. Cleaning only keeps the columns the transform uses.
+
+Polars is an optional dependency, install it with the polars extra.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pyarrow import ArrowException
+
+from bom_processing.constants import (
+    COLUMN_RENAME_MAPS,
+    EXPECTED_DTYPES_CLEANING,
+    MATERIAL_CLASSIFICATION_RULES,
+    NULLABLE_COLUMNS,
+    NUMERIC_AS_STRING_COLUMNS,
+    REQUIRED_COLUMNS_AFTER_RENAME,
+)
+from bom_processing.validation.validation_report import (
+    SUMMARY_ROW_BLANK_COLUMNS,
+    BOMValidationError,
+    summary_row_mask,
+    validate_bom,
+)
+
+try:
+    import polars as pl
+except ImportError as e:
+    raise ImportError(
+        "PROCESSING_ENGINE=polars needs polars, install the polars extra"
+    ) from e
+
+
+logger = logging.getLogger(__name__)
+
+
+SUM_COLUMNS = ["quantity", "usage_quantity", "finish_quantity"]
+
+COLUMNS_TO_KEEP = [
+    "part_tag",
+    "quantity",
+    "material_type",
+    "material_subtype",
+    "designation",
+    "height",
+    "width",
+    "length",
+    "usage_quantity",
+    "finish_quantity",
+    "element",
+    "additional_info",
+]
+
+COLUMNS_TO_GROUP_BY = [
+    "part_tag",
+    "material_type",
+    "material_subtype",
+    "height",
+    "width",
+    "length",
+]
+
+
+def _cast_expression(column: str, dtype: str, numeric_as_string: list):
+    """
+    Polars equivalent of assign_dtypes for one column
+    """
+    if dtype == "string":
+        if column in numeric_as_string:
+            return pl.col(column).cast(pl.Float64).cast(pl.Int64)
+        return pl.col(column).cast(pl.String)
+    if dtype == "int":
+        return pl.col(column).cast(pl.Float64).ceil().cast(pl.Int64)
+    return pl.col(column).cast(pl.Float64)
+
+
+def _pandas_dtype(column: str, dtype: str, numeric_as_string: list) -> str:
+    """
+    Dtype the pandas engine gives a cleaned column
+    """
+    if dtype == "string":
+        return "Int64" if column in numeric_as_string else "string"
+    if dtype == "int":
+        return "int64"
+    return "float64"
+
+
+def _to_polars(df: pd.DataFrame) -> pl.DataFrame:
+    try:
+        return pl.from_pandas(df)
+    except (pl.exceptions.PolarsError, ArrowException):
+        pass
+
+    # mixed type Excel columns cannot be converted directly, read them as
+    # text and let the casts parse them
+    object_columns = df.select_dtypes(include="object").columns
+    return pl.from_pandas(
+        df.astype({column: "string" for column in object_columns})
+    )
+
+
+def _validation_error(
+    bom_df: pd.DataFrame, reverse_renaming: dict[str, str]
+) -> Optional[BOMValidationError]:
+    """
+    Full validation report from the pandas validator, only built once the
+    Polars plan has found a problem
+    """
+    issues = validate_bom(
+        bom_df[~summary_row_mask(bom_df)], "primary", reverse_renaming
+    )
+    return BOMValidationError(issues) if issues else None
+
+
+def _clean_primary_bom(bom_df: pd.DataFrame, category: str) -> pd.DataFrame:
+    column_renaming = COLUMN_RENAME_MAPS[category]
+    reverse_renaming = {v: k for k, v in column_renaming.items()}
+    bom_df = bom_df.rename(columns=column_renaming)
+
+    expected_dtypes = EXPECTED_DTYPES_CLEANING["primary"]
+    numeric_strings = NUMERIC_AS_STRING_COLUMNS["primary"]
+    if not REQUIRED_COLUMNS_AFTER_RENAME["primary"] <= set(bom_df.columns):
+        raise _validation_error(bom_df, reverse_renaming)
+
+    is_summary_row = pl.all_horizontal(
+        pl.col(column).is_null() for column in SUMMARY_ROW_BLANK_COLUMNS
+    )
+    plan = (
+        _to_polars(bom_df[list(expected_dtypes)])
+        .lazy()
+        .filter(~is_summary_row)
+        .with_columns(
+            _cast_expression(column, dtype, numeric_strings)
+            for column, dtype in expected_dtypes.items()
+        )
+    )
+
+    try:
+        cleaned = plan.collect()
+    except pl.exceptions.PolarsError as e:
+        error = _validation_error(bom_df, reverse_renaming)
+        if error is None:
+            raise ValueError(f"Failed to convert columns of BOM: {e}") from e
+        raise error from e
+
+    null_counts = cleaned.null_count().row(0, named=True)
+    non_null_columns = [
+        col
+        for col, nullable in NULLABLE_COLUMNS["primary"].items()
+        if not nullable or expected_dtypes[col] == "int"
+    ]
+    if any(null_counts[col] for col in non_null_columns):
+        raise _validation_error(bom_df, reverse_renaming)
+
+    return cleaned.to_pandas().astype(
+        {
+            column: _pandas_dtype(column, dtype, numeric_strings)
+            for column, dtype in expected_dtypes.items()
+        }
+    )
+
+
+def clean_primary_a_bom(primary_a_df: pd.DataFrame) -> pd.DataFrame:
+    return _clean_primary_bom(primary_a_df, "primary_a")
+
+
+def clean_primary_b_bom(primary_b_df: pd.DataFrame) -> pd.DataFrame:
+    return _clean_primary_bom(primary_b_df, "primary_b")
+
+
+def _contains(column: str, pattern: str) -> pl.Expr:
+    return pl.col(column).str.contains(f"(?i){pattern}").fill_null(False)
+
+
+def _classify_materials(plan: pl.LazyFrame, rules: list[dict]) -> pl.LazyFrame:
+    """
+    Apply MATERIAL_CLASSIFICATION_RULES in order, each rule sees the values
+    set by the rules before it
+    """
+    for rule in rules:
+        mask = pl.any_horizontal(
+            _contains(column, pattern) for column, pattern in rule["match"]
+        )
+        for column, pattern in rule.get("exclude", []):
+            mask = mask & ~_contains(column, pattern)
+        plan = plan.with_columns(
+            pl.when(mask)
+            .then(pl.lit(value, dtype=pl.String))
+            .otherwise(pl.col(column))
+            .alias(column)
+            for column, value in rule["set"].items()
+        )
+    return plan
+
+
+def _aggregate_bom_data(
+    plan: pl.LazyFrame, columns_to_group_by: list[str], columns: list[str]
+) -> pl.LazyFrame:
+    """
+    Sum quantities and keep the first non-null value of every other
+    column, per group, ordered by the group keys like a pandas groupby
+    """
+    first_columns = [
+        col
+        for col in columns
+        if col not in SUM_COLUMNS and col not in columns_to_group_by
+    ]
+    return (
+        plan.drop_nulls(columns_to_group_by)
+        .group_by(columns_to_group_by)
+        .agg(
+            *(pl.col(col).sum() for col in SUM_COLUMNS),
+            *(pl.col(col).drop_nulls().first() for col in first_columns),
+        )
+        .sort(columns_to_group_by)
+    )
+
+
+def transform_bom(
+    bom_df: pd.DataFrame,
+    bom_category: str,
+    file_keys: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Polars equivalent of transformations.transform_bom
+    """
+    file_keys = list(file_keys or [])
+    if bom_category not in ("primary_a", "primary_b"):
+        return pd.DataFrame()
+
+    columns = [*file_keys, *COLUMNS_TO_KEEP]
+    input_dtypes = bom_df.dtypes[columns]
+    dimensions = ["width", "height", "length"]
+
+    bom_df = bom_df[columns].copy()
+    bom_df[dimensions] = np.round(bom_df[dimensions]).astype(int)
+    if bom_category == "primary_a":
+        # computed with numpy, Polars divides by multiplying with the
+        # reciprocal, which rounds some halves differently than pandas
+        bom_df["usage_quantity"] = np.round(
+            bom_df["quantity"].to_numpy() * bom_df["length"].to_numpy() / 1000,
+            1,
+        )
+
+    plan = _to_polars(bom_df).lazy()
+
+    if bom_category == "primary_a":
+        plan = plan.with_columns(
+            # ensure height is smaller than width
+            height=pl.min_horizontal("height", "width"),
+            width=pl.max_horizontal("height", "width"),
+        )
+    else:
+        # total finish only measures one side of piece, so multiply by 2
+        plan = plan.with_columns(finish_quantity=pl.col("finish_quantity") * 2)
+
+    plan = _classify_materials(
+        plan, MATERIAL_CLASSIFICATION_RULES[bom_category]
+    )
+    plan = _aggregate_bom_data(
+        plan, [*file_keys, *COLUMNS_TO_GROUP_BY], columns
+    )
+
+    transformed_df = plan.collect().to_pandas()
+
+    # match the pandas engine, which keeps each column's dtype except for
+    # the rounded dimensions and computed usage quantity
+    output_dtypes = {
+        column: input_dtypes[column]
+        for column in transformed_df.columns
+        if column not in dimensions and column != "usage_quantity"
+    }
+    output_dtypes.update({column: "int64" for column in dimensions})
+    output_dtypes["usage_quantity"] = "float64"
+    return transformed_df.astype(output_dtypes)
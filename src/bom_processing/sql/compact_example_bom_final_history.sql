@@ -0,0 +1,23 @@
+-- Weeks are ISO weeks, Monday to Sunday: days since Monday 1900-01-01
+-- (day 0) divided by 7. DATEDIFF(WEEK, ...) would count Sunday-based weeks
+WITH expired_snapshots AS (
+	SELECT [pon]
+	      ,[snapshot_time_utc]
+	      ,ROW_NUMBER() OVER (
+	          PARTITION BY [pon], DATEDIFF(DAY, 0, [snapshot_time]) / 7
+	          ORDER BY [snapshot_time_utc] DESC
+	      ) AS [week_rank]
+	FROM (
+		SELECT DISTINCT [pon]
+		      ,[snapshot_time_utc]
+		      ,CONVERT(DATETIME2(0), LEFT([snapshot_time_utc], 19), 126) AS [snapshot_time]
+		FROM bom_schema.example_bom_final_history
+	) AS snapshots
+	WHERE [snapshot_time] < DATEADD(DAY, -1 * :retention_days, SYSUTCDATETIME())
+)
+DELETE TOP (:batch_size) history
+FROM bom_schema.example_bom_final_history AS history
+INNER JOIN expired_snapshots
+	ON history.[pon] = expired_snapshots.[pon]
+	AND history.[snapshot_time_utc] = expired_snapshots.[snapshot_time_utc]
+WHERE expired_snapshots.[week_rank] > 1;
@@ -0,0 +1,24 @@
+-- one-time migration, see bom_processing.load.migrations
+IF OBJECT_ID('bom_schema.example_bom_material_rollup', 'U') IS NULL
+	CREATE TABLE bom_schema.example_bom_material_rollup (
+		[pon] NVARCHAR(20) NOT NULL
+		,[material_category] NVARCHAR(50)
+		,[material_type] NVARCHAR(50)
+		,[material_subtype] NVARCHAR(50)
+		,[height] INT
+		,[width] INT
+		,[length] INT
+		,[total_quantity] FLOAT
+		,[total_usage_quantity] FLOAT
+		,[total_finish_quantity] FLOAT
+		,[snapshot_time_utc] NVARCHAR(32));
+
+-- uploads delete and re-aggregate their PONs' rows
+IF NOT EXISTS (
+	SELECT 1
+	FROM sys.indexes
+	WHERE [name] = 'ix_example_bom_material_rollup_pon'
+		AND [object_id] = OBJECT_ID('bom_schema.example_bom_material_rollup')
+)
+	CREATE INDEX ix_example_bom_material_rollup_pon
+		ON bom_schema.example_bom_material_rollup ([pon]);
@@ -0,0 +1,32 @@
+-- one-time migration, see bom_processing.load.migrations
+IF OBJECT_ID('bom_schema.example_bom_revision_changes', 'U') IS NULL
+	CREATE TABLE bom_schema.example_bom_revision_changes (
+		[pon] NVARCHAR(20) NOT NULL
+		,[material_category] NVARCHAR(50)
+		,[part_tag] INT
+		,[height] INT
+		,[width] INT
+		,[length] INT
+		,[change_type] NVARCHAR(10) NOT NULL
+		,[material_type] NVARCHAR(50)
+		,[material_subtype] NVARCHAR(50)
+		,[previous_material_type] NVARCHAR(50)
+		,[previous_material_subtype] NVARCHAR(50)
+		,[quantity] FLOAT
+		,[previous_quantity] FLOAT
+		,[usage_quantity] FLOAT
+		,[previous_usage_quantity] FLOAT
+		,[finish_quantity] FLOAT
+		,[previous_finish_quantity] FLOAT
+		,[snapshot_time_utc] NVARCHAR(32)
+		,[previous_snapshot_time_utc] NVARCHAR(32));
+
+-- changes are read per PON and upload
+IF NOT EXISTS (
+	SELECT 1
+	FROM sys.indexes
+	WHERE [name] = 'ix_example_bom_revision_changes_pon_snapshot'
+		AND [object_id] = OBJECT_ID('bom_schema.example_bom_revision_changes')
+)
+	CREATE INDEX ix_example_bom_revision_changes_pon_snapshot
+		ON bom_schema.example_bom_revision_changes ([pon], [snapshot_time_utc]);
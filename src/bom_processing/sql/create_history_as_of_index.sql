@@ -0,0 +1,16 @@
+-- one-time migration, see bom_processing.load.migrations. Safe to run
+-- again, it skips what already exists
+-- snapshot_time_utc is an ISO string, as-of queries compare this datetime
+IF COL_LENGTH('bom_schema.example_bom_final_history', 'snapshot_datetime_utc') IS NULL
+	ALTER TABLE bom_schema.example_bom_final_history
+	ADD [snapshot_datetime_utc] AS CONVERT(DATETIME2(0), LEFT([snapshot_time_utc], 19), 126) PERSISTED;
+
+-- dynamic SQL, the column may not have existed when the batch compiled
+IF NOT EXISTS (
+	SELECT 1
+	FROM sys.indexes
+	WHERE [name] = 'ix_example_bom_final_history_pon_snapshot_datetime'
+		AND [object_id] = OBJECT_ID('bom_schema.example_bom_final_history')
+)
+	EXEC('CREATE INDEX ix_example_bom_final_history_pon_snapshot_datetime
+		ON bom_schema.example_bom_final_history ([pon], [snapshot_datetime_utc])');
@@ -0,0 +1,5 @@
+-- one-time migrations already applied, see bom_processing.load.migrations
+IF OBJECT_ID('bom_schema.schema_migrations', 'U') IS NULL
+	CREATE TABLE bom_schema.schema_migrations (
+		[script] NVARCHAR(255) NOT NULL
+		,[applied_at_utc] NVARCHAR(32) NOT NULL);
@@ -41,4 +41,6 @@ SELECT [pon]
       ,[item_id]
       ,[material_status]
       ,[is_item_unmatched]
-FROM bom_schema.vw_example_bom_with_item_ids;
+FROM bom_schema.vw_example_bom_with_item_ids
+WHERE [snapshot_time_utc] = :snapshot_time
+  AND [load_method] = 'upload';
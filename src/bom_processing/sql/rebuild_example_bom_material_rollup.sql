@@ -0,0 +1,35 @@
+-- one-time migration, see bom_processing.load.migrations. Fills the
+-- rollup for every PON, uploads only refresh the PONs they load
+DELETE FROM bom_schema.example_bom_material_rollup;
+
+INSERT INTO bom_schema.example_bom_material_rollup
+	([pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length]
+      ,[total_quantity]
+      ,[total_usage_quantity]
+      ,[total_finish_quantity]
+      ,[snapshot_time_utc])
+SELECT [pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length]
+      ,SUM([quantity])
+      ,SUM([usage_quantity])
+      ,SUM([finish_quantity])
+      ,MAX([snapshot_time_utc])
+FROM bom_schema.example_bom_final_current
+GROUP BY [pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length];
@@ -0,0 +1,39 @@
+DELETE FROM bom_schema.example_bom_material_rollup
+WHERE [pon] IN (SELECT DISTINCT [pon] FROM bom_schema.example_bom_staging
+                WHERE [snapshot_time_utc] = :snapshot_time
+                  AND [load_method] = 'upload');
+
+INSERT INTO bom_schema.example_bom_material_rollup
+	([pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length]
+      ,[total_quantity]
+      ,[total_usage_quantity]
+      ,[total_finish_quantity]
+      ,[snapshot_time_utc])
+SELECT [pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length]
+      ,SUM([quantity])
+      ,SUM([usage_quantity])
+      ,SUM([finish_quantity])
+      ,MAX([snapshot_time_utc])
+FROM bom_schema.example_bom_final_current
+WHERE [pon] IN (SELECT DISTINCT [pon] FROM bom_schema.example_bom_staging
+                WHERE [snapshot_time_utc] = :snapshot_time
+                  AND [load_method] = 'upload')
+GROUP BY [pon]
+      ,[material_category]
+      ,[material_type]
+      ,[material_subtype]
+      ,[height]
+      ,[width]
+      ,[length];
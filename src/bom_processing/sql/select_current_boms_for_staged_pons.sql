@@ -0,0 +1,16 @@
+SELECT [pon]
+      ,[material_category]
+      ,[part_tag]
+      ,[height]
+      ,[width]
+      ,[length]
+      ,[material_type]
+      ,[material_subtype]
+      ,[quantity]
+      ,[usage_quantity]
+      ,[finish_quantity]
+      ,[snapshot_time_utc]
+FROM bom_schema.example_bom_final_current
+WHERE [pon] IN (SELECT DISTINCT [pon] FROM bom_schema.example_bom_staging
+                WHERE [snapshot_time_utc] = :snapshot_time
+                  AND [load_method] = 'upload');
@@ -0,0 +1,32 @@
+SELECT history.[pon]
+      ,history.[part_tag]
+      ,history.[quantity]
+      ,history.[material_category]
+      ,history.[material_type]
+      ,history.[material_subtype]
+      ,history.[height]
+      ,history.[width]
+      ,history.[length]
+      ,history.[usage_quantity]
+      ,history.[finish_quantity]
+      ,history.[designation]
+      ,history.[element]
+      ,history.[additional_info]
+      ,history.[load_method]
+      ,history.[snapshot_time_utc]
+      ,history.[bom_filename]
+      ,history.[uploaded_by]
+      ,history.[item_id]
+      ,history.[material_status]
+      ,history.[is_item_unmatched]
+FROM bom_schema.example_bom_final_history AS history
+INNER JOIN (
+	SELECT [pon]
+	      ,MAX([snapshot_datetime_utc]) AS [snapshot_datetime_utc]
+	FROM bom_schema.example_bom_final_history
+	WHERE [pon] IN :pons
+		AND [snapshot_datetime_utc] <= :as_of
+	GROUP BY [pon]
+) AS latest
+	ON history.[pon] = latest.[pon]
+	AND history.[snapshot_datetime_utc] = latest.[snapshot_datetime_utc]
@@ -0,0 +1,27 @@
+-- SQLite version: ISO weeks are counted from Monday 1900-01-01, the same
+-- week boundaries as DATEDIFF(DAY, 0, ...) / 7, and DELETE TOP becomes a
+-- LIMIT on the rowids to delete
+DELETE FROM bom_schema.example_bom_final_history
+WHERE rowid IN (
+	SELECT history.rowid
+	FROM bom_schema.example_bom_final_history AS history
+	INNER JOIN (
+		SELECT [pon]
+		      ,[snapshot_time_utc]
+		      ,ROW_NUMBER() OVER (
+		          PARTITION BY [pon], CAST((julianday(date([snapshot_time])) - julianday('1900-01-01')) / 7 AS INTEGER)
+		          ORDER BY [snapshot_time_utc] DESC
+		      ) AS [week_rank]
+		FROM (
+			SELECT DISTINCT [pon]
+			      ,[snapshot_time_utc]
+			      ,datetime(substr([snapshot_time_utc], 1, 19)) AS [snapshot_time]
+			FROM bom_schema.example_bom_final_history
+		) AS snapshots
+		WHERE [snapshot_time] < datetime('now', '-' || :retention_days || ' days')
+	) AS expired_snapshots
+		ON history.[pon] = expired_snapshots.[pon]
+		AND history.[snapshot_time_utc] = expired_snapshots.[snapshot_time_utc]
+	WHERE expired_snapshots.[week_rank] > 1
+	LIMIT :batch_size
+);
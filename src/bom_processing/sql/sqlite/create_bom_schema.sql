@@ -0,0 +1,192 @@
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_staging (
+	[pon] TEXT NOT NULL
+      ,[part_tag] INTEGER
+      ,[quantity] INTEGER
+      ,[material_category] TEXT
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[usage_quantity] REAL
+      ,[finish_quantity] REAL
+      ,[designation] TEXT
+      ,[element] TEXT
+      ,[additional_info] TEXT
+      ,[load_method] TEXT
+      ,[snapshot_time_utc] TEXT
+      ,[bom_filename] TEXT
+      ,[uploaded_by] TEXT);
+
+CREATE TABLE IF NOT EXISTS bom_schema.item_id_reference (
+	[item_id] TEXT PRIMARY KEY
+      ,[material_type] TEXT NOT NULL
+      ,[material_subtype] TEXT
+      ,[height] INTEGER NOT NULL
+      ,[width] INTEGER NOT NULL
+      ,[material_status] TEXT);
+
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_final (
+	[pon] TEXT NOT NULL
+      ,[part_tag] INTEGER
+      ,[quantity] INTEGER
+      ,[material_category] TEXT
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[usage_quantity] REAL
+      ,[finish_quantity] REAL
+      ,[designation] TEXT
+      ,[element] TEXT
+      ,[additional_info] TEXT
+      ,[load_method] TEXT
+      ,[snapshot_time_utc] TEXT
+      ,[bom_filename] TEXT
+      ,[uploaded_by] TEXT
+      ,[item_id] TEXT
+      ,[material_status] TEXT
+      ,[is_item_unmatched] INTEGER);
+
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_final_history (
+	[pon] TEXT NOT NULL
+      ,[part_tag] INTEGER
+      ,[quantity] INTEGER
+      ,[material_category] TEXT
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[usage_quantity] REAL
+      ,[finish_quantity] REAL
+      ,[designation] TEXT
+      ,[element] TEXT
+      ,[additional_info] TEXT
+      ,[load_method] TEXT
+      ,[snapshot_time_utc] TEXT
+      ,[bom_filename] TEXT
+      ,[uploaded_by] TEXT
+      ,[item_id] TEXT
+      ,[material_status] TEXT
+      ,[is_item_unmatched] INTEGER
+      -- SQL Server's persisted column, see create_history_as_of_index.sql
+      ,[snapshot_datetime_utc] TEXT GENERATED ALWAYS AS (datetime([snapshot_time_utc])) VIRTUAL);
+
+CREATE INDEX IF NOT EXISTS bom_schema.ix_example_bom_final_history_pon_snapshot
+	ON example_bom_final_history ([pon], [snapshot_time_utc]);
+
+CREATE INDEX IF NOT EXISTS bom_schema.ix_example_bom_final_history_pon_snapshot_datetime
+	ON example_bom_final_history ([pon], [snapshot_datetime_utc]);
+
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_final_current (
+	[pon] TEXT NOT NULL
+      ,[part_tag] INTEGER
+      ,[quantity] INTEGER
+      ,[material_category] TEXT
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[usage_quantity] REAL
+      ,[finish_quantity] REAL
+      ,[designation] TEXT
+      ,[element] TEXT
+      ,[additional_info] TEXT
+      ,[load_method] TEXT
+      ,[snapshot_time_utc] TEXT
+      ,[bom_filename] TEXT
+      ,[uploaded_by] TEXT
+      ,[item_id] TEXT
+      ,[material_status] TEXT
+      ,[is_item_unmatched] INTEGER);
+
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_material_rollup (
+	[pon] TEXT NOT NULL
+      ,[material_category] TEXT
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[total_quantity] INTEGER
+      ,[total_usage_quantity] REAL
+      ,[total_finish_quantity] REAL
+      ,[snapshot_time_utc] TEXT);
+
+CREATE TABLE IF NOT EXISTS bom_schema.example_bom_revision_changes (
+	[pon] TEXT NOT NULL
+      ,[material_category] TEXT
+      ,[part_tag] INTEGER
+      ,[height] INTEGER
+      ,[width] INTEGER
+      ,[length] INTEGER
+      ,[change_type] TEXT NOT NULL
+      ,[material_type] TEXT
+      ,[material_subtype] TEXT
+      ,[previous_material_type] TEXT
+      ,[previous_material_subtype] TEXT
+      ,[quantity] REAL
+      ,[previous_quantity] REAL
+      ,[usage_quantity] REAL
+      ,[previous_usage_quantity] REAL
+      ,[finish_quantity] REAL
+      ,[previous_finish_quantity] REAL
+      ,[snapshot_time_utc] TEXT
+      ,[previous_snapshot_time_utc] TEXT);
+
+CREATE INDEX IF NOT EXISTS bom_schema.ix_example_bom_revision_changes_pon_snapshot
+	ON example_bom_revision_changes ([pon], [snapshot_time_utc]);
+
+-- Emulates the SQL Server view: each staged row gets the smallest item of
+-- its material type and subtype at least as tall and wide as the piece.
+-- Views in an attached database may only name its own tables, unqualified
+CREATE VIEW IF NOT EXISTS bom_schema.vw_example_bom_with_item_ids AS
+SELECT staging.[pon]
+      ,staging.[part_tag]
+      ,staging.[quantity]
+      ,staging.[material_category]
+      ,staging.[material_type]
+      ,staging.[material_subtype]
+      ,staging.[height]
+      ,staging.[width]
+      ,staging.[length]
+      ,staging.[usage_quantity]
+      ,staging.[finish_quantity]
+      ,staging.[designation]
+      ,staging.[element]
+      ,staging.[additional_info]
+      ,staging.[load_method]
+      ,staging.[snapshot_time_utc]
+      ,staging.[bom_filename]
+      ,staging.[uploaded_by]
+      ,item.[item_id]
+      ,item.[material_status]
+      ,CASE WHEN item.[item_id] IS NULL THEN 1 ELSE 0 END AS [is_item_unmatched]
+FROM example_bom_staging AS staging
+LEFT JOIN item_id_reference AS item
+	ON item.[item_id] = (
+		SELECT candidate.[item_id]
+		FROM item_id_reference AS candidate
+		WHERE candidate.[material_type] = staging.[material_type]
+			AND candidate.[material_subtype] IS staging.[material_subtype]
+			AND candidate.[height] >= staging.[height]
+			AND candidate.[width] >= staging.[width]
+		ORDER BY candidate.[height], candidate.[width], candidate.[item_id]
+		LIMIT 1
+	);
+
+-- Emulates the SQL Server view: the latest snapshot of each PON in history
+CREATE VIEW IF NOT EXISTS bom_schema.vw_example_bom_final_current AS
+SELECT history.*
+FROM example_bom_final_history AS history
+INNER JOIN (
+	SELECT [pon]
+	      ,MAX([snapshot_time_utc]) AS [snapshot_time_utc]
+	FROM example_bom_final_history
+	GROUP BY [pon]
+) AS latest
+	ON history.[pon] = latest.[pon]
+	AND history.[snapshot_time_utc] = latest.[snapshot_time_utc];
@@ -0,0 +1,2 @@
+-- create_bom_schema.sql creates the table
+SELECT 1;
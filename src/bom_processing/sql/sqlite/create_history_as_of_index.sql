@@ -0,0 +1,2 @@
+-- create_bom_schema.sql creates the generated column and its index
+SELECT 1;
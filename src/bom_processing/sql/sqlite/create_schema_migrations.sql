@@ -0,0 +1,3 @@
+CREATE TABLE IF NOT EXISTS bom_schema.schema_migrations (
+	[script] TEXT NOT NULL
+      ,[applied_at_utc] TEXT NOT NULL);
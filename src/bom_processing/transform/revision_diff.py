@@ -0,0 +1,226 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+# a part is the same part across revisions when these match
+DIFF_KEY_COLUMNS = [
+    "pon",
+    "material_category",
+    "part_tag",
+    "height",
+    "width",
+    "length",
+]
+QUANTITY_COLUMNS = ["quantity", "usage_quantity", "finish_quantity"]
+MATERIAL_COLUMNS = ["material_type", "material_subtype"]
+
+# quantities closer than this count as unchanged, so a round trip through
+# the database does not show up as a change
+QUANTITY_TOLERANCE = 1e-9
+
+KEY_HASH_COLUMN = "_key_hash"
+
+REVISION_CHANGE_COLUMNS = [
+    *DIFF_KEY_COLUMNS,
+    "change_type",
+    "material_type",
+    "material_subtype",
+    "previous_material_type",
+    "previous_material_subtype",
+    "quantity",
+    "previous_quantity",
+    "usage_quantity",
+    "previous_usage_quantity",
+    "finish_quantity",
+    "previous_finish_quantity",
+    "snapshot_time_utc",
+    "previous_snapshot_time_utc",
+]
+
+
+def _parts(bom_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per part of a snapshot, with a hash of its key. Rows of the
+    same part, e.g. under two material types, are summed
+    """
+    parts_df = bom_df[
+        [*DIFF_KEY_COLUMNS, *MATERIAL_COLUMNS, *QUANTITY_COLUMNS]
+    ].copy()
+    # the same types whether the rows come from process_boms or from SQL
+    parts_df["pon"] = parts_df["pon"].astype(str)
+    parts_df["material_category"] = parts_df["material_category"].astype(str)
+    parts_df["part_tag"] = parts_df["part_tag"].astype("Int64")
+    for col in ["height", "width", "length"]:
+        parts_df[col] = parts_df[col].astype("int64")
+    for col in QUANTITY_COLUMNS:
+        parts_df[col] = parts_df[col].astype("float64")
+
+    parts_df[KEY_HASH_COLUMN] = pd.util.hash_pandas_object(
+        parts_df[DIFF_KEY_COLUMNS], index=False
+    ).to_numpy()
+    # rows with distinct hashes are distinct parts
+    if parts_df[KEY_HASH_COLUMN].is_unique:
+        return parts_df
+
+    aggregations = {
+        **{col: (col, "first") for col in MATERIAL_COLUMNS},
+        **{col: (col, "sum") for col in QUANTITY_COLUMNS},
+        KEY_HASH_COLUMN: (KEY_HASH_COLUMN, "first"),
+    }
+    return (
+        parts_df.groupby(DIFF_KEY_COLUMNS, sort=False, dropna=False)
+        .agg(**aggregations)
+        .reset_index()
+    )
+
+
+def _match_parts(
+    previous: pd.DataFrame, current: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Outer join of two snapshots' parts on DIFF_KEY_COLUMNS, with previous
+    values suffixed _previous and the side each part is on in _merge.
+    Parts whose key hash is not on the other side cannot match and skip
+    the join, so a hash collision never makes two parts one
+    """
+    previous_candidates = previous[KEY_HASH_COLUMN].isin(
+        current[KEY_HASH_COLUMN]
+    )
+    current_candidates = current[KEY_HASH_COLUMN].isin(
+        previous[KEY_HASH_COLUMN]
+    )
+    matched = pd.merge(
+        previous[previous_candidates].drop(columns=KEY_HASH_COLUMN),
+        current[current_candidates].drop(columns=KEY_HASH_COLUMN),
+        how="outer",
+        on=DIFF_KEY_COLUMNS,
+        suffixes=("_previous", ""),
+        indicator=True,
+    )
+    value_columns = [*MATERIAL_COLUMNS, *QUANTITY_COLUMNS]
+    only_previous = (
+        previous[~previous_candidates]
+        .drop(columns=KEY_HASH_COLUMN)
+        .rename(columns={col: f"{col}_previous" for col in value_columns})
+        .assign(_merge="left_only")
+    )
+    only_current = (
+        current[~current_candidates]
+        .drop(columns=KEY_HASH_COLUMN)
+        .assign(_merge="right_only")
+    )
+
+    matched = matched.astype({"_merge": str})
+    frames = [
+        frame
+        for frame in [matched, only_previous, only_current]
+        if not frame.empty
+    ]
+    if not frames:
+        return matched
+    # parts on one side only have no columns of the other
+    return pd.concat(frames, ignore_index=True).reindex(
+        columns=matched.columns
+    )
+
+
+def _differs(previous: pd.Series, current: pd.Series) -> np.ndarray:
+    both_null = previous.isna().to_numpy() & current.isna().to_numpy()
+    if pd.api.types.is_float_dtype(current):
+        same = np.isclose(
+            previous.to_numpy(dtype=float),
+            current.to_numpy(dtype=float),
+            rtol=QUANTITY_TOLERANCE,
+            atol=QUANTITY_TOLERANCE,
+        )
+    else:
+        same = (previous == current).fillna(False).to_numpy(dtype=bool)
+    return ~(same | both_null)
+
+
+def _latest_snapshots(bom_df: pd.DataFrame) -> pd.Series:
+    if bom_df.empty:
+        return pd.Series(dtype=object)
+    return bom_df.groupby(bom_df["pon"].astype(str))["snapshot_time_utc"].max()
+
+
+def diff_bom_snapshots(
+    previous_df: pd.DataFrame, current_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Parts added, removed and changed between two snapshots of the same PONs,
+    with parts matched by DIFF_KEY_COLUMNS. A hash of the key rules out
+    most parts that cannot match before the join
+
+    A part is changed when its material type or subtype, or any of its
+    quantities, differ. PONs with no previous snapshot come out all added,
+    PONs missing from current_df are not compared
+
+    Args:
+        previous_df (pd.DataFrame): earlier snapshot, e.g. the rows of
+            example_bom_final_current for the uploaded PONs
+        current_df (pd.DataFrame): later snapshot, e.g. process_boms output
+
+    Return:
+        pd.DataFrame: one row per added, removed or changed part with
+            REVISION_CHANGE_COLUMNS, sorted by key. previous_ columns are
+            null for added parts, current ones for removed parts
+    """
+    previous_snapshots = _latest_snapshots(previous_df)
+    current_snapshots = _latest_snapshots(current_df)
+
+    previous_df = previous_df[
+        previous_df["pon"].astype(str).isin(current_snapshots.index)
+    ]
+    previous = _parts(previous_df)
+    current = _parts(current_df)
+
+    merged = _match_parts(previous, current)
+    added = (merged["_merge"] == "right_only").to_numpy()
+    removed = (merged["_merge"] == "left_only").to_numpy()
+    in_both = (merged["_merge"] == "both").to_numpy()
+
+    changed = np.zeros(len(merged), dtype=bool)
+    for col in [*MATERIAL_COLUMNS, *QUANTITY_COLUMNS]:
+        changed |= _differs(merged[f"{col}_previous"], merged[col])
+    changed &= in_both
+
+    kept = added | removed | changed
+    merged = merged[kept]
+    removed = removed[kept]
+    change_type = np.select(
+        [added[kept], removed], ["added", "removed"], default="changed"
+    )
+
+    changes_df = merged[DIFF_KEY_COLUMNS].copy()
+    changes_df[["height", "width", "length"]] = changes_df[
+        ["height", "width", "length"]
+    ].astype("int64")
+    changes_df["change_type"] = change_type
+    # removed parts only have previous values
+    for col in MATERIAL_COLUMNS:
+        changes_df[col] = merged[col].mask(removed, merged[f"{col}_previous"])
+        changes_df[f"previous_{col}"] = merged[f"{col}_previous"]
+    for col in QUANTITY_COLUMNS:
+        changes_df[col] = merged[col]
+        changes_df[f"previous_{col}"] = merged[f"{col}_previous"]
+    changes_df["snapshot_time_utc"] = changes_df["pon"].map(current_snapshots)
+    changes_df["previous_snapshot_time_utc"] = changes_df["pon"].map(
+        previous_snapshots
+    )
+
+    changes_df = changes_df.sort_values(DIFF_KEY_COLUMNS, kind="stable")
+    changes_df = changes_df.reset_index(drop=True)[REVISION_CHANGE_COLUMNS]
+
+    counts = changes_df["change_type"].value_counts()
+    logger.info(
+        f"Revision diff of {len(current_snapshots)} PONs: "
+        f"{counts.get('added', 0)} added, {counts.get('removed', 0)} removed, "
+        f"{counts.get('changed', 0)} changed parts"
+    )
+    return changes_df
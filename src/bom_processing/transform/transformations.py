@@ -1,17 +1,27 @@
 import logging
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+from bom_processing.constants import (
+    MATERIAL_CLASSIFICATION_COLUMNS,
+    MATERIAL_CLASSIFICATION_RULES,
+)
 from bom_processing.extract.read_boms_from_excel import extract_bom_data
+from config.config import PROCESSING_ENGINE
 from config.logging_config import configure_logging
 
 
 logger = logging.getLogger(__name__)
 
 
-def _drop_unneeded_columns(bom_df: pd.DataFrame) -> pd.DataFrame:
+def _drop_unneeded_columns(
+    bom_df: pd.DataFrame, file_keys: list[str]
+) -> pd.DataFrame:
     columns_to_keep = [
+        *file_keys,
         "part_tag",
         "quantity",
         "material_type",
@@ -35,30 +45,83 @@ def _aggregate_bom_data(
     bom_df: pd.DataFrame,
     columns_to_group_by: list,
 ) -> pd.DataFrame:
+    """
+    One row per group: quantities summed, every other column taken from
+    the first non-null value in the group
+    """
     sum_columns = [
         "quantity",
         "usage_quantity",
         "finish_quantity",
     ]
-    non_sum_columns = [col for col in bom_df.columns if col not in sum_columns]
+    first_columns = [
+        col
+        for col in bom_df.columns
+        if col not in sum_columns and col not in columns_to_group_by
+    ]
+
+    aggregations = {col: (col, "sum") for col in sum_columns}
+    aggregations.update({col: (col, "first") for col in first_columns})
+
+    return bom_df.groupby(columns_to_group_by, as_index=False).agg(
+        **aggregations
+    )
+
 
-    aggregated_df = bom_df.groupby(columns_to_group_by, as_index=False)[
-        sum_columns
-    ].sum()
+def _rule_mask(
+    vocabulary: pd.DataFrame, patterns: list[tuple[str, str]]
+) -> pd.Series:
+    """
+    True where any (column, pattern) pair is found, case-insensitively
+    """
+    mask = pd.Series(False, index=vocabulary.index)
+    for column, pattern in patterns:
+        mask |= vocabulary[column].str.contains(pattern, case=False, na=False)
+    return mask
 
-    retained_columns = bom_df.groupby(columns_to_group_by, as_index=False)[
-        non_sum_columns
-    ].first()
 
-    final_aggregated_df = pd.merge(
-        aggregated_df, retained_columns, on=columns_to_group_by, how="left"
+def _classify_materials(
+    bom_df: pd.DataFrame, rules: list[dict]
+) -> pd.DataFrame:
+    """
+    Apply material standardization rules, see MATERIAL_CLASSIFICATION_RULES
+
+    BOMs repeat a small vocabulary of material type, subtype and
+    designation combinations, so the rules run once per unique combination
+    and the results are mapped back to the rows
+    """
+    if bom_df.empty or not rules:
+        return bom_df
+
+    columns = MATERIAL_CLASSIFICATION_COLUMNS
+    codes = (
+        bom_df.groupby(columns, sort=False, dropna=False).ngroup().to_numpy()
     )
 
-    return final_aggregated_df
+    # first row of each combination, indexed by its code
+    first_rows = pd.Series(codes).drop_duplicates()
+    vocabulary = bom_df[columns].iloc[first_rows.index]
+    vocabulary.index = first_rows.to_numpy()
+    vocabulary = vocabulary.sort_index()
+
+    for rule in rules:
+        mask = _rule_mask(vocabulary, rule["match"])
+        if "exclude" in rule:
+            mask &= ~_rule_mask(vocabulary, rule["exclude"])
+        for column, value in rule["set"].items():
+            vocabulary.loc[mask, column] = value
+
+    classified = vocabulary.take(codes)
+    for column in columns:
+        bom_df[column] = classified[column].array
+
+    return bom_df
 
 
-def _transform_primary_a_bom(primary_a_df: pd.DataFrame) -> pd.DataFrame:
-    primary_a_df = _drop_unneeded_columns(primary_a_df)
+def _transform_primary_a_bom(
+    primary_a_df: pd.DataFrame, file_keys: list[str]
+) -> pd.DataFrame:
+    primary_a_df = _drop_unneeded_columns(primary_a_df, file_keys)
     primary_a_df = primary_a_df.round(
         {
             "width": 0,
@@ -75,46 +138,20 @@ def _transform_primary_a_bom(primary_a_df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # ensure height is smaller than width
-    primary_a_df[["height", "width"]] = primary_a_df[["height", "width"]].apply(
-        lambda row: sorted(row), axis=1, result_type="expand"
+    height = primary_a_df["height"].to_numpy()
+    width = primary_a_df["width"].to_numpy()
+    primary_a_df["height"], primary_a_df["width"] = (
+        np.minimum(height, width),
+        np.maximum(height, width),
     )
 
     # standardize material types and subtypes
-    # for Douglas Fir Glulam
-    primary_a_df.loc[
-        primary_a_df["material_type"].str.contains(
-            "type-A-X", case=False, na=False
-        )
-        | primary_a_df["material_subtype"].str.contains(
-            "type-A-X", case=False, na=False
-        ),
-        ["material_type", "material_subtype"],
-    ] = ["TYPE-A", "TYPE-A-X"]
-
-    # for standard SPF glulam (excluding Douglas Fir Glulam)
-    primary_a_df.loc[
-        primary_a_df["material_type"].str.contains("type-a", case=False, na=False)
-        & ~primary_a_df["material_subtype"].str.contains(
-            "type-A-X", case=False, na=False
-        ),
-        ["material_type", "material_subtype"],
-    ] = ["TYPE-A", "TYPE-A-S"]
-
-    # for RBK
-    primary_a_df.loc[
-        primary_a_df["material_type"].str.contains("type-b", case=False, na=False),
-        ["material_type", "material_subtype"],
-    ] = ["TYPE-B", "TYPE-B-S"]
-
-    # for dimensional lumber (e.g. 2x4, 2x6, etc.) to be material_type "Lumber"
-    primary_a_df.loc[
-        primary_a_df["material_type"].str.contains(
-            r"^\d+x\d+$", case=False, na=False
-        ),
-        "material_type",
-    ] = "TYPE-C"
+    primary_a_df = _classify_materials(
+        primary_a_df, MATERIAL_CLASSIFICATION_RULES["primary_a"]
+    )
 
     columns_to_group_by = [
+        *file_keys,
         "part_tag",
         "material_type",
         "material_subtype",
@@ -127,8 +164,10 @@ def _transform_primary_a_bom(primary_a_df: pd.DataFrame) -> pd.DataFrame:
     return primary_a_df
 
 
-def _transform_primary_b_bom(primary_b_df: pd.DataFrame) -> pd.DataFrame:
-    primary_b_df = _drop_unneeded_columns(primary_b_df)
+def _transform_primary_b_bom(
+    primary_b_df: pd.DataFrame, file_keys: list[str]
+) -> pd.DataFrame:
+    primary_b_df = _drop_unneeded_columns(primary_b_df, file_keys)
 
     primary_b_df = primary_b_df.round(
         {
@@ -144,34 +183,14 @@ def _transform_primary_b_bom(primary_b_df: pd.DataFrame) -> pd.DataFrame:
     # total finish only measures one side of piece, so multiply by 2
     primary_b_df["finish_quantity"] = primary_b_df["finish_quantity"] * 2
 
-    # standardizing material_types and subtypes
-    # for composite material A
-    primary_b_df.loc[
-        primary_b_df["material_type"].str.contains(
-            "composite-a", case=False, na=False
-        ),
-        ["material_type", "material_subtype"],
-    ] = ["COMPOSITE-A", "COMPOSITE-A-S"]
-
-    # for composite material B
-    primary_b_df.loc[
-        primary_b_df["material_type"].str.contains("composite-b", case=False, na=False),
-        ["material_type", "material_subtype"],
-    ] = ["COMPOSITE-B", "COMPOSITE-B-S"]
-
-    # for plain material
-    primary_b_df.loc[
-        primary_b_df["material_type"].str.contains("plain", case=False, na=False),
-        "material_type",
-    ] = "PLAIN"
-
-    # Find inserts and standardize designation column for them
-    primary_b_df.loc[
-        primary_b_df["designation"].str.contains("insert", case=False, na=False),
-        "designation",
-    ] = "INSERT"
+    # standardizing material_types and subtypes, and designations of
+    # inserts
+    primary_b_df = _classify_materials(
+        primary_b_df, MATERIAL_CLASSIFICATION_RULES["primary_b"]
+    )
 
     columns_to_group_by = [
+        *file_keys,
         "part_tag",
         "material_type",
         "material_subtype",
@@ -185,16 +204,42 @@ def _transform_primary_b_bom(primary_b_df: pd.DataFrame) -> pd.DataFrame:
     return primary_b_df
 
 
-def transform_bom(bom_df: pd.DataFrame, bom_category: str) -> pd.DataFrame:
-    logger.debug(f"Starting transformation for {bom_category} BOM.")
+def transform_bom(
+    bom_df: pd.DataFrame,
+    bom_category: str,
+    file_keys: Optional[list[str]] = None,
+    engine: str = PROCESSING_ENGINE,
+) -> pd.DataFrame:
+    """
+    Standardize and aggregate a cleaned BOM
+
+    Args:
+        bom_df (pd.DataFrame): cleaned BOM of bom_category
+        bom_category (str): primary_a, primary_b or secondary
+        file_keys (list[str], optional): columns identifying the file each
+            row came from, for transforming many BOMs concatenated into one
+            frame. They lead the aggregation keys, so the result is the
+            same as transforming each file on its own, in the same order
+        engine (str): pandas or polars, see PROCESSING_ENGINE
+    """
+    file_keys = list(file_keys or [])
+
+    if engine == "polars":
+        from bom_processing import polars_engine
+
+        return polars_engine.transform_bom(bom_df, bom_category, file_keys)
+    if engine != "pandas":
+        raise ValueError(f"Unknown processing engine: {engine}")
+
+    logger.debug("Starting transformation for %s BOM.", bom_category)
     if bom_category == "primary_a":
-        transformed_df = _transform_primary_a_bom(bom_df)
+        transformed_df = _transform_primary_a_bom(bom_df, file_keys)
     elif bom_category == "primary_b":
-        transformed_df = _transform_primary_b_bom(bom_df)
+        transformed_df = _transform_primary_b_bom(bom_df, file_keys)
     else:
         transformed_df = pd.DataFrame()
 
-    logger.debug(f"Transformed {bom_category} BOM.")
+    logger.debug("Transformed %s BOM.", bom_category)
 
     return transformed_df
 
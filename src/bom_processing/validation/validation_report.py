@@ -0,0 +1,164 @@
+from typing import Optional
+
+import pandas as pd
+
+from bom_processing.constants import (
+    EXPECTED_DTYPES_CLEANING,
+    NULLABLE_COLUMNS,
+    NUMERIC_AS_STRING_COLUMNS,
+    REQUIRED_COLUMNS_AFTER_RENAME,
+)
+from bom_processing.validation.column_validation import ValidationError
+
+
+# the header is row 1 of the sheet, so the first BOM row (index 0) is row 2
+EXCEL_FIRST_ROW = 2
+
+# rows listed per issue in error messages, the report keeps them all
+MAX_ROWS_IN_MESSAGE = 10
+
+SUMMARY_ROW_BLANK_COLUMNS = ["part_tag", "height", "width", "length"]
+
+
+class BOMValidationError(ValidationError):
+    """
+    Every problem found in a BOM, see validate_bom for the issue format
+    """
+
+    def __init__(self, issues: list[dict]):
+        self.issues = issues
+        super().__init__(format_issues(issues))
+
+    def __reduce__(self):
+        # raised in upload GUI worker processes, so it must pickle
+        return (type(self), (self.issues,))
+
+
+def summary_row_mask(bom_df: pd.DataFrame) -> pd.Series:
+    """
+    True for summary rows, where part tag and all dimensions are blank
+    """
+    columns = [col for col in SUMMARY_ROW_BLANK_COLUMNS if col in bom_df]
+    if not columns:
+        return pd.Series(False, index=bom_df.index)
+    return bom_df[columns].isna().all(axis=1)
+
+
+def _excel_rows(mask: pd.Series) -> list[int]:
+    return (mask.index[mask.to_numpy()] + EXCEL_FIRST_ROW).tolist()
+
+
+def _unconvertible(
+    values: pd.Series, dtype: str, numeric_as_string: bool
+) -> pd.Series:
+    """
+    True where a non-null value cannot be converted the way assign_dtypes
+    converts it
+    """
+    if dtype == "string" and not numeric_as_string:
+        return pd.Series(False, index=values.index)
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    invalid = numbers.isna() & values.notna()
+    if numeric_as_string:
+        # numeric strings become Int64, which rejects fractions
+        invalid |= numbers.notna() & (numbers % 1 != 0)
+    return invalid
+
+
+def validate_bom(
+    bom_df: pd.DataFrame,
+    schema: str = "primary",
+    reverse_renaming: Optional[dict[str, str]] = None,
+) -> list[dict]:
+    """
+    Check a renamed BOM for missing columns, missing values and values that
+    cannot be converted to their expected dtype, all in one pass
+
+    bom_df must keep the index read_excel gave it (summary rows may be
+    dropped), so issues can point at the rows of the sheet
+
+    Args:
+        bom_df (pd.DataFrame): BOM with columns renamed
+        schema (str): key into the constants, e.g. primary
+        reverse_renaming (dict[str, str], optional): renamed to original
+            column names, issues are reported with the original names
+
+    Return:
+        list[dict]: one dict per issue, with the original column name, the
+            problem (missing column, missing values or invalid values), the
+            expected dtype and the Excel rows affected. Empty if valid
+    """
+    reverse_renaming = reverse_renaming or {}
+    expected_dtypes = EXPECTED_DTYPES_CLEANING[schema]
+    nullable_columns = NULLABLE_COLUMNS[schema]
+    numeric_as_string = NUMERIC_AS_STRING_COLUMNS[schema]
+
+    issues = []
+    missing_columns = sorted(
+        REQUIRED_COLUMNS_AFTER_RENAME[schema] - set(bom_df.columns)
+    )
+    for col in missing_columns:
+        issues.append(
+            {
+                "column": reverse_renaming.get(col, col),
+                "problem": "missing column",
+                "dtype": expected_dtypes.get(col),
+                "rows": [],
+            }
+        )
+
+    for col in bom_df.columns:
+        if col not in expected_dtypes and col not in nullable_columns:
+            continue
+
+        values = bom_df[col]
+        dtype = expected_dtypes.get(col)
+        # int columns cannot hold nulls, even where the schema allows them
+        if nullable_columns.get(col, True) is False or dtype == "int":
+            null_rows = _excel_rows(values.isna())
+            if null_rows:
+                issues.append(
+                    {
+                        "column": reverse_renaming.get(col, col),
+                        "problem": "missing values",
+                        "dtype": dtype,
+                        "rows": null_rows,
+                    }
+                )
+
+        if dtype is not None:
+            invalid = _unconvertible(values, dtype, col in numeric_as_string)
+            invalid_rows = _excel_rows(invalid)
+            if invalid_rows:
+                issues.append(
+                    {
+                        "column": reverse_renaming.get(col, col),
+                        "problem": "invalid values",
+                        "dtype": dtype,
+                        "rows": invalid_rows,
+                    }
+                )
+
+    return issues
+
+
+def format_issues(issues: list[dict]) -> str:
+    """
+    One line summary of validation issues, for logs and the upload GUI
+    """
+    descriptions = []
+    for issue in issues:
+        description = f"{issue['problem']} '{issue['column']}'"
+        if issue["problem"] == "invalid values":
+            description += f" (expected {issue['dtype']})"
+        rows = issue["rows"]
+        if rows:
+            listed = ", ".join(map(str, rows[:MAX_ROWS_IN_MESSAGE]))
+            if len(rows) > MAX_ROWS_IN_MESSAGE:
+                listed += f" and {len(rows) - MAX_ROWS_IN_MESSAGE} more"
+            description += f" at rows {listed}"
+        descriptions.append(description)
+
+    plural = "" if len(issues) == 1 else "s"
+    return f"{len(issues)} problem{plural} found: " + "; ".join(descriptions)
@@ -23,6 +23,16 @@ LOG_TO_FILE = os.getenv("LOG_TO_FILE", "True").lower() == "true"
 # Set logging level based on DEBUG flag
 LOG_LEVEL = "DEBUG" if DEBUG else os.getenv("LOG_LEVEL", "INFO").upper()
 
+# Local ledger of ETL run statistics, and how the latest run is compared
+# against earlier ones
+RUN_LEDGER_PATH = Path(
+    os.getenv("RUN_LEDGER_PATH", LOG_DIR / "run_ledger.sqlite3")
+)
+RUN_LEDGER_BASELINE_RUNS = int(os.getenv("RUN_LEDGER_BASELINE_RUNS", "10"))
+RUN_LEDGER_REGRESSION_THRESHOLD = float(
+    os.getenv("RUN_LEDGER_REGRESSION_THRESHOLD", "0.2")
+)
+
 # DB Variables
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
@@ -30,15 +40,87 @@ DB_SCHEMA = os.getenv("DB_SCHEMA")
 DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 
+# Database backend: mssql for SQL Server over ODBC, or sqlite for a local
+# stand-in database file, to run the ETL and load benchmarks offline
+DB_BACKEND = os.getenv("DB_BACKEND", "mssql").lower()
+SQLITE_DB_PATH = Path(
+    os.getenv("SQLITE_DB_PATH", "local_db/bom_schema.sqlite3")
+)
+
+# Number of concurrent connections used to load staging data, and whether
+# rows are split between them by PON or by contiguous row ranges
+LOAD_PARALLELISM = int(os.getenv("LOAD_PARALLELISM", "1"))
+LOAD_PARTITION_BY = os.getenv("LOAD_PARTITION_BY", "pon").lower()
+# Number of PONs committed together when loading in checkpointed batches
+LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "50"))
+# Full scrapes are processed once and loaded into each of these targets at
+# once, e.g. dev,prod read from .env.dev and .env.prod. Empty loads into the
+# database above
+LOAD_TARGETS = [
+    name.strip()
+    for name in os.getenv("LOAD_TARGETS", "").split(",")
+    if name.strip()
+]
+
+# History retention: every snapshot is kept for HISTORY_RETENTION_DAYS,
+# after that only the last snapshot per PON per ISO week is kept
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+HISTORY_COMPACTION_BATCH_SIZE = int(
+    os.getenv("HISTORY_COMPACTION_BATCH_SIZE", "5000")
+)
+HISTORY_COMPACTION_MAX_BATCHES = int(
+    os.getenv("HISTORY_COMPACTION_MAX_BATCHES", "0")
+)
+HISTORY_COMPACTION_PAUSE_SECONDS = float(
+    os.getenv("HISTORY_COMPACTION_PAUSE_SECONDS", "1")
+)
+
+# As-of history queries are cached locally per PON for this many hours,
+# 0 to always query the database
+AS_OF_CACHE_DIR = Path(os.getenv("AS_OF_CACHE_DIR", "as_of_cache/"))
+AS_OF_CACHE_HOURS = float(os.getenv("AS_OF_CACHE_HOURS", "24"))
+# Only as-of times at least this many hours old are cached, a run still
+# loading a snapshot from before as_of would change the result. Keep it
+# above the longest ETL run
+AS_OF_CACHE_MARGIN_HOURS = float(os.getenv("AS_OF_CACHE_MARGIN_HOURS", "6"))
+
+# Transform the BOMs of a run together instead of file by file
+BATCH_TRANSFORM = os.getenv("BATCH_TRANSFORM", "True").lower() == "true"
+
+# Engine that cleans and transforms BOMs, pandas or polars (optional extra)
+PROCESSING_ENGINE = os.getenv("PROCESSING_ENGINE", "pandas").lower()
+
+# Worker processes used by the upload GUI to validate selected BOMs
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", "4"))
+
+# BOM files read ahead in the background while the current one is parsed,
+# 0 to read each file when it is parsed, and the most megabytes they hold
+PREFETCH_FILES = int(os.getenv("PREFETCH_FILES", "4"))
+PREFETCH_MAX_MB = int(os.getenv("PREFETCH_MAX_MB", "256"))
+
+# BOM files are extracted in worker processes that are killed when a file
+# takes longer than this, 0 to extract in this process with no time limit.
+# Each worker may use at most EXTRACT_MEMORY_LIMIT_MB, 0 for no limit
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("EXTRACT_TIMEOUT_SECONDS", "600"))
+EXTRACT_MEMORY_LIMIT_MB = int(os.getenv("EXTRACT_MEMORY_LIMIT_MB", "4096"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+
+# Run journals for resumable ETL runs
+RUN_STATE_DIR = Path(os.getenv("RUN_STATE_DIR", "runs/"))
+
+# Sharded full scrapes, the coordinator waits for every shard to be done
+SHARD_WAIT_TIMEOUT_SECONDS = float(
+    os.getenv("SHARD_WAIT_TIMEOUT_SECONDS", "14400")
+)
+SHARD_POLL_SECONDS = float(os.getenv("SHARD_POLL_SECONDS", "30"))
+
 # File handling
 staging_dir_env = os.getenv("STAGING_DIR")
 if not staging_dir_env:
     # If the BOM upload GUI is being run from an exe file
     # use this fallback path for convenience during development
     if getattr(sys, "frozen", False):
-        staging_dir_env = (
-            r"X:\path\to\staging_folder"
-        )
+        staging_dir_env = r"X:\path\to\staging_folder"
     else:
         raise RuntimeError("STAGING_DIR environment variable not set!")
 
@@ -46,6 +128,33 @@ STAGING_DIR = Path(staging_dir_env)
 if not STAGING_DIR.is_absolute():
     raise RuntimeError("STAGING_DIR path must be absolute")
 
+# Checksums of the BOM files last processed for each PON, kept with the
+# staging folder so the GUI can detect repeat uploads
+FINGERPRINT_INDEX_PATH = Path(
+    os.getenv(
+        "FINGERPRINT_INDEX_PATH",
+        STAGING_DIR / "_fingerprints" / "processed_boms.json",
+    )
+)
+
+# Staged uploads are claimed by moving them into a folder per run, which
+# must be on the same volume as STAGING_DIR for the move to be atomic
+STAGING_PROCESSING_DIR = Path(
+    os.getenv("STAGING_PROCESSING_DIR", STAGING_DIR / "_processing")
+)
+# Uploads are moved here once loaded, or to quarantine if they failed
+PROCESSED_DIR = Path(os.getenv("PROCESSED_DIR", STAGING_DIR / "_processed"))
+QUARANTINE_DIR = Path(os.getenv("QUARANTINE_DIR", STAGING_DIR / "_quarantine"))
+# Uploads are only claimed once every file of the PON is this old, so a
+# run never claims half of an upload still being moved into staging
+STAGING_CLAIM_SETTLE_SECONDS = float(
+    os.getenv("STAGING_CLAIM_SETTLE_SECONDS", "30")
+)
+# Staging runs take turns loading the shared staging table
+STAGING_LOCK_TIMEOUT_SECONDS = float(
+    os.getenv("STAGING_LOCK_TIMEOUT_SECONDS", "600")
+)
+
 # Other crap
 design_dir = os.getenv("DESIGN_PROJECT_DIRECTORY")
 if design_dir is not None:
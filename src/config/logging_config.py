@@ -1,8 +1,16 @@
+import atexit
 from datetime import datetime, timezone
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    TimedRotatingFileHandler,
+)
+import multiprocessing
 import os
 from pathlib import Path
+import queue
+from typing import Optional
 
 from config.config import (
     LOG_DIR,
@@ -13,28 +21,56 @@ from config.config import (
 )
 
 
+# Handlers doing the actual I/O, only ever called from listener threads
+_handlers: list[logging.Handler] = []
+_listeners: list[QueueListener] = []
+_worker_log_queue: Optional[multiprocessing.Queue] = None
+
+
 class UTCFormatter(logging.Formatter):
     def formatTime(self, record, datefmt=None):
         utc_dt = datetime.fromtimestamp(record.created, tz=timezone.utc)
         return utc_dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def configure_logging():
+def _start_listener(log_queue) -> None:
+    listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def _stop_listeners() -> None:
+    # flushes anything still queued before the process exits
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def configure_logging(log_name: str = "app"):
+    """
+    Route all logging through a queue. Log calls only put the record on the
+    queue, a listener thread formats it and writes to the terminal and the
+    rotating log file.
+
+    Args:
+        log_name (str): name of the log file in LOG_DIR. Processes that run
+            at the same time need their own, each one rotates its file
+    """
+    if _handlers:
+        return
+
     formatter = UTCFormatter(LOG_FORMAT)
 
     env = os.getenv("ENV", "production")
 
     LOG_DIR.mkdir(exist_ok=True)
 
-    handlers: list = []
-
     terminal_handler = logging.StreamHandler()
     terminal_handler.setLevel(LOG_LEVEL)
     terminal_handler.setFormatter(formatter)
-    handlers.append(terminal_handler)
+    _handlers.append(terminal_handler)
 
     if LOG_TO_FILE:
-        log_file = Path(LOG_DIR / "app.log")
+        log_file = Path(LOG_DIR / f"{log_name}.log")
         # rotate logs every 10 minutes if in DEBUG mode, daily in production
         file_handler = TimedRotatingFileHandler(
             log_file,
@@ -44,15 +80,54 @@ def configure_logging():
         )
         file_handler.setLevel(LOG_LEVEL)
         file_handler.setFormatter(formatter)
-        handlers.append(file_handler)
+        _handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    _start_listener(log_queue)
+    atexit.register(_stop_listeners)
 
     logging.basicConfig(
         level=LOG_LEVEL,
-        handlers=handlers,
+        handlers=[QueueHandler(log_queue)],
     )
 
     logging.getLogger().info(
-        f"Logging configured | Debug Mode: {DEBUG} | Environment {env}"
+        "Logging configured | Debug Mode: %s | Environment %s", DEBUG, env
     )
 
     return
+
+
+def get_worker_log_queue() -> Optional[multiprocessing.Queue]:
+    """
+    Queue for worker processes to send their log records to, served by
+    this process's handlers. Pass it to configure_worker_logging in each
+    worker so only this process writes to the log file.
+
+    Return:
+        multiprocessing.Queue | None: None if logging is not configured
+    """
+    global _worker_log_queue
+
+    if not _handlers:
+        return None
+
+    if _worker_log_queue is None:
+        _worker_log_queue = multiprocessing.Queue()
+        _start_listener(_worker_log_queue)
+
+    return _worker_log_queue
+
+
+def configure_worker_logging(log_queue: Optional[multiprocessing.Queue]):
+    """
+    Send all logging in a worker process to the parent's queue. Use as the
+    initializer of a process pool, with get_worker_log_queue() as its arg.
+    """
+    if log_queue is None:
+        return
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
@@ -0,0 +1,212 @@
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from bom_processing.load.load_targets import read_load_target
+from bom_processing.load.load_to_sql import use_load_target
+from bom_processing.load.migrations import apply_migrations
+from bom_processing.orchestration.sharded_run import parse_shard
+from config.config import SHARD_WAIT_TIMEOUT_SECONDS
+from config.logging_config import configure_logging
+from etl import folder_scraping_etl, staging_folder_etl
+
+
+def _read_pon_file(path: str) -> list[str]:
+    """
+    PONs from a text file, one per line. Blank lines and lines starting
+    with # are ignored
+    """
+    lines = Path(path).read_text().splitlines()
+    return [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def _parse_pons(args: argparse.Namespace) -> Optional[list[str]]:
+    if args.pon is None and args.pon_file is None:
+        return None
+
+    pons = list(args.pon or [])
+    if args.pon_file is not None:
+        pons.extend(_read_pon_file(args.pon_file))
+    return pons
+
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Expected a date or ISO datetime, e.g. 2025-06-01: {value}"
+        )
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bom-etl",
+        description="Run the BOM ETL, optionally for a subset of BOMs",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scope = argparse.ArgumentParser(add_help=False)
+    scope.add_argument(
+        "--pon",
+        action="append",
+        help="only process this PON, may be repeated",
+    )
+    scope.add_argument(
+        "--pon-file",
+        help="only process the PONs listed in this file, one per line",
+    )
+    scope.add_argument(
+        "--modified-since",
+        type=_parse_datetime,
+        help=(
+            "only process PONs with a BOM modified since this local date "
+            "or time"
+        ),
+    )
+    scope.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="list the BOMs that would be processed without loading them",
+    )
+
+    full = subparsers.add_parser(
+        "full",
+        parents=[scope],
+        help="scrape the design folder and refresh the final table",
+    )
+    full.add_argument(
+        "--parent-folder",
+        action="append",
+        help="only process projects in this parent folder, may be repeated",
+    )
+    full.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the most recent incomplete full scrape",
+    )
+    full.add_argument(
+        "--shard",
+        type=_parse_shard,
+        help="only load shard i of N into staging, e.g. 2/4, needs --run-id",
+    )
+    full.add_argument(
+        "--run-id",
+        help="id shared by every shard of a sharded run",
+    )
+    full.add_argument(
+        "--target",
+        action="append",
+        help=(
+            "load into this target's database from .env.<target>, may be "
+            "repeated to process once and load several, e.g. dev and prod"
+        ),
+    )
+
+    subparsers.add_parser(
+        "staging",
+        parents=[scope],
+        help="process uploads waiting in the staging folder",
+    )
+
+    coordinate = subparsers.add_parser(
+        "coordinate",
+        help="refresh the final table once every shard of a run is done",
+    )
+    coordinate.add_argument("--run-id", required=True)
+    coordinate.add_argument(
+        "--shards",
+        type=int,
+        required=True,
+        help="number of shards in the run",
+    )
+    coordinate.add_argument(
+        "--timeout",
+        type=float,
+        default=SHARD_WAIT_TIMEOUT_SECONDS,
+        help="seconds to wait for the shards",
+    )
+
+    migrate = subparsers.add_parser(
+        "migrate",
+        help="apply schema migrations not yet applied to the database",
+    )
+    migrate.add_argument(
+        "--target",
+        action="append",
+        help="migrate this target's database from .env.<target> instead",
+    )
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "coordinate":
+        folder_scraping_etl.coordinate_shards(
+            args.run_id, args.shards, args.timeout
+        )
+        return
+
+    if args.command == "migrate":
+        configure_logging()
+        if args.target is None:
+            apply_migrations()
+        for name in args.target or []:
+            with use_load_target(read_load_target(name)):
+                apply_migrations()
+        return
+
+    pons = _parse_pons(args)
+
+    if args.command == "full":
+        scoped = any(
+            scope is not None
+            for scope in (pons, args.parent_folder, args.modified_since)
+        )
+        if args.resume and scoped:
+            parser.error("--resume cannot be combined with a scoped reprocess")
+
+        if args.shard is not None:
+            if scoped or args.resume or args.dry_run or args.target:
+                parser.error(
+                    "--shard cannot be combined with --resume, --dry-run, "
+                    "--target or a scoped reprocess"
+                )
+            if args.run_id is None:
+                parser.error("--shard needs a --run-id shared by every shard")
+            folder_scraping_etl.run_shard(*args.shard, args.run_id)
+            return
+
+        folder_scraping_etl.main(
+            resume=args.resume,
+            pons=pons,
+            parent_folder_names=args.parent_folder,
+            modified_since=args.modified_since,
+            dry_run=args.dry_run,
+            target_names=args.target,
+        )
+    else:
+        staging_folder_etl.main(
+            pons=pons,
+            modified_since=args.modified_since,
+            dry_run=args.dry_run,
+        )
+
+
+if __name__ == "__main__":
+    main()
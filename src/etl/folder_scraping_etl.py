@@ -1,43 +1,417 @@
+import argparse
+from datetime import datetime, timezone
 import logging
+from typing import Iterable, Optional
+
+import pandas as pd
 
 from bom_processing.extract.get_bom_paths import (
+    log_bom_records,
     scrape_bom_paths_from_design_directory,
 )
 from bom_processing.orchestration.process_boms import process_boms
+from bom_processing.orchestration.run_journal import RunJournal, new_run_id
+from bom_processing.orchestration.run_ledger import (
+    RunRecorder,
+    total_file_size,
+)
+from bom_processing.orchestration.sharded_run import ShardedRun
+from bom_processing.load.load_targets import (
+    load_into_targets,
+    raise_for_failed_targets,
+    read_load_target,
+)
 from bom_processing.load.load_to_sql import (
-    delete_and_insert_to_sql,
+    _get_db_connection,
+    clear_snapshot_rows,
+    clear_stale_rows,
+    count_snapshot_rows,
+    load_df_to_sql_in_batches,
     refresh_final_bom_table,
+    staging_load_lock,
 )
+from config.config import LOAD_TARGETS, SHARD_WAIT_TIMEOUT_SECONDS
+from config.logging_config import configure_logging
 
 
 logger = logging.getLogger(__name__)
 
+ETL_NAME = "folder_scraping_etl"
+# scoped runs are ledgered apart so they do not skew the full run baseline
+SCOPED_ETL_NAME = "folder_scraping_etl_scoped"
+
+
+def _process(
+    recorder: RunRecorder,
+    bom_paths: list[dict],
+    journal: Optional[RunJournal] = None,
+) -> pd.DataFrame:
+    """
+    Process bom_paths in the recorder's process stage and add the run's
+    counts, files failed being those process_boms reports as failed
+
+    Return:
+        pd.DataFrame: the primary BOMs
+    """
+    failed_files = []
+    with recorder.stage("process"):
+        primary_boms_df, _ = process_boms(
+            bom_paths,
+            "full",
+            journal=journal,
+            on_failure=lambda record, reason: failed_files.append(
+                record["path"]
+            ),
+        )
+
+    recorder.add(
+        files_processed=len(bom_paths) - len(failed_files),
+        files_failed=len(failed_files),
+        rows_processed=len(primary_boms_df),
+        bytes_read=total_file_size(bom_paths),
+    )
+    return primary_boms_df
+
+
+def _process_uncommitted(
+    recorder: RunRecorder,
+    journal: RunJournal,
+    bom_paths: list[dict],
+) -> pd.DataFrame:
+    """
+    Process bom_paths, leaving out rows the journal has already committed
+    to staging
+
+    Return:
+        pd.DataFrame: rows still to load
+    """
+    primary_boms_df = _process(recorder, bom_paths, journal)
+
+    committed_files = journal.committed_files()
+    if committed_files:
+        already_committed = pd.MultiIndex.from_frame(
+            primary_boms_df[["pon", "bom_filename"]]
+        ).isin(committed_files)
+        logger.info(
+            f"Skipping {already_committed.sum()} rows committed before resume"
+        )
+        primary_boms_df = primary_boms_df[~already_committed]
+
+    return primary_boms_df
+
+
+def _process_and_load_targets(
+    recorder: RunRecorder,
+    journal: RunJournal,
+    bom_paths: list[dict],
+    targets: list[dict],
+) -> None:
+    """
+    Process bom_paths once, then load staging and refresh the final table
+    of every target at once. Targets are always loaded in full, a resumed
+    run only reuses the journal's processed files
+    """
+    primary_boms_df = _process(recorder, bom_paths, journal)
+
+    def _load():
+        # each target's own staging lock
+        with staging_load_lock():
+            load_df_to_sql_in_batches(
+                "example_bom_staging", primary_boms_df, clear_first=True
+            )
+            refresh_final_bom_table()
+
+    with recorder.stage("load"):
+        results = load_into_targets(targets, _load)
+    raise_for_failed_targets(results)
+
+
+def _load_scope(primary_boms_df: pd.DataFrame) -> None:
+    """
+    Load a scoped reprocess into staging and replace its PONs' rows in the
+    final table, under staging_load_lock
+
+    Staging may also hold the committed batches of a full scrape, so only
+    the rows of this run's snapshot are refreshed from, and they are
+    deleted once done
+    """
+    snapshot_time = primary_boms_df["snapshot_time_utc"].iloc[0]
+    with staging_load_lock():
+        with _get_db_connection() as conn:
+            if count_snapshot_rows("example_bom_staging", snapshot_time, conn):
+                # a full scrape started in the same second, its rows could
+                # not be told apart from this run's
+                raise RuntimeError(
+                    f"Staging already holds rows of snapshot {snapshot_time}"
+                    ", run the reprocess again"
+                )
+
+        try:
+            load_df_to_sql_in_batches("example_bom_staging", primary_boms_df)
+            refresh_final_bom_table(staged_snapshot=snapshot_time)
+        finally:
+            with _get_db_connection() as conn:
+                clear_snapshot_rows(
+                    "example_bom_staging", snapshot_time, "full", conn
+                )
+
 
-def main():
+def _reprocess_scope(
+    pons: Optional[Iterable[str]],
+    parent_folder_names: Optional[Iterable[str]],
+    modified_since: Optional[datetime],
+    targets: list[dict],
+) -> None:
+    """
+    Reprocess only the BOMs in scope and replace only their PONs' rows in
+    the final table
+    """
+    run_id = new_run_id(datetime.now(timezone.utc))
+    with RunRecorder(SCOPED_ETL_NAME, run_id) as recorder:
+        with recorder.stage("scrape_paths"):
+            bom_paths = scrape_bom_paths_from_design_directory(
+                pons=pons,
+                parent_folder_names=parent_folder_names,
+                modified_since=modified_since,
+            )
+
+        if not bom_paths:
+            logger.warning("No BOMs found in scope, nothing to reprocess")
+            return
+
+        primary_boms_df = _process(recorder, bom_paths)
+
+        if primary_boms_df.empty:
+            logger.warning("No BOMs in scope processed, final table unchanged")
+            return
+
+        with recorder.stage("load"):
+            if targets:
+                results = load_into_targets(
+                    targets, lambda: _load_scope(primary_boms_df)
+                )
+                raise_for_failed_targets(results)
+            else:
+                _load_scope(primary_boms_df)
+
+
+def main(
+    resume: bool = False,
+    pons: Optional[Iterable[str]] = None,
+    parent_folder_names: Optional[Iterable[str]] = None,
+    modified_since: Optional[datetime] = None,
+    dry_run: bool = False,
+    target_names: Optional[Iterable[str]] = None,
+):
     """
     Ingest and process BOM files scraped from Design Active Projects folder
     Overwrite BOM final table
+
+    Limiting the run to PONs, parent folders or recently modified files
+    reprocesses only those BOMs and replaces only their PONs' rows in the
+    final table
+
+    With load targets, BOMs are processed once and loaded into the final
+    table of every target at once. A target that fails does not stop the
+    others, the run fails once they have all finished
+
+    Args:
+        resume (bool): continue the most recent incomplete run, reusing
+            its processed files and committed batches
+        pons (Iterable[str], optional): only reprocess these PONs
+        parent_folder_names (Iterable[str], optional): only reprocess
+            projects in these parent folders
+        modified_since (datetime, optional): only reprocess PONs with a BOM
+            modified since then
+        dry_run (bool): log the BOMs that would be processed and stop
+        target_names (Iterable[str], optional): load targets, defaults to
+            LOAD_TARGETS. Empty loads into the database of the .env file
     """
     configure_logging()
 
     logger.info("Initializing ETL process to scrape design folder")
 
-    bom_paths = scrape_bom_paths_from_design_directory()
+    if target_names is None:
+        target_names = LOAD_TARGETS
+    # read every target first, so a missing one fails before processing
+    targets = [read_load_target(name) for name in target_names]
 
-    primary_boms_df, secondary_boms_df = process_boms(
-        bom_paths,
-        "full",
+    scoped = any(
+        scope is not None
+        for scope in (pons, parent_folder_names, modified_since)
     )
+    if scoped and resume:
+        raise ValueError("A scoped reprocess cannot resume a full scrape")
+
+    if dry_run:
+        log_bom_records(
+            scrape_bom_paths_from_design_directory(
+                pons=pons,
+                parent_folder_names=parent_folder_names,
+                modified_since=modified_since,
+            )
+        )
+        return
+
+    if scoped:
+        _reprocess_scope(pons, parent_folder_names, modified_since, targets)
+        return
+
+    journal = None
+    if resume:
+        journal = RunJournal.latest_incomplete(ETL_NAME)
+        if journal is None:
+            logger.info("No incomplete run to resume, starting a new run")
+        else:
+            logger.info(f"Resuming run {journal.run_id}")
+
+    if journal is None:
+        journal = RunJournal.start(ETL_NAME)
+
+    with RunRecorder(ETL_NAME, journal.run_id) as recorder:
+        with recorder.stage("scrape_paths"):
+            bom_paths = scrape_bom_paths_from_design_directory()
+
+        if targets:
+            _process_and_load_targets(recorder, journal, bom_paths, targets)
+        else:
+            committed_files = journal.committed_files()
+            primary_boms_df = _process_uncommitted(
+                recorder, journal, bom_paths
+            )
+
+            # staging holds only this run's rows from its load to its refresh
+            with staging_load_lock():
+                with recorder.stage("load"):
+                    load_df_to_sql_in_batches(
+                        "example_bom_staging",
+                        primary_boms_df,
+                        on_batch_committed=journal.record_committed,
+                        clear_first=not committed_files,
+                    )
+
+                with recorder.stage("refresh"):
+                    refresh_final_bom_table()
+
+    journal.mark_complete()
 
-    delete_and_insert_to_sql(
-        "example_bom_staging", primary_boms_df
+    return
+
+
+def run_shard(shard: int, shard_count: int, run_id: str):
+    """
+    Ingest and process the BOMs of one shard of a full scrape into staging.
+    The parent folders are split between shard_count shards by shard_of.
+    Run coordinate_shards with the same run id to refresh the final table
+    once every shard is done.
+
+    Rerunning a shard with the same run id resumes it.
+
+    Args:
+        shard (int): shard to run, from 1 to shard_count
+        shard_count (int): number of shards in the run
+        run_id (str): id shared by every shard of the run
+    """
+    # shards on one machine would rotate the same file under each other
+    configure_logging(f"app_shard_{shard}_of_{shard_count}")
+
+    logger.info(
+        f"Initializing shard {shard}/{shard_count} of run {run_id} "
+        f"to scrape design folder"
     )
-    refresh_final_bom_table()
+
+    run = ShardedRun(run_id, shard_count)
+    journal = run.shard_journal(ETL_NAME, shard)
+    if journal.completed:
+        logger.info(f"Shard {shard}/{shard_count} of {run_id} already done")
+        return
+
+    ledger_name = f"{ETL_NAME}_shard_{shard}_of_{shard_count}"
+    with RunRecorder(ledger_name, run_id) as recorder:
+        with recorder.stage("scrape_paths"):
+            bom_paths = scrape_bom_paths_from_design_directory(
+                shard=(shard, shard_count)
+            )
+
+        loaded_df = _process_uncommitted(recorder, journal, bom_paths)
+
+        # rows of earlier runs are cleared by the coordinator, shards and
+        # other runs take turns loading between batches
+        with recorder.stage("load"):
+            load_df_to_sql_in_batches(
+                "example_bom_staging",
+                loaded_df,
+                on_batch_committed=journal.record_committed,
+                lock_batches=True,
+            )
+
+    run.mark_shard_done(
+        shard,
+        {
+            "files": len(bom_paths),
+            "files_processed": recorder.counts["files_processed"],
+            "rows_loaded": len(loaded_df),
+        },
+    )
+    journal.mark_complete()
+
+    return
+
+
+def coordinate_shards(
+    run_id: str,
+    shard_count: int,
+    timeout_seconds: float = SHARD_WAIT_TIMEOUT_SECONDS,
+):
+    """
+    Wait for every shard of a sharded full scrape, then clear rows of
+    earlier runs from staging and overwrite BOM final table
+
+    Args:
+        run_id (str): id shared by every shard of the run
+        shard_count (int): number of shards in the run
+        timeout_seconds (float): give up if shards are still running
+    """
+    configure_logging()
+
+    logger.info(f"Coordinating {shard_count} shards of run {run_id}")
+
+    run = ShardedRun(run_id, shard_count)
+    snapshot_time = run.snapshot_time()
+
+    with RunRecorder(f"{ETL_NAME}_coordinator", run_id) as recorder:
+        with recorder.stage("wait"):
+            summaries = run.wait_for_shards(timeout_seconds)
+
+        recorder.add(
+            files_processed=sum(
+                summary["files_processed"] for summary in summaries.values()
+            ),
+            rows_processed=sum(
+                summary["rows_loaded"] for summary in summaries.values()
+            ),
+        )
+
+        with staging_load_lock():
+            with recorder.stage("load"):
+                with _get_db_connection() as conn:
+                    clear_stale_rows(
+                        "example_bom_staging", snapshot_time, conn
+                    )
+
+            with recorder.stage("refresh"):
+                refresh_final_bom_table()
 
     return
 
 
 if __name__ == "__main__":
-    from config.logging_config import configure_logging
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the most recent incomplete full scrape",
+    )
+    args = parser.parse_args()
 
-    main()
+    main(resume=args.resume)
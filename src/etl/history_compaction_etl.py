@@ -0,0 +1,24 @@
+import logging
+
+from bom_processing.load.history_retention import compact_history_table
+from config.logging_config import configure_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Compact BOM final history table according to the retention policy
+    """
+    configure_logging()
+
+    logger.info("Initializing history compaction")
+
+    compact_history_table()
+
+    return
+
+
+if __name__ == "__main__":
+    main()
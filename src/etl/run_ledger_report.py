@@ -0,0 +1,88 @@
+import argparse
+import logging
+import sys
+
+from bom_processing.orchestration.run_ledger import compare_latest_run
+from config.config import (
+    RUN_LEDGER_BASELINE_RUNS,
+    RUN_LEDGER_REGRESSION_THRESHOLD,
+)
+from config.logging_config import configure_logging
+
+
+logger = logging.getLogger(__name__)
+
+ETL_NAMES = ["folder_scraping_etl", "staging_folder_etl"]
+
+
+def main(
+    etl_names: list[str] = ETL_NAMES,
+    baseline_runs: int = RUN_LEDGER_BASELINE_RUNS,
+    threshold: float = RUN_LEDGER_REGRESSION_THRESHOLD,
+) -> int:
+    """
+    Compare the latest run of each ETL against its rolling baseline in the
+    run ledger
+
+    Return:
+        int: exit code, 1 if any ETL regressed
+    """
+    configure_logging()
+
+    regressed = False
+    for etl_name in etl_names:
+        report = compare_latest_run(etl_name, baseline_runs, threshold)
+        if report is None:
+            logger.info(
+                f"{etl_name}: not enough runs in the ledger to compare"
+            )
+            continue
+
+        baseline_throughput = report["baseline_files_per_second"]
+        logger.info(
+            f"{etl_name}: run {report['run_id']} "
+            f"{report['files_per_second'] or 0:.2f} files/s, baseline "
+            f"{baseline_throughput or 0:.2f} files/s over "
+            f"{report['baseline_runs']} runs"
+        )
+        for stage, seconds in report["stage_seconds"].items():
+            baseline_seconds = report["baseline_stage_seconds"].get(stage)
+            baseline = (
+                f"{baseline_seconds:.1f}s"
+                if baseline_seconds is not None
+                else "-"
+            )
+            logger.info(f"    {stage}: {seconds:.1f}s (baseline {baseline})")
+
+        for regression in report["regressions"]:
+            regressed = True
+            logger.warning(f"{etl_name}: regression, {regression}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report ETL throughput regressions from the run ledger"
+    )
+    parser.add_argument(
+        "--etl",
+        action="append",
+        choices=ETL_NAMES,
+        help="ETL to report on, may be repeated. Defaults to all",
+    )
+    parser.add_argument(
+        "--baseline-runs",
+        type=int,
+        default=RUN_LEDGER_BASELINE_RUNS,
+        help="number of earlier successful runs in the baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=RUN_LEDGER_REGRESSION_THRESHOLD,
+        help="fractional slowdown that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(args.etl or ETL_NAMES, args.baseline_runs, args.threshold))
@@ -1,56 +1,272 @@
+from datetime import datetime, timezone
 import logging
+from pathlib import Path
+from typing import Callable, Iterable, Optional
 
+import pandas as pd
+
+from bom_processing.extract.fingerprint_index import record_fingerprints
 from bom_processing.extract.get_bom_paths import (
+    log_bom_records,
     scrape_bom_paths_from_staging_folder,
 )
+from bom_processing.extract.sidecar import file_checksum
+from bom_processing.extract.staging_claims import (
+    archive_files,
+    claim_uploads,
+    find_claimable_uploads,
+    quarantine_files,
+    release_claim,
+)
 from bom_processing.orchestration.process_boms import process_boms
+from bom_processing.orchestration.run_journal import new_run_id
+from bom_processing.orchestration.run_ledger import (
+    RunRecorder,
+    total_file_size,
+)
 from bom_processing.load.load_to_sql import (
-    delete_and_insert_to_sql,
+    _get_db_connection,
+    append_revision_changes,
+    clear_snapshot_rows,
     insert_uploads_into_history_table,
+    load_df_to_sql_in_batches,
+    read_current_boms_for_staged_pons,
     refresh_final_current_bom_table,
+    refresh_material_rollup_table,
+    staging_load_lock,
 )
+from bom_processing.load.migrations import apply_migrations
+from bom_processing.transform.revision_diff import diff_bom_snapshots
+from config.logging_config import configure_logging
 
 
 logger = logging.getLogger(__name__)
 
+ETL_NAME = "staging_folder_etl"
+
+
+def _record_processed_fingerprints(
+    bom_paths: list[dict], primary_boms_df: pd.DataFrame
+) -> None:
+    """
+    Index the checksums of the files that made it into this run's
+    snapshot, so the GUI can recognise an identical re-upload
+    """
+    if primary_boms_df.empty:
+        return
+
+    processed_filenames = set(primary_boms_df["bom_filename"])
+    fingerprints_by_pon: dict[str, set[str]] = {}
+    for record in bom_paths:
+        if record["path"].name in processed_filenames:
+            fingerprints_by_pon.setdefault(record["pon"], set()).add(
+                file_checksum(record["path"])
+            )
+
+    try:
+        record_fingerprints(
+            fingerprints_by_pon,
+            primary_boms_df["snapshot_time_utc"].iloc[0],
+        )
+    except OSError as e:
+        logger.warning(f"Could not update fingerprint index: {e}")
+
+
+def _load_and_refresh(
+    recorder: RunRecorder,
+    bom_paths: list[dict],
+    primary_boms_df: pd.DataFrame,
+    on_loaded: Callable[[], None],
+) -> None:
+    """
+    Load the run's uploads into staging and history, refresh the current
+    and rollup tables of their PONs and record their revision changes.
+    Run under staging_load_lock, on_loaded is called once the uploads are
+    in history
+
+    Staging may also hold the committed batches of a full scrape, so the
+    run only refreshes from the rows of its own snapshot, and deletes them
+    once done
+    """
+    snapshot_time = primary_boms_df["snapshot_time_utc"].iloc[0]
+    try:
+        with recorder.stage("load"):
+            load_df_to_sql_in_batches("example_bom_staging", primary_boms_df)
+            insert_uploads_into_history_table(snapshot_time)
+            on_loaded()
+            _record_processed_fingerprints(bom_paths, primary_boms_df)
+
+        with recorder.stage("refresh"):
+            # the previous revisions, before the refresh replaces them
+            previous_boms_df = read_current_boms_for_staged_pons(snapshot_time)
+            refresh_final_current_bom_table()
+            refresh_material_rollup_table(snapshot_time)
+
+        with recorder.stage("revision_diff"):
+            append_revision_changes(
+                diff_bom_snapshots(previous_boms_df, primary_boms_df)
+            )
 
-def main():
+    finally:
+        with _get_db_connection() as conn:
+            clear_snapshot_rows(
+                "example_bom_staging", snapshot_time, "upload", conn
+            )
+
+
+def _finish_claim(
+    processing_dir: Path,
+    bom_paths: list[dict],
+    run_id: str,
+    failure_reasons: dict[str, str],
+) -> None:
+    """
+    Archive the claimed files that were loaded and quarantine the ones
+    process_boms failed, under the reason it gave for each, e.g. timed out
+    """
+    processed = [
+        record["path"]
+        for record in bom_paths
+        if record["path"].name not in failure_reasons
+    ]
+    archive_files(processed, run_id)
+
+    failed_by_reason: dict[str, list[Path]] = {}
+    for record in bom_paths:
+        reason = failure_reasons.get(record["path"].name)
+        if reason is not None:
+            failed_by_reason.setdefault(reason, []).append(record["path"])
+    for reason, paths in failed_by_reason.items():
+        quarantine_files(paths, run_id, f"{reason}, see log")
+
+    try:
+        processing_dir.rmdir()
+    except OSError:
+        logger.warning(f"Files left behind in {processing_dir}")
+
+
+def main(
+    pons: Optional[Iterable[str]] = None,
+    modified_since: Optional[datetime] = None,
+    dry_run: bool = False,
+):
     """
     Ingest and process validated files from Staging Folder
     Appends to historical BOM final table
     Overwrites current BOM final table
+    Refreshes material rollups for the uploaded PONs
+    Records the parts each upload added, removed or changed since the PON's
+    previous revision
+
+    Uploads are claimed by moving them into a processing folder for this
+    run, so runs can overlap without processing a file twice. Loaded files
+    are archived to PROCESSED_DIR, files that fail or have unexpected names
+    are quarantined. If the run fails before loading, its files are
+    returned to staging.
+
+    Args:
+        pons (Iterable[str], optional): only process uploads for these
+            PONs, other uploads stay in staging for the next run
+        modified_since (datetime, optional): only process uploads
+            modified since then
+        dry_run (bool): log the uploads that would be processed and stop
     """
     configure_logging()
 
     logger.info("Initializing ETL process for staging folder")
 
-    bom_paths = scrape_bom_paths_from_staging_folder()
+    if dry_run:
+        uploads, invalid_paths = find_claimable_uploads(
+            pons=pons, modified_since=modified_since
+        )
+        log_bom_records(
+            [
+                {"pon": pon, "path": path}
+                for pon, paths in uploads.items()
+                for path in paths
+            ]
+        )
+        for path in invalid_paths:
+            logger.info(f"Would quarantine unexpected file: {path.name}")
+        return
 
-    primary_boms_df, secondary_boms_df = process_boms(
-        bom_paths,
-        "upload",
-    )
+    run_id = new_run_id(datetime.now(timezone.utc))
+    with RunRecorder(ETL_NAME, run_id) as recorder:
+        with recorder.stage("claim"):
+            uploads, invalid_paths = find_claimable_uploads(
+                pons=pons, modified_since=modified_since
+            )
+            quarantine_files(invalid_paths, run_id, "unexpected file name")
+            if not uploads:
+                logger.info("No uploads waiting in staging")
+                return
+            processing_dir = claim_uploads(uploads, run_id)
 
-    delete_and_insert_to_sql(
-        "example_bom_staging", primary_boms_df
-    )
+        loaded = False
+        bom_paths = []
+        # claimed file names are unique within the processing folder
+        failure_reasons = {}
 
-    insert_uploads_into_history_table()
+        def _record_failure(record: dict, reason: str) -> None:
+            failure_reasons[record["path"].name] = reason
+
+        def _mark_loaded() -> None:
+            nonlocal loaded
+            loaded = True
 
-    for path in bom_paths:
-        path = path["path"]
         try:
-            path.unlink()
-            logger.info(f"Deleting file from staging: {path.name}")
-        except Exception as e:
-            logger.warning(f"Could not delete {path.name}: {e}")
+            with recorder.stage("scrape_paths"):
+                bom_paths = scrape_bom_paths_from_staging_folder(
+                    processing_dir
+                )
+
+            with recorder.stage("process"):
+                primary_boms_df, _ = process_boms(
+                    bom_paths,
+                    "upload",
+                    on_failure=_record_failure,
+                )
 
-    refresh_final_current_bom_table()
+            recorder.add(
+                files_processed=len(bom_paths) - len(failure_reasons),
+                files_failed=len(failure_reasons),
+                rows_processed=len(primary_boms_df),
+                bytes_read=total_file_size(bom_paths),
+            )
+
+            if primary_boms_df.empty:
+                logger.warning("No uploads processed, nothing to load")
+            else:
+                with recorder.stage("migrate"):
+                    apply_migrations()
+                with staging_load_lock():
+                    _load_and_refresh(
+                        recorder, bom_paths, primary_boms_df, _mark_loaded
+                    )
+
+        except Exception:
+            if not loaded:
+                logger.error("Run failed before loading, releasing its claim")
+                release_claim(processing_dir)
+            else:
+                _finish_claim(
+                    processing_dir,
+                    bom_paths,
+                    run_id,
+                    failure_reasons,
+                )
+            raise
+
+        with recorder.stage("cleanup"):
+            _finish_claim(
+                processing_dir,
+                bom_paths,
+                run_id,
+                failure_reasons,
+            )
 
     return
 
 
 if __name__ == "__main__":
-    from config.logging_config import configure_logging
-
     main()
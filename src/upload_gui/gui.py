@@ -1,14 +1,39 @@
+from concurrent.futures import Future, ProcessPoolExecutor
 import getpass
 import logging
+import multiprocessing
 import os
 from pathlib import Path
 import shutil
-from tkinter import filedialog, Tk, Label, Entry, StringVar, Button, messagebox
+import threading
+from tkinter import (
+    filedialog,
+    ttk,
+    Tk,
+    Label,
+    Entry,
+    StringVar,
+    Button,
+    messagebox,
+)
+from typing import Optional
 import uuid
 
-from bom_processing.extract.read_boms_from_excel import extract_bom_data
-from config.config import STAGING_DIR
-from config.logging_config import configure_logging
+# pandas, pyarrow and the extract stack are imported lazily, in validation
+# workers and at upload, so the window can be drawn right away
+from bom_processing.extract.fingerprint_index import is_duplicate_upload
+from bom_processing.extract.sidecar import (
+    SIDECAR_SUFFIX,
+    file_checksum,
+    get_sidecar_path,
+    write_sidecar,
+)
+from config.config import STAGING_DIR, VALIDATION_WORKERS
+from config.logging_config import (
+    configure_logging,
+    configure_worker_logging,
+    get_worker_log_queue,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -18,6 +43,38 @@ if not STAGING_DIR:
     raise RuntimeError("STAGING_DIR environment variable is not set!")
 
 
+# how often the window checks for finished validations
+VALIDATION_POLL_MS = 100
+
+
+def _warm_up_validation() -> None:
+    """
+    Imports the validation and sidecar stack ahead of first use
+    """
+    import bom_processing.extract.read_boms_from_excel  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+
+
+def _validate_bom(path: Path) -> dict:
+    """
+    Runs the full BOM extraction in a worker process
+
+    Return:
+        dict: the extracted df and category, and the checksum of the file
+            the df was extracted from
+    """
+    from bom_processing.extract.read_boms_from_excel import extract_bom_data
+
+    # checksum before reading so a file changed after validation will not
+    # match its sidecar
+    checksum = file_checksum(path)
+    bom_dict = extract_bom_data(path)
+    if not bom_dict:
+        raise ValueError("BOM could not be read")
+    bom_dict["checksum"] = checksum
+    return bom_dict
+
+
 class BOMUploaderGUI:
     def __init__(self, root):
         self.root = root
@@ -26,12 +83,27 @@ class BOMUploaderGUI:
         self.selected_filepaths = []
         self.validated_boms = {}
 
+        # validation runs in worker processes so the window stays responsive
+        self.executor = None
+        self.pending_validations: dict[Future, Path] = {}
+        self.failed_validations: dict[str, str] = {}
+        # the scheduled _poll_validations call, so only one is ever pending
+        self.poll_id: Optional[str] = None
+
         Button(
             root,
             text="Select BOMs",
             command=self.select_boms,
         ).grid(row=0, column=0, padx=10, pady=10)
 
+        self.cancel_button = Button(
+            root,
+            text="Cancel Validation",
+            command=self.cancel_validation,
+            state="disabled",
+        )
+        self.cancel_button.grid(row=0, column=1, padx=10, pady=10)
+
         Label(root, text="PON:").grid(row=1, column=0, padx=0, pady=10)
         self.pon = StringVar()
         Entry(root, textvariable=self.pon).grid(
@@ -46,6 +118,75 @@ class BOMUploaderGUI:
         )
         self.upload_button.grid(row=3, column=1, padx=10, pady=10)
 
+        self.progress = StringVar()
+        Label(root, textvariable=self.progress).grid(
+            row=4, column=0, columnspan=2, padx=10
+        )
+
+        self.file_list = ttk.Treeview(root, columns=("status",), height=8)
+        self.file_list.heading("#0", text="BOM")
+        self.file_list.heading("status", text="Status")
+        self.file_list.column("#0", width=320)
+        self.file_list.column("status", width=320)
+        self.file_list.grid(
+            row=5, column=0, columnspan=2, padx=10, pady=10, sticky="nsew"
+        )
+
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        # once the window is up, start the validation workers and load the
+        # heavy modules in the background
+        self.root.after_idle(self._warm_up)
+
+    def _warm_up(self) -> None:
+        executor = self._get_executor()
+        for _ in range(VALIDATION_WORKERS):
+            executor.submit(_warm_up_validation)
+        threading.Thread(target=_warm_up_validation, daemon=True).start()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn, as on Windows, forking the threaded window process
+            # can leave locks held in the workers
+            self.executor = ProcessPoolExecutor(
+                max_workers=VALIDATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_worker_logging,
+                initargs=(get_worker_log_queue(),),
+            )
+        return self.executor
+
+    def _discard_executor(self) -> None:
+        """
+        Shuts the validation workers down, killing validations still running.
+        The next validation starts a new pool
+        """
+        executor, self.executor = self.executor, None
+        if executor is None:
+            return
+
+        # no public way to stop running tasks before Python 3.14
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.kill()
+
+    def _schedule_poll(self) -> None:
+        self.poll_id = self.root.after(
+            VALIDATION_POLL_MS, self._poll_validations
+        )
+
+    def _set_file_status(self, path: Path, status: str) -> None:
+        self.file_list.item(str(path), values=(status,))
+
+    def _update_progress(self) -> None:
+        total = len(self.selected_filepaths)
+        finished = total - len(self.pending_validations)
+        self.progress.set(
+            f"Validated {finished} of {total} BOMs, "
+            f"{len(self.failed_validations)} failed"
+        )
+
     def select_boms(self):
         logger.info("Selecting BOMs for upload")
 
@@ -54,6 +195,10 @@ class BOMUploaderGUI:
             filetypes=[("Excel files", "*.xlsx *.xls")],
         )
 
+        self.cancel_validation()
+        self.file_list.delete(*self.file_list.get_children())
+        self.progress.set("")
+        self.failed_validations.clear()
         self.selected_filepaths.clear()
         self.validated_boms.clear()
         self.selected_filepaths.extend(
@@ -66,21 +211,58 @@ class BOMUploaderGUI:
             self.upload_button.config(state="disabled")
             return
 
-        failed = {}
+        self.upload_button.config(state="disabled")
+        executor = self._get_executor()
         for path in self.selected_filepaths:
+            logger.info(f"Validating BOM: {path.name}")
+            self.file_list.insert(
+                "", "end", iid=str(path), text=path.name, values=("Queued",)
+            )
+            future = executor.submit(_validate_bom, path)
+            self.pending_validations[future] = path
+
+        self.cancel_button.config(state="normal")
+        self._update_progress()
+        self._schedule_poll()
+
+    def _poll_validations(self) -> None:
+        """
+        Collects finished validations and updates the window, rescheduling
+        itself until every selected BOM has finished
+        """
+        self.poll_id = None
+        if not self.pending_validations:
+            return
+
+        for future, path in list(self.pending_validations.items()):
+            if not future.done():
+                if future.running():
+                    self._set_file_status(path, "Validating...")
+                continue
+
+            del self.pending_validations[future]
             try:
-                logger.info(f"Validating BOM: {path.name}")
-                bom_dict = extract_bom_data(path)
-                if bom_dict:
-                    self.validated_boms[path] = bom_dict["category"]
-                    logger.info("Validation Successful")
+                self.validated_boms[path] = future.result()
+                self._set_file_status(path, "Passed")
+                logger.info(f"Validation Successful: {path.name}")
             except Exception as e:
                 logger.error(f"Validation failed for {path.name}: {e}")
-                failed[path.name] = str(e)
+                self.failed_validations[path.name] = str(e)
+                self._set_file_status(path, f"Failed: {e}")
+
+        self._update_progress()
+
+        if self.pending_validations:
+            self._schedule_poll()
+        else:
+            self._finish_validation()
+
+    def _finish_validation(self) -> None:
+        self.cancel_button.config(state="disabled")
 
         failure_message_lines = ["The following BOMs failed validation:\n"]
-        if failed:
-            for path, error in failed.items():
+        if self.failed_validations:
+            for path, error in self.failed_validations.items():
                 failure_message_lines.append(f"- {path}: {error}")
 
             message = "\n".join(failure_message_lines)
@@ -90,6 +272,79 @@ class BOMUploaderGUI:
         else:
             self.upload_button.config(state="normal")
 
+    def cancel_validation(self) -> None:
+        """
+        Cancels queued validations and stops running ones, killing the
+        validation workers if any had started
+        """
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+
+        if not self.pending_validations:
+            return
+
+        logger.info("Cancelling BOM validation")
+        started = False
+        for future, path in self.pending_validations.items():
+            # a validation already handed to a worker cannot be cancelled
+            if not future.cancel():
+                started = True
+            self._set_file_status(path, "Cancelled")
+        if started:
+            self._discard_executor()
+
+        self.pending_validations.clear()
+        self.validated_boms.clear()
+        self.cancel_button.config(state="disabled")
+        self.upload_button.config(state="disabled")
+        self.progress.set("Validation cancelled")
+
+    def close(self) -> None:
+        self._discard_executor()
+        self.root.destroy()
+
+    def _remove_duplicate_boms(
+        self, pon: str, has_waiting_files: bool
+    ) -> dict[Path, dict]:
+        """
+        Drops files selected more than once, and the whole selection if it
+        is identical to the BOMs last processed for the PON
+
+        A partial match is still uploaded in full, as each upload replaces
+        the PON's entire BOM snapshot
+        """
+        unique_boms = {}
+        fingerprints = set()
+        copies = []
+        for path, bom_dict in self.validated_boms.items():
+            if bom_dict["checksum"] in fingerprints:
+                copies.append(path.name)
+                continue
+            fingerprints.add(bom_dict["checksum"])
+            unique_boms[path] = bom_dict
+
+        if copies:
+            logger.warning(f"Skipping copies of selected BOMs: {copies}")
+            messagebox.showwarning(
+                "Duplicate BOMs",
+                "The following BOMs are identical to other selected BOMs "
+                "and will be skipped:\n" + "\n".join(copies),
+            )
+
+        # files waiting in staging would be replaced, so only an upload
+        # with nothing waiting can be a repeat of the processed BOMs
+        if not has_waiting_files and is_duplicate_upload(pon, fingerprints):
+            logger.info(f"Selected BOMs already processed for PON {pon}")
+            messagebox.showwarning(
+                "Duplicate Upload",
+                f"The selected BOMs are identical to the BOMs last "
+                f"processed for PON {pon}. Nothing was uploaded.",
+            )
+            return {}
+
+        return unique_boms
+
     def upload_boms(self) -> None:
         temp_dir = STAGING_DIR / f"tmp_upload_{uuid.uuid4().hex}"
         pon = self.pon.get().strip()
@@ -103,6 +358,13 @@ class BOMUploaderGUI:
             raise Exception
 
         existing_files_for_pon = list(Path(STAGING_DIR).glob(f"{pon}_*.xls*"))
+
+        boms_to_upload = self._remove_duplicate_boms(
+            pon, bool(existing_files_for_pon)
+        )
+        if not boms_to_upload:
+            return
+
         if existing_files_for_pon:
             logger.info("Existing files found")
             ok_to_delete = messagebox.askokcancel(
@@ -119,10 +381,11 @@ class BOMUploaderGUI:
 
         try:
             logger.info(
-                f"Copying {len(self.validated_boms)} files to temporary directory"
+                f"Copying {len(boms_to_upload)} files to temporary directory"
             )
             temp_dir.mkdir(parents=True, exist_ok=False)
-            for filepath, category in self.validated_boms.items():
+            for filepath, bom_dict in boms_to_upload.items():
+                category = bom_dict["category"]
                 bom_extension = filepath.suffix
 
                 category_count = 1
@@ -138,8 +401,19 @@ class BOMUploaderGUI:
                     f"Copying {filepath.name} to temporary directory as {new_filename}"
                 )
                 shutil.copy(filepath, temp_dir / new_filename)
+                write_sidecar(
+                    bom_dict,
+                    get_sidecar_path(temp_dir / new_filename),
+                    bom_dict["checksum"],
+                )
 
-            for filepath in temp_dir.iterdir():
+            # sidecars go first so the ETL never sees a BOM without its
+            # sidecar and parses the Excel again
+            staged_files = sorted(
+                temp_dir.iterdir(),
+                key=lambda path: path.suffix != SIDECAR_SUFFIX,
+            )
+            for filepath in staged_files:
                 logger.info(
                     f"Copying {filepath.name} files into staging folder"
                 )
@@ -162,6 +436,8 @@ class BOMUploaderGUI:
             self.validated_boms.clear()
             self.pon.set("")
             self.upload_button.config(state="disabled")
+            self.file_list.delete(*self.file_list.get_children())
+            self.progress.set("")
 
         except Exception as e:
             logger.error(f"Upload aborted: {e}")
@@ -171,6 +447,8 @@ class BOMUploaderGUI:
 
 
 def main():
+    # required for worker processes in the PyInstaller build
+    multiprocessing.freeze_support()
     configure_logging()
     root = Tk()
     BOMUploaderGUI(root)
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import time
+from pathlib import Path
+
+from bom_processing.extract import fingerprint_index
+from bom_processing.extract.fingerprint_index import (
+    is_duplicate_upload,
+    load_fingerprint_index,
+    record_fingerprints,
+)
+
+
+def test_duplicate_upload_requires_exact_match_of_last_processed_boms():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = Path(temp_dir) / "index" / "processed_boms.json"
+
+        record_fingerprints(
+            {"12345": {"aaa", "bbb"}}, "2025-01-01T00:00:00+00:00", index_path
+        )
+
+        assert is_duplicate_upload("12345", {"bbb", "aaa"}, index_path)
+        assert not is_duplicate_upload("12345", {"aaa"}, index_path)
+        assert not is_duplicate_upload("12345", {"aaa", "ccc"}, index_path)
+        assert not is_duplicate_upload("54321", {"aaa", "bbb"}, index_path)
+
+
+def test_record_fingerprints_replaces_only_processed_pons():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = Path(temp_dir) / "processed_boms.json"
+
+        record_fingerprints(
+            {"12345": {"aaa"}, "54321": {"bbb"}},
+            "2025-01-01T00:00:00+00:00",
+            index_path,
+        )
+        record_fingerprints(
+            {"12345": {"ccc"}}, "2025-01-02T00:00:00+00:00", index_path
+        )
+
+        assert is_duplicate_upload("12345", {"ccc"}, index_path)
+        assert not is_duplicate_upload("12345", {"aaa"}, index_path)
+        assert is_duplicate_upload("54321", {"bbb"}, index_path)
+
+
+def test_missing_index_has_no_duplicates():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = Path(temp_dir) / "processed_boms.json"
+
+        assert not is_duplicate_upload("12345", {"aaa"}, index_path)
+
+
+def test_concurrent_runs_keep_each_others_pons(monkeypatch):
+    def slow_load(index_path):
+        # widen the window between reading and replacing the index
+        index = load_fingerprint_index(index_path)
+        time.sleep(0.05)
+        return index
+
+    monkeypatch.setattr(fingerprint_index, "load_fingerprint_index", slow_load)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = Path(temp_dir) / "processed_boms.json"
+        pons = [str(10000 + number) for number in range(6)]
+
+        with ThreadPoolExecutor(max_workers=len(pons)) as executor:
+            for pon in pons:
+                executor.submit(
+                    record_fingerprints,
+                    {pon: {pon}},
+                    "2025-01-01T00:00:00+00:00",
+                    index_path,
+                )
+
+        assert sorted(load_fingerprint_index(index_path)) == pons
+        assert not index_path.with_name("processed_boms.json.lock").exists()
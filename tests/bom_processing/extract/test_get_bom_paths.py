@@ -1,8 +1,14 @@
+from datetime import datetime
 import tempfile
 import os
 from pathlib import Path
 
-from bom_processing.extract.get_bom_paths import _get_bom_paths_from
+from bom_processing.extract.get_bom_paths import (
+    _get_bom_paths_from,
+    filter_bom_records,
+    scrape_bom_paths_from_design_directory,
+    shard_of,
+)
 
 
 def create_mock_folder_with_files(folder_path: Path, filenames: list):
@@ -40,3 +46,70 @@ def test_get_bom_paths_from_returns_correct():
         assert "not_a_bom.xls" not in returned_file_names
         assert "123456_not_excel.txt" not in returned_file_names
         assert "123456_backup.xls.bak" not in returned_file_names
+
+
+def test_scrape_design_directory_limited_to_pons_and_parent_folders():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for parent, pon in [
+            ("100 - First Project", "123456"),
+            ("200 - Second Project", "234567"),
+        ]:
+            create_mock_folder_with_files(
+                root / parent / f"{pon} - {parent[6:]} - Outputs",
+                [f"{pon}_material_list.xls"],
+            )
+
+        by_pon = scrape_bom_paths_from_design_directory(root, pons=["234567"])
+        by_parent = scrape_bom_paths_from_design_directory(
+            root, parent_folder_names=["100 - first project"]
+        )
+
+        assert [record["pon"] for record in by_pon] == ["234567"]
+        assert [record["pon"] for record in by_parent] == ["123456"]
+
+
+def test_filter_bom_records_by_modified_time():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        old_path = Path(temp_dir) / "123456_old.xls"
+        new_path = Path(temp_dir) / "123456_new.xls"
+        other_path = Path(temp_dir) / "234567_old.xls"
+        for path, modified in [
+            (old_path, datetime(2025, 1, 1)),
+            (new_path, datetime(2025, 6, 1)),
+            (other_path, datetime(2025, 1, 1)),
+        ]:
+            path.touch()
+            os.utime(path, (0, modified.timestamp()))
+        records = [
+            {"pon": "123456", "path": old_path},
+            {"pon": "123456", "path": new_path},
+            {"pon": "234567", "path": other_path},
+        ]
+
+        result = filter_bom_records(
+            records, modified_since=datetime(2025, 3, 1)
+        )
+
+        # the PON's unmodified file is kept with its modified one
+        assert [record["path"] for record in result] == [old_path, new_path]
+
+
+def test_shards_split_parent_folders_without_overlap():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for number in range(20):
+            pon = str(100000 + number)
+            create_mock_folder_with_files(
+                root / f"{number} - Project" / f"{pon} - Project - Outputs",
+                [f"{pon}_material_list.xls"],
+            )
+
+        shards = [
+            scrape_bom_paths_from_design_directory(root, shard=(shard, 3))
+            for shard in range(1, 4)
+        ]
+        pons = [record["pon"] for records in shards for record in records]
+
+        assert sorted(pons) == [str(100000 + number) for number in range(20)]
+        assert shard_of("7 - Project", 3) == shard_of(" 7 - PROJECT", 3)
@@ -0,0 +1,159 @@
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from bom_processing.extract import prefetch
+from bom_processing.extract.prefetch import ReadAhead, prefetch_files
+
+
+def write_files(directory: Path, count: int, size: int) -> list[Path]:
+    paths = []
+    for number in range(count):
+        path = directory / f"{number}.xlsx"
+        path.write_bytes(bytes([number]) * size)
+        paths.append(path)
+    return paths
+
+
+def record_reads(monkeypatch) -> list[Path]:
+    reads = []
+    lock = threading.Lock()
+    read_file = prefetch._read_file
+
+    def _read_file(path):
+        with lock:
+            reads.append(path)
+        return read_file(path)
+
+    monkeypatch.setattr(prefetch, "_read_file", _read_file)
+    return reads
+
+
+def test_files_yielded_in_order_with_contents():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 6, 10)
+
+        result = list(prefetch_files(paths, read_ahead=3))
+
+        assert [path for path, _ in result] == paths
+        assert [data for _, data in result] == [
+            path.read_bytes() for path in paths
+        ]
+
+
+def test_read_ahead_and_memory_cap_bound_files_held(monkeypatch):
+    reads = record_reads(monkeypatch)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 6, 100)
+
+        files = prefetch_files(paths, read_ahead=4, max_bytes=250)
+        next(files)
+        # the yielded file and at most one more fit in 250 bytes
+        assert len(reads) <= 2
+
+        files = prefetch_files(paths, read_ahead=2, max_bytes=10_000)
+        reads.clear()
+        next(files)
+        assert len(reads) <= 2
+        assert len(list(files)) == 5
+
+
+def test_file_larger_than_cap_is_still_read():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 2, 100)
+
+        result = list(prefetch_files(paths, read_ahead=2, max_bytes=10))
+
+        assert [data for _, data in result] == [
+            path.read_bytes() for path in paths
+        ]
+
+
+def test_unreadable_file_yields_none():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 2, 10)
+        missing = Path(temp_dir) / "missing.xlsx"
+
+        result = dict(prefetch_files([paths[0], missing, paths[1]]))
+
+        assert result[missing] is None
+        assert result[paths[1]] == paths[1].read_bytes()
+
+
+def test_no_read_ahead_leaves_reading_to_caller(monkeypatch):
+    reads = record_reads(monkeypatch)
+    paths = [Path("a.xlsx"), Path("b.xlsx")]
+
+    assert list(prefetch_files(paths, read_ahead=0)) == [
+        (paths[0], None),
+        (paths[1], None),
+    ]
+    assert reads == []
+
+
+def wait_for_read(files: ReadAhead, index: int) -> None:
+    finished, _, _ = files._reads[index]
+    assert finished.wait(10)
+
+
+def test_read_ahead_takes_files_in_order():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 5, 10)
+
+        files = ReadAhead(paths, read_ahead=2)
+        contents = []
+        for index in range(len(paths)):
+            wait_for_read(files, index)
+            contents.append(files.take(index))
+
+        assert contents == [path.read_bytes() for path in paths]
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32", reason="needs a named pipe to hang a read"
+)
+def test_read_ahead_leaves_hung_read_to_caller():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 2, 10)
+        # opening a pipe nobody writes to blocks, like a stalled share read
+        hung_path = Path(temp_dir) / "hung.xlsx"
+        os.mkfifo(hung_path)
+
+        files = ReadAhead([hung_path, *paths], read_ahead=2)
+        assert files.take(0) is None
+        wait_for_read(files, 1)
+        wait_for_read(files, 2)
+
+        assert [files.take(1), files.take(2)] == [
+            path.read_bytes() for path in paths
+        ]
+
+
+def test_unfinished_read_holds_its_bytes_until_it_finishes(monkeypatch):
+    release = threading.Event()
+    read_file = prefetch._read_file
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_files(Path(temp_dir), 4, 100)
+
+        def _read_file(path):
+            if path == paths[0]:
+                release.wait(10)
+            return read_file(path)
+
+        monkeypatch.setattr(prefetch, "_read_file", _read_file)
+
+        files = ReadAhead(paths, read_ahead=3, max_bytes=250)
+        slow_read_finished, _, _ = files._reads[0]
+        assert files.take(0) is None
+        # the slow read still holds 100 bytes, a third file does not fit
+        assert list(files._reads) == [1]
+
+        release.set()
+        assert slow_read_finished.wait(10)
+        wait_for_read(files, 1)
+        assert files.take(1) == paths[1].read_bytes()
+        assert list(files._reads) == [2, 3]
@@ -0,0 +1,81 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from bom_processing.extract.get_bom_paths import (
+    scrape_bom_paths_from_staging_folder,
+)
+from bom_processing.extract.sidecar import (
+    file_checksum,
+    get_sidecar_path,
+    read_sidecar,
+    write_sidecar,
+)
+
+
+def make_cleaned_bom() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "part_tag": pd.array([1, 2], dtype="Int64"),
+            "quantity": [1, 3],
+            "material_type": pd.array(["type-a", "2x4"], dtype="string"),
+            "designation": pd.array([None, "insert"], dtype="string"),
+            "usage_quantity": [1.5, 2.0],
+        },
+        index=[0, 2],
+    )
+
+
+def test_sidecar_round_trip_when_checksum_matches():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bom_path = Path(temp_dir) / "12345_primary_a_staging_user.xlsx"
+        bom_path.write_bytes(b"workbook contents")
+        bom_df = make_cleaned_bom()
+
+        write_sidecar(
+            {"df": bom_df, "category": "primary_a"},
+            get_sidecar_path(bom_path),
+            file_checksum(bom_path),
+        )
+        bom_dict = read_sidecar(bom_path)
+
+        assert bom_dict["category"] == "primary_a"
+        pd.testing.assert_frame_equal(bom_dict["df"], bom_df)
+
+
+def test_sidecar_ignored_when_workbook_changed():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bom_path = Path(temp_dir) / "12345_primary_a_staging_user.xlsx"
+        bom_path.write_bytes(b"workbook contents")
+        write_sidecar(
+            {"df": make_cleaned_bom(), "category": "primary_a"},
+            get_sidecar_path(bom_path),
+            file_checksum(bom_path),
+        )
+
+        bom_path.write_bytes(b"edited workbook contents")
+
+        assert read_sidecar(bom_path) is None
+
+
+def test_staging_scrape_attaches_sidecars():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        staging_folder = Path(temp_dir)
+        with_sidecar = staging_folder / "12345_primary_a_staging_user.xlsx"
+        without_sidecar = staging_folder / "12345_primary_b_staging_user.xls"
+        with_sidecar.touch()
+        without_sidecar.touch()
+        get_sidecar_path(with_sidecar).touch()
+        (staging_folder / "tmp_upload_in_progress").mkdir()
+
+        records = {
+            record["path"].name: record
+            for record in scrape_bom_paths_from_staging_folder(staging_folder)
+        }
+
+        assert set(records) == {with_sidecar.name, without_sidecar.name}
+        assert records[with_sidecar.name]["sidecar"] == get_sidecar_path(
+            with_sidecar
+        )
+        assert "sidecar" not in records[without_sidecar.name]
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bom_processing.extract.staging_claims import (
+    claim_uploads,
+    find_claimable_uploads,
+    release_claim,
+)
+
+
+def _stage(folder: Path, filenames: list[str], age_seconds: float = 60):
+    mtime = time.time() - age_seconds
+    for filename in filenames:
+        (folder / filename).touch()
+        os.utime(folder / filename, (mtime, mtime))
+
+
+def test_find_claimable_uploads_groups_settled_uploads_by_pon():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        staging = Path(temp_dir)
+        _stage(
+            staging,
+            [
+                "12345_primary_a_staging_user.xls",
+                "12345_primary_b_staging_user.xls",
+                "12345_primary_b_staging_user.xls.parquet",
+                "notes.txt",
+            ],
+        )
+        _stage(staging, ["54321_primary_a_staging_user.xls"], age_seconds=0)
+        (staging / "tmp_upload_abc").mkdir()
+
+        uploads, invalid_paths = find_claimable_uploads(
+            staging, settle_seconds=30
+        )
+
+        assert list(uploads) == ["12345"]
+        assert len(uploads["12345"]) == 2
+        assert [path.name for path in invalid_paths] == ["notes.txt"]
+
+
+def test_overlapping_claims_never_share_an_upload():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        staging = Path(temp_dir) / "staging"
+        processing = Path(temp_dir) / "processing"
+        staging.mkdir()
+        _stage(
+            staging,
+            [
+                "12345_primary_a_staging_user.xls",
+                "12345_primary_a_staging_user.xls.parquet",
+                "12345_primary_b_staging_user.xls",
+            ],
+        )
+
+        # both runs found the upload before either claimed it
+        uploads, _ = find_claimable_uploads(staging, settle_seconds=0)
+        first = claim_uploads(uploads, "run_1", processing)
+        second = claim_uploads(uploads, "run_2", processing)
+
+        assert sorted(path.name for path in first.iterdir()) == [
+            "12345_primary_a_staging_user.xls",
+            "12345_primary_a_staging_user.xls.parquet",
+            "12345_primary_b_staging_user.xls",
+        ]
+        assert list(second.iterdir()) == []
+        assert list(staging.iterdir()) == []
+
+
+def test_release_claim_returns_files_to_staging():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        staging = Path(temp_dir) / "staging"
+        processing = Path(temp_dir) / "processing"
+        staging.mkdir()
+        _stage(
+            staging,
+            [
+                "12345_primary_a_staging_user.xls",
+                "12345_primary_a_staging_user.xls.parquet",
+            ],
+        )
+
+        uploads, _ = find_claimable_uploads(staging, settle_seconds=0)
+        processing_dir = claim_uploads(uploads, "run_1", processing)
+        release_claim(processing_dir, staging)
+
+        assert not processing_dir.exists()
+        assert sorted(path.name for path in staging.iterdir()) == [
+            "12345_primary_a_staging_user.xls",
+            "12345_primary_a_staging_user.xls.parquet",
+        ]
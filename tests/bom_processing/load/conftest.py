@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from bom_processing.constants import REQUIRED_SQL_COLUMNS
+from bom_processing.load import load_to_sql
+from bom_processing.transform.revision_diff import diff_bom_snapshots
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "bom_schema.sqlite3"
+    monkeypatch.setattr(load_to_sql, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(load_to_sql, "SQLITE_DB_PATH", db_path)
+    monkeypatch.setattr(load_to_sql, "DB_SCHEMA", "bom_schema")
+
+    engine = load_to_sql._get_db_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "INSERT INTO bom_schema.item_id_reference VALUES "
+                "('SMALL', 'TYPE-A', 'TYPE-A-S', 40, 90, 'stock'), "
+                "('LARGE', 'TYPE-A', 'TYPE-A-S', 60, 140, 'order')"
+            )
+        )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def make_staged_bom():
+    """
+    Builds primary BOM rows as an upload stages them, three parts per PON
+
+    Return:
+        Callable: (pons, snapshot_time) to the staged rows
+    """
+
+    def _make_staged_bom(pons: list[str], snapshot_time: str) -> pd.DataFrame:
+        rows = [
+            {
+                "pon": pon,
+                "part_tag": part_tag,
+                "quantity": 2,
+                "material_category": "primary_a",
+                "material_type": "TYPE-A",
+                "material_subtype": "TYPE-A-S",
+                "height": height,
+                "width": 90,
+                "length": 2400,
+                "usage_quantity": 4.8,
+                "finish_quantity": 1.5,
+                "designation": None,
+                "element": "wall",
+                "additional_info": None,
+                "load_method": "upload",
+                "snapshot_time_utc": snapshot_time,
+                "bom_filename": f"{pon}_primary_a.xlsx",
+                "uploaded_by": "user",
+            }
+            for pon in pons
+            for part_tag, height in [(1, 38), (2, 50), (3, 89)]
+        ]
+        return pd.DataFrame(rows)[REQUIRED_SQL_COLUMNS["primary"]]
+
+    return _make_staged_bom
+
+
+@pytest.fixture
+def upload():
+    """
+    Runs the staging folder ETL's load steps on staged rows, under the
+    staging lock, and clears them from staging afterwards
+
+    Return:
+        Callable: (bom_df) to None
+    """
+
+    def _upload(bom_df: pd.DataFrame) -> None:
+        snapshot_time = bom_df["snapshot_time_utc"].iloc[0]
+        with load_to_sql.staging_load_lock():
+            load_to_sql.load_df_to_sql_in_batches(
+                "example_bom_staging", bom_df, parallelism=4
+            )
+            load_to_sql.insert_uploads_into_history_table(snapshot_time)
+            previous_df = load_to_sql.read_current_boms_for_staged_pons(
+                snapshot_time
+            )
+            load_to_sql.refresh_final_current_bom_table()
+            load_to_sql.refresh_material_rollup_table(snapshot_time)
+            load_to_sql.append_revision_changes(
+                diff_bom_snapshots(previous_df, bom_df)
+            )
+            with load_to_sql._get_db_connection() as conn:
+                load_to_sql.clear_snapshot_rows(
+                    "example_bom_staging", snapshot_time, "upload", conn
+                )
+
+    return _upload
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from bom_processing.load import history_query
+
+
+SNAPSHOTS = [
+    "2026-01-05T10:00:00+00:00",
+    "2026-01-06T10:00:00+00:00",
+]
+
+
+@pytest.fixture
+def history_db(sqlite_db, make_staged_bom, upload):
+    upload(make_staged_bom(["10001", "10002"], SNAPSHOTS[0]))
+    revision = make_staged_bom(["10001"], SNAPSHOTS[1])
+    upload(revision[revision["part_tag"] != 3])
+    return sqlite_db
+
+
+def snapshots_by_pon(bom_df) -> dict:
+    return (
+        bom_df.groupby("pon")["snapshot_time_utc"]
+        .agg(lambda times: (times.iloc[0], len(times)))
+        .to_dict()
+    )
+
+
+def test_as_of_returns_latest_snapshot_at_the_time(history_db, tmp_path):
+    before = history_query.read_boms_as_of(
+        ["10001", "10002", "10003"],
+        datetime(2026, 1, 6, 9, 59),
+        cache_dir=tmp_path,
+    )
+    # aware datetimes are compared in UTC
+    after = history_query.read_boms_as_of(
+        ["10001", "10002"],
+        datetime(2026, 1, 6, 11, tzinfo=timezone(timedelta(hours=1))),
+        cache_dir=tmp_path,
+    )
+
+    assert snapshots_by_pon(before) == {
+        "10001": (SNAPSHOTS[0], 3),
+        "10002": (SNAPSHOTS[0], 3),
+    }
+    assert snapshots_by_pon(after) == {
+        "10001": (SNAPSHOTS[1], 2),
+        "10002": (SNAPSHOTS[0], 3),
+    }
+    assert list(after.dtypes) == list(history_query.HISTORY_DTYPES.values())
+
+
+def test_as_of_results_are_cached(history_db, tmp_path, monkeypatch):
+    as_of = datetime(2026, 1, 7)
+    expected = history_query.read_boms_as_of(
+        ["10001", "10002", "10003"], as_of, cache_dir=tmp_path
+    )
+    assert len(list(tmp_path.glob("*.parquet"))) == 3
+
+    def fail(*args):
+        raise AssertionError("queried the database")
+
+    monkeypatch.setattr(history_query, "_query_as_of", fail)
+    cached = history_query.read_boms_as_of(
+        ["10001", "10002", "10003"], as_of, cache_dir=tmp_path
+    )
+
+    assert cached.equals(expected)
+    with pytest.raises(AssertionError):
+        history_query.read_boms_as_of(
+            ["10001"], as_of, cache_hours=0, cache_dir=tmp_path
+        )
+
+
+def test_recent_as_of_is_not_cached(history_db, tmp_path):
+    # a run loading a snapshot from before as_of may still be going
+    as_of = datetime.now(timezone.utc) - timedelta(hours=1)
+    history_query.read_boms_as_of(
+        ["10001"], as_of, cache_dir=tmp_path, cache_margin_hours=6
+    )
+    assert list(tmp_path.glob("*.parquet")) == []
+
+    history_query.read_boms_as_of(
+        ["10001"], as_of, cache_dir=tmp_path, cache_margin_hours=0
+    )
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
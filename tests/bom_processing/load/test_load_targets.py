@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from bom_processing.load import load_to_sql
+from bom_processing.load.load_targets import (
+    load_into_targets,
+    raise_for_failed_targets,
+    read_load_target,
+)
+from bom_processing.load.sqlite_backend import create_sqlite_engine
+
+
+def write_target(env_dir, name: str, backend: str = "sqlite") -> None:
+    (env_dir / f".env.{name}").write_text(
+        f"DB_BACKEND={backend}\n"
+        "DB_SCHEMA=bom_schema\n"
+        f"SQLITE_DB_PATH={env_dir / name / 'bom_schema.sqlite3'}\n"
+        "LOG_DIR=not_a_db_setting\n"
+    )
+
+
+def read_final_table(db_path) -> pd.DataFrame:
+    engine = create_sqlite_engine(db_path, "bom_schema")
+    try:
+        with engine.connect() as conn:
+            return pd.read_sql(
+                sa.text("SELECT * FROM bom_schema.example_bom_final"), conn
+            )
+    finally:
+        engine.dispose()
+
+
+def test_read_load_target_takes_database_settings(tmp_path):
+    write_target(tmp_path, "dev")
+
+    target = read_load_target("dev", tmp_path)
+
+    assert target["backend"] == "sqlite"
+    assert target["sqlite_path"] == tmp_path / "dev" / "bom_schema.sqlite3"
+    assert "not_a_db_setting" not in target.values()
+    with pytest.raises(ValueError):
+        read_load_target("prod", tmp_path)
+
+
+def test_each_target_loaded_and_reported_on_its_own(tmp_path, make_staged_bom):
+    for name in ["dev", "prod"]:
+        write_target(tmp_path, name)
+    write_target(tmp_path, "broken", backend="oracle")
+    targets = [
+        read_load_target(name, tmp_path) for name in ["dev", "prod", "broken"]
+    ]
+    bom_df = make_staged_bom(["10001", "10002"], "2026-01-05T10:00:00+00:00")
+
+    def load():
+        load_to_sql.load_df_to_sql_in_batches(
+            "example_bom_staging", bom_df, clear_first=True
+        )
+        load_to_sql.refresh_final_bom_table()
+
+    results = load_into_targets(targets, load)
+
+    assert [(r["target"], r["status"]) for r in results] == [
+        ("dev", "success"),
+        ("prod", "success"),
+        ("broken", "failed"),
+    ]
+    assert "oracle" in results[2]["error"]
+    for name in ["dev", "prod"]:
+        final = read_final_table(tmp_path / name / "bom_schema.sqlite3")
+        assert sorted(final["pon"].unique()) == ["10001", "10002"]
+    with pytest.raises(RuntimeError, match="broken"):
+        raise_for_failed_targets(results)
+    raise_for_failed_targets(results[:2])
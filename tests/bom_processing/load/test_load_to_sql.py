@@ -0,0 +1,154 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from bom_processing.load import load_to_sql
+from bom_processing.load.load_to_sql import (
+    load_df_to_sql_parallel,
+    partition_df,
+)
+
+
+def make_bom_df(rows_per_pon: dict[str, int]) -> pd.DataFrame:
+    pons = [pon for pon, rows in rows_per_pon.items() for _ in range(rows)]
+    return pd.DataFrame({"pon": pons, "quantity": range(len(pons))})
+
+
+def test_partition_df_by_pon_keeps_pons_together():
+    bom_df = make_bom_df({"10001": 6, "10002": 3, "10003": 3, "10004": 1})
+
+    partitions = partition_df(bom_df, 3, "pon")
+
+    assert len(partitions) == 3
+    assert sum(len(part) for part in partitions) == len(bom_df)
+    pon_partition_counts = (
+        pd.concat(
+            part.assign(partition=i) for i, part in enumerate(partitions)
+        )
+        .groupby("pon")["partition"]
+        .nunique()
+    )
+    assert (pon_partition_counts == 1).all()
+    # largest PON goes alone, the rest balance around it
+    assert sorted(len(part) for part in partitions) == [3, 4, 6]
+
+
+def test_partition_df_by_rows_is_contiguous_and_complete():
+    bom_df = make_bom_df({"10001": 10})
+
+    partitions = partition_df(bom_df, 3, "rows")
+
+    assert [len(part) for part in partitions] == [3, 3, 4]
+    pd.testing.assert_frame_equal(pd.concat(partitions), bom_df)
+
+
+def test_partition_df_returns_whole_frame_for_single_partition():
+    bom_df = make_bom_df({"10001": 2, "10002": 2})
+
+    partitions = partition_df(bom_df, 1, "pon")
+
+    assert len(partitions) == 1
+    assert partitions[0] is bom_df
+
+
+@pytest.fixture
+def pooled_engine(tmp_path, monkeypatch):
+    """
+    Engine with a pool of real connections, each attaching its own
+    database file as bom_schema. SQLite has one writer per file, so this
+    lets every partition's transaction be open and writing at once
+
+    Return:
+        tuple: the engine and the database file of each connection made
+    """
+    monkeypatch.setattr(load_to_sql, "DB_SCHEMA", "bom_schema")
+    db_paths = []
+    engine = sa.create_engine(
+        "sqlite://",
+        poolclass=sa.pool.QueuePool,
+        pool_size=4,
+        max_overflow=0,
+        connect_args={"check_same_thread": False},
+    )
+
+    @sa.event.listens_for(engine, "connect")
+    def _attach(dbapi_connection, connection_record):
+        db_path = tmp_path / f"connection_{len(db_paths)}.sqlite3"
+        db_paths.append(db_path)
+        dbapi_connection.execute(
+            "ATTACH DATABASE ? AS bom_schema", (str(db_path),)
+        )
+        dbapi_connection.execute(
+            "CREATE TABLE bom_schema.example_bom_staging "
+            "(pon TEXT NOT NULL, quantity INTEGER NOT NULL)"
+        )
+
+    yield engine, db_paths
+    engine.dispose()
+
+
+def committed_rows(db_paths) -> list[pd.DataFrame]:
+    frames = []
+    for db_path in db_paths:
+        with sqlite3.connect(db_path) as conn:
+            frames.append(
+                pd.read_sql("SELECT * FROM example_bom_staging", conn)
+            )
+    return frames
+
+
+def test_parallel_load_commits_every_partition(pooled_engine):
+    engine, db_paths = pooled_engine
+    bom_df = make_bom_df({"10001": 4, "10002": 3, "10003": 2})
+
+    load_df_to_sql_parallel("example_bom_staging", bom_df, engine, 3)
+
+    frames = committed_rows(db_paths)
+    # one connection per partition, each holding whole PONs
+    assert sorted(len(frame) for frame in frames) == [2, 3, 4]
+    assert all(frame["pon"].nunique() == 1 for frame in frames)
+    pd.testing.assert_frame_equal(
+        pd.concat(frames).sort_values("quantity", ignore_index=True),
+        bom_df,
+    )
+
+
+def test_parallel_load_rolls_back_every_partition_on_failed_insert(
+    pooled_engine,
+):
+    engine, db_paths = pooled_engine
+    bom_df = make_bom_df({"10001": 4, "10002": 3, "10003": 2})
+    bom_df["quantity"] = bom_df["quantity"].astype("Int64")
+    bom_df.loc[bom_df["pon"] == "10003", "quantity"] = pd.NA
+
+    with pytest.raises(sa.exc.IntegrityError):
+        load_df_to_sql_parallel("example_bom_staging", bom_df, engine, 3)
+
+    assert len(db_paths) == 3
+    assert all(frame.empty for frame in committed_rows(db_paths))
+
+
+def test_parallel_load_keeps_partitions_committed_before_failed_commit(
+    pooled_engine,
+):
+    engine, db_paths = pooled_engine
+    bom_df = make_bom_df({"10001": 4, "10002": 3, "10003": 2})
+    commits = []
+
+    @sa.event.listens_for(engine, "commit")
+    def _fail_second_commit(conn):
+        commits.append(conn)
+        if len(commits) == 2:
+            raise sa.exc.OperationalError("COMMIT", {}, Exception("lost"))
+
+    with pytest.raises(sa.exc.OperationalError):
+        load_df_to_sql_parallel("example_bom_staging", bom_df, engine, 3)
+
+    # the commits are not atomic together, see load_df_to_sql_in_batches
+    assert sorted(len(frame) for frame in committed_rows(db_paths)) == [
+        0,
+        0,
+        4,
+    ]
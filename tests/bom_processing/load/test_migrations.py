@@ -0,0 +1,23 @@
+import pandas as pd
+import sqlalchemy as sa
+
+from bom_processing.load import migrations
+
+
+def test_migrations_are_applied_once(sqlite_db, monkeypatch):
+    assert migrations.apply_migrations() == migrations.MIGRATIONS
+    assert migrations.apply_migrations() == []
+
+    # a migration added later is applied on the next run
+    monkeypatch.setattr(
+        migrations,
+        "MIGRATIONS",
+        [*migrations.MIGRATIONS, "create_schema_migrations.sql"],
+    )
+    assert migrations.apply_migrations() == ["create_schema_migrations.sql"]
+
+    with sqlite_db.connect() as conn:
+        recorded = pd.read_sql(
+            sa.text("SELECT * FROM bom_schema.schema_migrations"), conn
+        )
+    assert recorded["script"].tolist() == migrations.MIGRATIONS
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from bom_processing.load import history_retention, load_to_sql, migrations
+
+
+def read_table(engine: sa.engine.Engine, table: str) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql(sa.text(f"SELECT * FROM bom_schema.{table}"), conn)
+
+
+def test_upload_runs_the_load_scripts_end_to_end(
+    sqlite_db, make_staged_bom, upload
+):
+    upload(make_staged_bom(["10001", "10002"], "2026-01-05T10:00:00+00:00"))
+    upload(make_staged_bom(["10001"], "2026-01-06T10:00:00+00:00"))
+
+    history = read_table(sqlite_db, "example_bom_final_history")
+    current = read_table(sqlite_db, "example_bom_final_current")
+    rollup = read_table(sqlite_db, "example_bom_material_rollup")
+    latest = history[
+        history["snapshot_time_utc"] == "2026-01-06T10:00:00+00:00"
+    ]
+
+    assert len(history) == 9
+    # each upload deletes its rows from staging once done
+    assert read_table(sqlite_db, "example_bom_staging").empty
+    assert current.groupby("pon")["snapshot_time_utc"].unique().map(
+        list
+    ).to_dict() == {
+        "10001": ["2026-01-06T10:00:00+00:00"],
+        "10002": ["2026-01-05T10:00:00+00:00"],
+    }
+    # smallest item at least as tall and wide as the piece
+    assert latest.set_index("part_tag")["item_id"].to_dict() == {
+        1: "SMALL",
+        2: "LARGE",
+        3: None,
+    }
+    assert latest["is_item_unmatched"].tolist() == [0, 0, 1]
+    assert rollup["total_quantity"].sum() == 12
+
+
+def test_migration_fills_rollup_of_pons_uploaded_before_it(
+    sqlite_db, make_staged_bom, upload
+):
+    upload(make_staged_bom(["10001", "10002"], "2026-01-05T10:00:00+00:00"))
+    upload(make_staged_bom(["10001"], "2026-01-06T10:00:00+00:00"))
+    expected = read_table(sqlite_db, "example_bom_material_rollup")
+    # uploaded before the rollup table existed
+    with sqlite_db.begin() as conn:
+        conn.execute(
+            sa.text("DELETE FROM bom_schema.example_bom_material_rollup")
+        )
+
+    migrations.apply_migrations()
+
+    rollup = read_table(sqlite_db, "example_bom_material_rollup")
+    columns = list(expected.columns)
+    pd.testing.assert_frame_equal(
+        rollup.sort_values(columns, ignore_index=True),
+        expected.sort_values(columns, ignore_index=True),
+    )
+    assert sorted(rollup["pon"].unique()) == ["10001", "10002"]
+
+
+def test_upload_records_revision_changes(sqlite_db, make_staged_bom, upload):
+    upload(make_staged_bom(["10001"], "2026-01-05T10:00:00+00:00"))
+    revision = make_staged_bom(["10001"], "2026-01-06T10:00:00+00:00")
+    revision.loc[revision["part_tag"] == 2, "quantity"] = 5
+    revision = revision[revision["part_tag"] != 3]
+    upload(revision)
+    upload(revision.assign(snapshot_time_utc="2026-01-07T10:00:00+00:00"))
+
+    changes = read_table(sqlite_db, "example_bom_revision_changes")
+    revision_changes = changes[
+        changes["snapshot_time_utc"] == "2026-01-06T10:00:00+00:00"
+    ]
+
+    # the first upload adds every part, the identical one changes nothing
+    assert len(changes) == 5
+    assert revision_changes.set_index("part_tag")["change_type"].to_dict() == {
+        2: "changed",
+        3: "removed",
+    }
+    assert revision_changes[
+        "previous_snapshot_time_utc"
+    ].unique().tolist() == ["2026-01-05T10:00:00+00:00"]
+
+
+def test_history_compaction_keeps_last_snapshot_per_week(
+    sqlite_db, make_staged_bom, upload
+):
+    now = datetime.now(timezone.utc)
+    old_week = now - timedelta(days=200)
+    monday = old_week - timedelta(days=old_week.weekday())
+    snapshots = [
+        monday,
+        monday + timedelta(days=1),
+        monday + timedelta(days=2),
+        now - timedelta(days=2),
+        now - timedelta(days=1),
+    ]
+    for snapshot in snapshots:
+        upload(
+            make_staged_bom(["10001"], snapshot.isoformat(timespec="seconds"))
+        )
+
+    report = history_retention.compact_history_table(
+        retention_days=90, batch_size=2, pause_seconds=0
+    )
+
+    history = read_table(sqlite_db, "example_bom_final_history")
+    assert report["rows_reclaimed"] == 6
+    assert sorted(history["snapshot_time_utc"].unique()) == [
+        snapshot.isoformat(timespec="seconds") for snapshot in snapshots[2:]
+    ]
+
+
+def test_history_compaction_weeks_run_monday_to_sunday(
+    sqlite_db, make_staged_bom, upload
+):
+    old_week = datetime.now(timezone.utc) - timedelta(days=200)
+    monday = old_week - timedelta(days=old_week.weekday())
+    saturday = monday - timedelta(days=2)
+    sunday = monday - timedelta(days=1)
+    for snapshot in [saturday, sunday, monday]:
+        upload(
+            make_staged_bom(["10001"], snapshot.isoformat(timespec="seconds"))
+        )
+
+    history_retention.compact_history_table(
+        retention_days=90, batch_size=10, pause_seconds=0
+    )
+
+    # Sunday ends Saturday's week, Monday starts the next one
+    history = read_table(sqlite_db, "example_bom_final_history")
+    assert sorted(history["snapshot_time_utc"].unique()) == [
+        snapshot.isoformat(timespec="seconds") for snapshot in [sunday, monday]
+    ]
+
+
+def test_staging_lock_times_out_while_held(sqlite_db):
+    with load_to_sql.staging_load_lock():
+        with pytest.raises(TimeoutError):
+            with load_to_sql.staging_load_lock(timeout_seconds=0):
+                pass
+
+    with load_to_sql.staging_load_lock(timeout_seconds=0):
+        pass
+
+
+def test_failed_parallel_commit_leaves_none_of_the_batch(
+    sqlite_db, make_staged_bom, monkeypatch
+):
+    earlier_df = make_staged_bom(["10001"], "2026-01-05T10:00:00+00:00")
+    load_to_sql.load_df_to_sql_in_batches("example_bom_staging", earlier_df)
+    bom_df = make_staged_bom(["10001", "10002"], "2026-01-06T10:00:00+00:00")
+
+    def commit_first_partition(table_name, batch_df, engine, parallelism):
+        partitions = load_to_sql.partition_df(batch_df, parallelism)
+        with engine.connect() as conn:
+            load_to_sql.load_df_to_sql(table_name, partitions[0], conn)
+            conn.commit()
+        raise sa.exc.OperationalError("COMMIT", {}, Exception("lost"))
+
+    # SQLite loads serially, stand in for a server whose second commit fails
+    monkeypatch.setattr(
+        load_to_sql, "_supported_parallelism", lambda parallelism: parallelism
+    )
+    monkeypatch.setattr(
+        load_to_sql, "load_df_to_sql_parallel", commit_first_partition
+    )
+    committed = []
+    with pytest.raises(sa.exc.OperationalError):
+        load_to_sql.load_df_to_sql_in_batches(
+            "example_bom_staging",
+            bom_df,
+            on_batch_committed=committed.append,
+            parallelism=2,
+        )
+
+    staging = read_table(sqlite_db, "example_bom_staging")
+    assert committed == []
+    # only the rows of the earlier run are left
+    assert staging["snapshot_time_utc"].unique().tolist() == [
+        "2026-01-05T10:00:00+00:00"
+    ]
+    assert len(staging) == len(earlier_df)
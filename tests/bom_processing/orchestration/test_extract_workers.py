@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from bom_processing.extract.sidecar import (
+    file_checksum,
+    get_sidecar_path,
+    write_sidecar,
+)
+from bom_processing.orchestration.extract_workers import (
+    TIMED_OUT,
+    extract_in_process,
+    extract_in_workers,
+)
+from bom_processing.orchestration.process_boms import process_boms
+
+
+def make_records(directory: Path, count: int, make_cleaned_bom) -> list[dict]:
+    """
+    Uploads with sidecars, the last one a workbook that cannot be parsed
+    """
+    records = []
+    for number in range(count):
+        bom_path = directory / f"10000_{number}_staging_user.xlsx"
+        bom_path.write_bytes(f"workbook {number}".encode())
+        record = {"pon": "10000", "username": "user", "path": bom_path}
+        if number < count - 1:
+            record["sidecar"] = get_sidecar_path(bom_path)
+            write_sidecar(
+                {"df": make_cleaned_bom(20, number), "category": "primary_a"},
+                record["sidecar"],
+                file_checksum(bom_path),
+            )
+        records.append(record)
+    return records
+
+
+def test_workers_match_in_process_extraction(make_cleaned_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = make_records(Path(temp_dir), 5, make_cleaned_bom)
+
+        expected = list(extract_in_process(records, read_ahead=0))
+        result = list(extract_in_workers(records, 60, workers=2))
+
+        assert [record for record, _ in result] == records
+        for (_, outcome), (_, expected_outcome) in zip(result, expected):
+            assert outcome["reason"] is None
+            assert type(outcome["error"]) is type(expected_outcome["error"])
+            if expected_outcome["bom"] is None:
+                assert outcome["bom"] is None
+                continue
+            pd.testing.assert_frame_equal(
+                outcome["bom"]["df"], expected_outcome["bom"]["df"]
+            )
+        assert expected[-1][1]["error"] is not None
+
+
+def test_workers_extract_files_read_ahead(make_cleaned_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = make_records(Path(temp_dir), 4, make_cleaned_bom)[:-1]
+
+        extracted = extract_in_workers(records, 60, read_ahead=3, workers=1)
+        next(extracted)
+        # the workbooks were read while the worker started
+        for record in records:
+            record["path"].unlink()
+        result = list(extracted)
+
+        assert [outcome["bom"] is not None for _, outcome in result] == [
+            True,
+            True,
+        ]
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32", reason="needs a named pipe to hang a read"
+)
+def test_hung_read_times_out_and_batch_continues(make_cleaned_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = make_records(Path(temp_dir), 4, make_cleaned_bom)[:-1]
+        # opening a pipe nobody writes to blocks, like a stalled share read
+        hung_path = Path(temp_dir) / "10001_0_staging_user.xlsx"
+        os.mkfifo(hung_path)
+        records.insert(
+            1, {"pon": "10001", "username": "user", "path": hung_path}
+        )
+
+        failures = []
+        started = time.monotonic()
+        primary_df, _ = process_boms(
+            records,
+            "upload",
+            extract_timeout=3,
+            on_failure=lambda record, reason: failures.append(
+                (record["path"].name, reason)
+            ),
+        )
+
+        assert time.monotonic() - started < 60
+        assert failures == [(hung_path.name, TIMED_OUT)]
+        assert list(primary_df["bom_filename"].unique()) == [
+            record["path"].name for record in records if "sidecar" in record
+        ]
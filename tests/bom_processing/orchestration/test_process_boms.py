@@ -0,0 +1,103 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from bom_processing.extract.sidecar import (
+    file_checksum,
+    get_sidecar_path,
+    write_sidecar,
+)
+from bom_processing.orchestration import process_boms as process_boms_module
+from bom_processing.orchestration.process_boms import process_boms
+from bom_processing.orchestration.run_journal import RunJournal
+
+
+def write_staged_boms(
+    folder: Path, categories: list[str], make_cleaned_bom
+) -> list[dict]:
+    records = []
+    for number, category in enumerate(categories):
+        pon = str(10000 + number % 2)
+        bom_path = folder / f"{pon}_{number}_staging_user.xlsx"
+        bom_path.write_bytes(f"workbook {number}".encode())
+        sidecar_path = get_sidecar_path(bom_path)
+        write_sidecar(
+            {"df": make_cleaned_bom(40, number), "category": category},
+            sidecar_path,
+            file_checksum(bom_path),
+        )
+        records.append(
+            {
+                "pon": pon,
+                "username": "user",
+                "path": bom_path,
+                "sidecar": sidecar_path,
+            }
+        )
+    return records
+
+
+def test_batched_transform_matches_file_by_file(make_cleaned_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = write_staged_boms(
+            Path(temp_dir),
+            ["primary_a", "primary_b", "primary_a", "primary_b"],
+            make_cleaned_bom,
+        )
+
+        file_by_file, _ = process_boms(records, "upload", batched=False)
+        batched, _ = process_boms(records, "upload", batched=True)
+
+        pd.testing.assert_frame_equal(
+            batched.drop(columns="snapshot_time_utc"),
+            file_by_file.drop(columns="snapshot_time_utc"),
+        )
+        assert batched["bom_filename"].unique().tolist() == [
+            record["path"].name for record in records
+        ]
+
+
+def test_batched_run_resumes_files_read_before_a_crash(
+    tmp_path, monkeypatch, make_cleaned_bom
+):
+    records = write_staged_boms(
+        tmp_path,
+        ["primary_a", "primary_b", "primary_a", "primary_b"],
+        make_cleaned_bom,
+    )
+    extract_in_process = process_boms_module.extract_in_process
+    extracted_paths = []
+    crashed = []
+
+    def crash_after_two_files(pending_records, read_ahead):
+        for count, extracted in enumerate(
+            extract_in_process(pending_records, read_ahead)
+        ):
+            if count == 2 and not crashed:
+                crashed.append(count)
+                raise ConnectionError("network share went away")
+            extracted_paths.append(extracted[0]["path"])
+            yield extracted
+
+    monkeypatch.setattr(
+        process_boms_module, "extract_in_process", crash_after_two_files
+    )
+    journal = RunJournal.start("test_etl", tmp_path / "runs")
+    with pytest.raises(ConnectionError):
+        process_boms(records, "full", journal=journal, extract_timeout=0)
+
+    assert extracted_paths == [record["path"] for record in records[:2]]
+    extracted_paths.clear()
+    resumed = RunJournal.latest_incomplete("test_etl", tmp_path / "runs")
+    resumed_df, _ = process_boms(
+        records, "full", journal=resumed, extract_timeout=0
+    )
+    # only the files not read before the crash are read again
+    assert extracted_paths == [record["path"] for record in records[2:]]
+    uninterrupted_df, _ = process_boms(records, "full", extract_timeout=0)
+    pd.testing.assert_frame_equal(
+        resumed_df.drop(columns="snapshot_time_utc"),
+        uninterrupted_df.drop(columns="snapshot_time_utc"),
+    )
@@ -0,0 +1,41 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from bom_processing.orchestration.run_journal import RunJournal
+
+
+def test_run_journal_resumes_extracted_and_committed_files():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal_dir = Path(temp_dir)
+        bom_path = Path("12345 - Project - Outputs") / "12345_list.xls"
+        bom_df = pd.DataFrame(
+            {"pon": ["12345"], "bom_filename": ["12345_list.xls"]}
+        )
+
+        journal = RunJournal.start("test_etl", journal_dir)
+        journal.record_extracted(bom_path, bom_df, "primary_a")
+        journal.record_committed(bom_df)
+
+        resumed = RunJournal.latest_incomplete("test_etl", journal_dir)
+
+        assert resumed is not None
+        assert resumed.run_id == journal.run_id
+        assert resumed.snapshot_time == journal.snapshot_time
+        assert resumed.committed_files() == {("12345", "12345_list.xls")}
+        extracted = resumed.extracted_bom(bom_path)
+        assert extracted["category"] == "primary_a"
+        pd.testing.assert_frame_equal(extracted["df"], bom_df)
+        assert resumed.extracted_bom(bom_path.with_name("other.xls")) is None
+
+
+def test_completed_run_is_not_resumed():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal_dir = Path(temp_dir)
+
+        journal = RunJournal.start("test_etl", journal_dir)
+        journal.mark_complete()
+
+        assert RunJournal.latest_incomplete("test_etl", journal_dir) is None
+        assert RunJournal.latest_incomplete("other_etl", journal_dir) is None
@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from bom_processing.orchestration.run_ledger import (
+    RunRecorder,
+    compare_latest_run,
+)
+
+
+def _record_run(ledger_path, run_id, files, wall_seconds, stages):
+    with RunRecorder("test_etl", run_id, ledger_path) as recorder:
+        recorder.add(files_processed=files, rows_processed=files * 100)
+        recorder.stage_seconds.update(stages)
+
+    # pin the wall time so throughput does not depend on the test machine
+    with sqlite3.connect(ledger_path) as conn:
+        conn.execute(
+            "UPDATE run_ledger SET wall_seconds = ? WHERE run_id = ?",
+            (wall_seconds, run_id),
+        )
+
+
+def test_recorder_writes_failed_runs():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ledger_path = Path(temp_dir) / "ledger" / "run_ledger.sqlite3"
+
+        with pytest.raises(RuntimeError):
+            with RunRecorder("test_etl", "run_1", ledger_path) as recorder:
+                with recorder.stage("extract"):
+                    recorder.add(files_processed=3, bytes_read=1024)
+                    raise RuntimeError("extract failed")
+
+        with sqlite3.connect(ledger_path) as conn:
+            status, stages, files, bytes_read = conn.execute(
+                "SELECT status, stage_seconds, files_processed, bytes_read "
+                "FROM run_ledger"
+            ).fetchone()
+
+        assert status == "failed"
+        assert "extract" in json.loads(stages)
+        assert (files, bytes_read) == (3, 1024)
+
+
+def test_compare_latest_run_flags_throughput_and_stage_regressions():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ledger_path = Path(temp_dir) / "run_ledger.sqlite3"
+
+        for i in range(5):
+            _record_run(ledger_path, f"run_{i}", 100, 10.0, {"process": 8.0})
+
+        report = compare_latest_run("test_etl", 10, 0.2, ledger_path)
+        assert report["baseline_runs"] == 4
+        assert report["regressions"] == []
+
+        _record_run(ledger_path, "slow_run", 100, 20.0, {"process": 18.0})
+
+        report = compare_latest_run("test_etl", 10, 0.2, ledger_path)
+        assert report["run_id"] == "slow_run"
+        assert report["baseline_files_per_second"] == pytest.approx(10.0)
+        assert len(report["regressions"]) == 2
+
+
+def test_compare_latest_run_needs_a_baseline():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ledger_path = Path(temp_dir) / "run_ledger.sqlite3"
+
+        assert compare_latest_run("test_etl", 10, 0.2, ledger_path) is None
+
+        _record_run(ledger_path, "run_0", 100, 10.0, {})
+        assert compare_latest_run("test_etl", 10, 0.2, ledger_path) is None
+
+
+def test_empty_runs_are_left_out_of_the_comparison():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ledger_path = Path(temp_dir) / "run_ledger.sqlite3"
+
+        for i in range(3):
+            _record_run(ledger_path, f"run_{i}", 100, 10.0, {})
+            # a scheduled run with nothing to claim in between
+            _record_run(ledger_path, f"empty_{i}", 0, 0.5, {})
+
+        with sqlite3.connect(ledger_path) as conn:
+            statuses = dict(
+                conn.execute("SELECT run_id, status FROM run_ledger")
+            )
+        report = compare_latest_run("test_etl", 10, 0.2, ledger_path)
+
+        assert statuses["empty_0"] == "empty"
+        assert statuses["run_0"] == "success"
+        assert report["run_id"] == "run_2"
+        assert report["baseline_runs"] == 2
+        assert report["baseline_files_per_second"] == pytest.approx(10.0)
+        assert report["regressions"] == []
@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from bom_processing.orchestration.sharded_run import ShardedRun, parse_shard
+
+
+SHARD_COUNT = 4
+
+
+def _run_shard(state_dir: str, shard: int) -> str:
+    run = ShardedRun("test_run", SHARD_COUNT, Path(state_dir))
+    journal = run.shard_journal("test_etl", shard)
+    run.mark_shard_done(shard, {"rows_loaded": shard})
+    journal.mark_complete()
+    return journal.snapshot_time
+
+
+def test_shards_in_separate_processes_share_a_snapshot_time():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        run = ShardedRun("test_run", SHARD_COUNT, Path(temp_dir))
+        assert run.pending_shards() == [1, 2, 3, 4]
+
+        with ProcessPoolExecutor(
+            max_workers=SHARD_COUNT,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            snapshot_times = list(
+                executor.map(
+                    _run_shard,
+                    [temp_dir] * SHARD_COUNT,
+                    range(1, SHARD_COUNT + 1),
+                )
+            )
+
+        summaries = run.wait_for_shards(timeout_seconds=0)
+
+        assert len(set(snapshot_times)) == 1
+        assert snapshot_times[0] == run.snapshot_time()
+        assert summaries == {
+            shard: {"rows_loaded": shard}
+            for shard in range(1, SHARD_COUNT + 1)
+        }
+
+
+def test_wait_for_shards_times_out_on_pending_shards():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        run = ShardedRun("test_run", 2, Path(temp_dir))
+        run.mark_shard_done(1, {})
+
+        with pytest.raises(TimeoutError, match=r"\[2\]"):
+            run.wait_for_shards(timeout_seconds=0)
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for value in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(value)
@@ -0,0 +1,199 @@
+"""
+Frozen reference implementation of the BOM clean, transform and process
+stages, written the plain row by row way, for test_equivalence.py to check
+the optimized paths against
+
+Do not optimize or refactor this module. Only change it together with an
+intended change in the behavior of the pipeline.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bom_processing.constants import (
+    COLUMN_RENAME_MAPS,
+    EXPECTED_DTYPES_CLEANING,
+    NULLABLE_COLUMNS,
+    NUMERIC_AS_STRING_COLUMNS,
+    REQUIRED_COLUMNS_AFTER_RENAME,
+    REQUIRED_SQL_COLUMNS,
+)
+
+
+class ReferenceValidationError(Exception):
+    pass
+
+
+def _is_summary_row(row: pd.Series) -> bool:
+    return all(
+        pd.isna(row[col]) for col in ["part_tag", "height", "width", "length"]
+    )
+
+
+def clean_bom(bom_df: pd.DataFrame, category: str) -> pd.DataFrame:
+    bom_df = bom_df.rename(columns=COLUMN_RENAME_MAPS[category])
+
+    missing = REQUIRED_COLUMNS_AFTER_RENAME["primary"] - set(bom_df.columns)
+    if missing:
+        raise ReferenceValidationError(f"Missing columns: {missing}")
+
+    bom_df = bom_df[~bom_df.apply(_is_summary_row, axis=1)]
+
+    for col, nullable in NULLABLE_COLUMNS["primary"].items():
+        if not nullable and bom_df[col].isnull().any():
+            raise ReferenceValidationError(f"Missing values: {col}")
+
+    for col, dtype in EXPECTED_DTYPES_CLEANING["primary"].items():
+        try:
+            if col in NUMERIC_AS_STRING_COLUMNS["primary"]:
+                bom_df[col] = pd.to_numeric(bom_df[col]).astype("Int64")
+            elif dtype == "string":
+                bom_df[col] = bom_df[col].astype("string")
+            elif dtype == "int":
+                bom_df[col] = (
+                    pd.to_numeric(bom_df[col]).apply(np.ceil).astype("int")
+                )
+            else:
+                bom_df[col] = bom_df[col].astype(dtype)
+        except Exception as e:
+            raise ReferenceValidationError(f"Invalid values: {col}") from e
+
+    return bom_df
+
+
+def _aggregate(bom_df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    sum_columns = ["quantity", "usage_quantity", "finish_quantity"]
+    other_columns = [col for col in bom_df.columns if col not in sum_columns]
+
+    sums = bom_df.groupby(keys, as_index=False)[sum_columns].sum()
+    firsts = bom_df.groupby(keys, as_index=False)[other_columns].first()
+
+    return pd.merge(sums, firsts, on=keys, how="left")
+
+
+def _contains(series: pd.Series, pattern: str) -> pd.Series:
+    return series.str.contains(pattern, case=False, na=False)
+
+
+def transform_bom(bom_df: pd.DataFrame, category: str) -> pd.DataFrame:
+    if category not in ("primary_a", "primary_b"):
+        return pd.DataFrame()
+
+    bom_df = bom_df[
+        [
+            "part_tag",
+            "quantity",
+            "material_type",
+            "material_subtype",
+            "designation",
+            "height",
+            "width",
+            "length",
+            "usage_quantity",
+            "finish_quantity",
+            "element",
+            "additional_info",
+        ]
+    ]
+    bom_df = bom_df.round({"width": 0, "height": 0, "length": 0})
+    bom_df[["width", "height", "length"]] = bom_df[
+        ["width", "height", "length"]
+    ].astype(int)
+
+    if category == "primary_a":
+        bom_df["usage_quantity"] = round(
+            (bom_df["quantity"] * bom_df["length"]) / 1000, 1
+        )
+        bom_df[["height", "width"]] = bom_df[["height", "width"]].apply(
+            lambda row: sorted(row), axis=1, result_type="expand"
+        )
+
+        bom_df.loc[
+            _contains(bom_df["material_type"], "type-A-X")
+            | _contains(bom_df["material_subtype"], "type-A-X"),
+            ["material_type", "material_subtype"],
+        ] = ["TYPE-A", "TYPE-A-X"]
+        bom_df.loc[
+            _contains(bom_df["material_type"], "type-a")
+            & ~_contains(bom_df["material_subtype"], "type-A-X"),
+            ["material_type", "material_subtype"],
+        ] = ["TYPE-A", "TYPE-A-S"]
+        bom_df.loc[
+            _contains(bom_df["material_type"], "type-b"),
+            ["material_type", "material_subtype"],
+        ] = ["TYPE-B", "TYPE-B-S"]
+        bom_df.loc[
+            _contains(bom_df["material_type"], r"^\d+x\d+$"),
+            "material_type",
+        ] = "TYPE-C"
+    else:
+        bom_df["finish_quantity"] = bom_df["finish_quantity"] * 2
+        bom_df.loc[
+            _contains(bom_df["material_type"], "composite-a"),
+            ["material_type", "material_subtype"],
+        ] = ["COMPOSITE-A", "COMPOSITE-A-S"]
+        bom_df.loc[
+            _contains(bom_df["material_type"], "composite-b"),
+            ["material_type", "material_subtype"],
+        ] = ["COMPOSITE-B", "COMPOSITE-B-S"]
+        bom_df.loc[
+            _contains(bom_df["material_type"], "plain"), "material_type"
+        ] = "PLAIN"
+        bom_df.loc[
+            _contains(bom_df["designation"], "insert"), "designation"
+        ] = "INSERT"
+
+    return _aggregate(
+        bom_df,
+        [
+            "part_tag",
+            "material_type",
+            "material_subtype",
+            "height",
+            "width",
+            "length",
+        ],
+    )
+
+
+def extract_bom(bom_path: Path) -> dict:
+    bom_df = pd.read_excel(bom_path)
+    if "H [mm]" in bom_df.columns:
+        category = "primary_a"
+    elif "T [mm]" in bom_df.columns:
+        category = "primary_b"
+    else:
+        raise ReferenceValidationError(f"Unknown category: {bom_path.name}")
+
+    return {"df": clean_bom(bom_df, category), "category": category}
+
+
+def process_boms(bom_records: list[dict], load_method: str) -> pd.DataFrame:
+    """
+    Primary output of process_boms, without the snapshot time
+    """
+    primary_boms = []
+    for record in bom_records:
+        try:
+            bom_dict = extract_bom(record["path"])
+        except Exception:
+            continue
+
+        bom_df = transform_bom(bom_dict["df"], bom_dict["category"])
+        bom_df["pon"] = str(record["pon"])
+        bom_df["material_category"] = bom_dict["category"]
+        bom_df["load_method"] = load_method
+        bom_df["bom_filename"] = record["path"].name
+        bom_df["uploaded_by"] = record["username"]
+        primary_boms.append(bom_df)
+
+    columns = [
+        col
+        for col in REQUIRED_SQL_COLUMNS["primary"]
+        if col != "snapshot_time_utc"
+    ]
+    if not primary_boms:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(primary_boms).reset_index(drop=True)[columns]
@@ -0,0 +1,170 @@
+"""
+Checks every fast path of the clean, transform, extract and process stages
+against the frozen implementation in reference.py, on generated BOMs
+
+To cover a new fast path, add it to the variants of its stage. Results must
+match the reference in values, dtypes, row order and index.
+"""
+
+import importlib.util
+from pathlib import Path
+import tempfile
+
+import pandas as pd
+import pytest
+
+import reference
+from bom_processing.constants import EXPECTED_DTYPES_CLEANING
+from bom_processing.extract import read_boms_from_excel
+from bom_processing.extract.sidecar import (
+    file_checksum,
+    get_sidecar_path,
+    read_sidecar,
+    write_sidecar,
+)
+from bom_processing.orchestration.process_boms import process_boms
+from bom_processing.transform.transformations import transform_bom
+
+
+HAS_POLARS = importlib.util.find_spec("polars") is not None
+
+CATEGORIES = ["primary_a", "primary_b"]
+SEEDS = range(20)
+
+
+def _clean_polars(raw_df: pd.DataFrame, category: str) -> pd.DataFrame:
+    from bom_processing import polars_engine
+
+    return getattr(polars_engine, f"clean_{category}_bom")(raw_df)
+
+
+def _transform_as_batch(bom_df: pd.DataFrame, category: str) -> pd.DataFrame:
+    bom_df = bom_df.assign(_file_order=0)
+    return transform_bom(bom_df, category, ["_file_order"]).drop(
+        columns="_file_order"
+    )
+
+
+CLEAN_VARIANTS = {
+    "pandas": lambda raw_df, category: getattr(
+        read_boms_from_excel, f"clean_{category}_bom"
+    )(raw_df),
+}
+TRANSFORM_VARIANTS = {
+    "pandas": lambda bom_df, category: transform_bom(
+        bom_df, category, engine="pandas"
+    ),
+    "batched": _transform_as_batch,
+}
+if HAS_POLARS:
+    CLEAN_VARIANTS["polars"] = _clean_polars
+    TRANSFORM_VARIANTS["polars"] = lambda bom_df, category: transform_bom(
+        bom_df, category, engine="polars"
+    )
+
+
+def assert_equivalent(result: pd.DataFrame, expected: pd.DataFrame, variant):
+    if variant == "polars":
+        # sums may be added in a different order
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-9)
+    else:
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+@pytest.mark.parametrize("variant", CLEAN_VARIANTS)
+@pytest.mark.parametrize("category", CATEGORIES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_clean_matches_reference(seed, category, variant, make_raw_bom):
+    raw_df = make_raw_bom(category, seed)
+
+    expected = reference.clean_bom(raw_df.copy(), category)
+    result = CLEAN_VARIANTS[variant](raw_df.copy(), category)
+
+    if variant == "polars":
+        # the polars engine only keeps the columns used downstream
+        expected = expected[list(EXPECTED_DTYPES_CLEANING["primary"])]
+        expected = expected.reset_index(drop=True)
+    assert_equivalent(result, expected, variant)
+
+
+@pytest.mark.parametrize("variant", CLEAN_VARIANTS)
+@pytest.mark.parametrize("seed", range(6))
+def test_clean_rejects_what_reference_rejects(seed, variant, make_raw_bom):
+    category = CATEGORIES[seed % 2]
+    raw_df = make_raw_bom(category, seed, invalid=True)
+
+    with pytest.raises(reference.ReferenceValidationError):
+        reference.clean_bom(raw_df.copy(), category)
+    with pytest.raises((ValueError, read_boms_from_excel.ValidationError)):
+        CLEAN_VARIANTS[variant](raw_df, category)
+
+
+@pytest.mark.parametrize("variant", TRANSFORM_VARIANTS)
+@pytest.mark.parametrize("category", CATEGORIES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_transform_matches_reference(seed, category, variant, make_raw_bom):
+    cleaned_df = reference.clean_bom(make_raw_bom(category, seed), category)
+
+    expected = reference.transform_bom(cleaned_df.copy(), category)
+    result = TRANSFORM_VARIANTS[variant](cleaned_df.copy(), category)
+
+    assert_equivalent(result, expected, variant)
+
+
+def _write_workbooks(directory: Path, count: int, make_raw_bom) -> list[dict]:
+    """
+    BOM workbooks and their records, every fourth one invalid
+    """
+    records = []
+    for number in range(count):
+        category = CATEGORIES[number % 2]
+        raw_df = make_raw_bom(category, 100 + number, invalid=number % 4 == 3)
+        pon = str(10000 + number % 3)
+        bom_path = directory / f"{pon}_{number}_{category}.xlsx"
+        raw_df.to_excel(bom_path, index=False)
+        records.append({"pon": pon, "username": "user", "path": bom_path})
+    return records
+
+
+def test_extract_and_sidecar_match_reference(make_raw_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = _write_workbooks(Path(temp_dir), 3, make_raw_bom)
+
+        for record in records:
+            bom_path = record["path"]
+            expected = reference.extract_bom(bom_path)
+            extracted = read_boms_from_excel.extract_bom_data(
+                bom_path, engine="pandas"
+            )
+            write_sidecar(
+                extracted, get_sidecar_path(bom_path), file_checksum(bom_path)
+            )
+            from_sidecar = read_sidecar(bom_path)
+
+            for result in (extracted, from_sidecar):
+                assert result["category"] == expected["category"]
+                assert_equivalent(result["df"], expected["df"], "pandas")
+
+
+# in process with and without read-ahead, and in worker processes
+EXTRACT_VARIANTS = {
+    "in_process": {"extract_timeout": 0, "read_ahead": 0},
+    "read_ahead": {"extract_timeout": 0, "read_ahead": 3},
+    "workers": {"extract_timeout": 60},
+}
+
+
+@pytest.mark.parametrize("extract", EXTRACT_VARIANTS)
+@pytest.mark.parametrize("batched", [False, True])
+def test_process_boms_matches_reference(batched, extract, make_raw_bom):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        records = _write_workbooks(Path(temp_dir), 8, make_raw_bom)
+
+        expected = reference.process_boms(records, "upload")
+        result, _ = process_boms(
+            records, "upload", batched=batched, **EXTRACT_VARIANTS[extract]
+        )
+
+        assert_equivalent(
+            result.drop(columns="snapshot_time_utc"), expected, "pandas"
+        )
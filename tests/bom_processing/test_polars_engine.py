@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom_processing.constants import EXPECTED_DTYPES_CLEANING
+from bom_processing.extract import read_boms_from_excel
+from bom_processing.transform.transformations import transform_bom
+from bom_processing.validation.validation_report import BOMValidationError
+
+polars_engine = pytest.importorskip("bom_processing.polars_engine")
+
+CATEGORIES = ["primary_a", "primary_b"]
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_clean_matches_pandas(category, make_raw_bom):
+    raw_df = make_raw_bom(category, seed=1, rows=500)
+    cleaner = f"clean_{category}_bom"
+
+    expected = getattr(read_boms_from_excel, cleaner)(raw_df.copy())
+    result = getattr(polars_engine, cleaner)(raw_df)
+
+    expected = expected[list(EXPECTED_DTYPES_CLEANING["primary"])]
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+
+
+def test_clean_reports_the_same_issues_as_pandas(make_raw_bom):
+    raw_df = make_raw_bom("primary_a", seed=2, rows=50)
+    row = raw_df["part#"].notna().idxmax()
+    raw_df.loc[row, "Quantity"] = np.nan
+    raw_df["L [mm]"] = raw_df["L [mm]"].astype(object)
+    raw_df.loc[row + 1, "L [mm]"] = "long"
+
+    with pytest.raises(BOMValidationError) as expected:
+        read_boms_from_excel.clean_primary_a_bom(raw_df.copy())
+    with pytest.raises(BOMValidationError) as result:
+        polars_engine.clean_primary_a_bom(raw_df)
+
+    assert result.value.issues == expected.value.issues
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_transform_matches_pandas(category, make_raw_bom):
+    cleaner = getattr(read_boms_from_excel, f"clean_{category}_bom")
+    boms = [
+        cleaner(make_raw_bom(category, seed, rows=300)) for seed in range(3)
+    ]
+    for file_number, bom_df in enumerate(boms):
+        bom_df.insert(0, "_file_order", file_number)
+    batch_df = pd.concat(boms, ignore_index=True)
+
+    expected = transform_bom(
+        batch_df.copy(), category, ["_file_order"], engine="pandas"
+    )
+    result = transform_bom(
+        batch_df, category, ["_file_order"], engine="polars"
+    )
+
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-9)
@@ -0,0 +1,138 @@
+import pandas as pd
+
+from bom_processing.transform.revision_diff import diff_bom_snapshots
+
+
+def make_snapshot(parts: list[tuple], snapshot_time: str) -> pd.DataFrame:
+    """
+    parts: (pon, part_tag, height, material_type, quantity)
+    """
+    return pd.DataFrame(
+        [
+            {
+                "pon": pon,
+                "material_category": "primary_a",
+                "part_tag": part_tag,
+                "height": height,
+                "width": 90,
+                "length": 2400,
+                "material_type": material_type,
+                "material_subtype": None,
+                "quantity": quantity,
+                "usage_quantity": quantity * 2.4,
+                "finish_quantity": 0.0,
+                "snapshot_time_utc": snapshot_time,
+            }
+            for pon, part_tag, height, material_type, quantity in parts
+        ]
+    )
+
+
+def test_diff_finds_added_removed_and_changed_parts():
+    previous_df = make_snapshot(
+        [
+            ("10001", 1, 38, "TYPE-A", 2.0),
+            ("10001", 2, 38, "TYPE-A", 2.0),
+            ("10001", 3, 38, "TYPE-A", 2.0),
+            ("10001", 4, 38, "TYPE-A", 2.0),
+            ("10002", 1, 38, "TYPE-A", 2.0),
+        ],
+        "2026-01-05T10:00:00+00:00",
+    )
+    current_df = make_snapshot(
+        [
+            ("10001", 1, 38, "TYPE-A", 2.0),
+            ("10001", 2, 38, "TYPE-A", 3.0),
+            ("10001", 3, 38, "TYPE-B", 2.0),
+            # a new height is a different part
+            ("10001", 4, 50, "TYPE-A", 2.0),
+            ("10003", 1, 38, "TYPE-A", 1.0),
+        ],
+        "2026-01-06T10:00:00+00:00",
+    )
+    current_df["part_tag"] = current_df["part_tag"].astype("Int64")
+
+    changes_df = diff_bom_snapshots(previous_df, current_df)
+
+    assert changes_df[["pon", "part_tag", "height", "change_type"]].to_dict(
+        "records"
+    ) == [
+        {
+            "pon": "10001",
+            "part_tag": 2,
+            "height": 38,
+            "change_type": "changed",
+        },
+        {
+            "pon": "10001",
+            "part_tag": 3,
+            "height": 38,
+            "change_type": "changed",
+        },
+        {
+            "pon": "10001",
+            "part_tag": 4,
+            "height": 38,
+            "change_type": "removed",
+        },
+        {"pon": "10001", "part_tag": 4, "height": 50, "change_type": "added"},
+        {"pon": "10003", "part_tag": 1, "height": 38, "change_type": "added"},
+    ]
+    changed = changes_df.iloc[0]
+    assert (changed["previous_quantity"], changed["quantity"]) == (2.0, 3.0)
+    assert changes_df.iloc[1]["previous_material_type"] == "TYPE-A"
+    assert changes_df.iloc[1]["material_type"] == "TYPE-B"
+    # PON 10002 was not uploaded again, a new PON has no previous snapshot
+    assert changes_df["previous_snapshot_time_utc"].isna().tolist() == [
+        False,
+        False,
+        False,
+        False,
+        True,
+    ]
+
+
+def test_identical_snapshots_have_no_changes():
+    parts = [
+        ("10001", 1, 38, "TYPE-A", 0.1 + 0.2),
+        ("10001", 2, 38, None, 1.0),
+    ]
+    previous_df = make_snapshot(parts, "2026-01-05T10:00:00+00:00")
+    current_df = make_snapshot(parts, "2026-01-06T10:00:00+00:00")
+    current_df["quantity"] = current_df["quantity"].round(12)
+
+    assert diff_bom_snapshots(previous_df, current_df).empty
+
+
+def test_colliding_key_hashes_do_not_merge_distinct_parts(monkeypatch):
+    previous_df = make_snapshot(
+        [
+            ("10001", 1, 38, "TYPE-A", 2.0),
+            ("10001", 2, 38, "TYPE-A", 2.0),
+        ],
+        "2026-01-05T10:00:00+00:00",
+    )
+    current_df = make_snapshot(
+        [
+            ("10001", 1, 38, "TYPE-A", 2.0),
+            ("10001", 2, 38, "TYPE-A", 3.0),
+            ("10001", 3, 38, "TYPE-A", 1.0),
+        ],
+        "2026-01-06T10:00:00+00:00",
+    )
+    expected_df = diff_bom_snapshots(previous_df, current_df)
+    # every part key hashes to the same value
+    monkeypatch.setattr(
+        pd.util,
+        "hash_pandas_object",
+        lambda df, index=False: pd.Series(0, index=df.index, dtype="uint64"),
+    )
+
+    changes_df = diff_bom_snapshots(previous_df, current_df)
+
+    pd.testing.assert_frame_equal(changes_df, expected_df)
+    assert changes_df[["part_tag", "change_type"]].to_dict("records") == [
+        {"part_tag": 2, "change_type": "changed"},
+        {"part_tag": 3, "change_type": "added"},
+    ]
+    assert changes_df["quantity"].tolist() == [3.0, 1.0]
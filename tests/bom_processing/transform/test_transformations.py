@@ -0,0 +1,97 @@
+import pandas as pd
+
+from bom_processing.constants import MATERIAL_CLASSIFICATION_RULES
+from bom_processing.transform.transformations import (
+    _aggregate_bom_data,
+    _classify_materials,
+)
+
+
+def _materials(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows,
+        columns=["material_type", "material_subtype", "designation"],
+        dtype="string",
+    )
+
+
+def test_primary_a_rules_apply_in_order_to_every_row():
+    bom_df = _materials(
+        [
+            ("Glulam type-A-X", "spf", None),
+            ("type-a", "TYPE-A-X", None),
+            ("Type-A", None, None),
+            ("type-a type-b", "spf", None),
+            ("2X4", "spf", None),
+            ("2X4", "spf", None),
+            (None, None, None),
+        ]
+    )
+
+    result = _classify_materials(
+        bom_df, MATERIAL_CLASSIFICATION_RULES["primary_a"]
+    )
+
+    assert result["material_type"].tolist() == [
+        "TYPE-A",
+        "TYPE-A",
+        "TYPE-A",
+        "TYPE-A",
+        "TYPE-C",
+        "TYPE-C",
+        pd.NA,
+    ]
+    assert result["material_subtype"].tolist() == [
+        "TYPE-A-X",
+        "TYPE-A-X",
+        "TYPE-A-S",
+        "TYPE-A-S",
+        "spf",
+        "spf",
+        pd.NA,
+    ]
+    assert result["material_type"].dtype == "string"
+
+
+def test_primary_b_rules_standardize_inserts():
+    bom_df = _materials(
+        [
+            ("Composite-B panel", None, "Insert 12"),
+            ("plain", "birch", "panel"),
+        ]
+    )
+
+    result = _classify_materials(
+        bom_df, MATERIAL_CLASSIFICATION_RULES["primary_b"]
+    )
+
+    assert result.values.tolist() == [
+        ["COMPOSITE-B", "COMPOSITE-B-S", "INSERT"],
+        ["PLAIN", "birch", "panel"],
+    ]
+
+
+def test_aggregate_sums_quantities_and_keeps_first_non_null_values():
+    bom_df = pd.DataFrame(
+        {
+            "part_tag": ["a", "a", "b"],
+            "quantity": [1, 2, 5],
+            "usage_quantity": [0.5, 1.5, 1.0],
+            "finish_quantity": [1.0, 1.0, 2.0],
+            "additional_info": pd.array([None, "late", "b"], dtype="string"),
+        }
+    )
+
+    result = _aggregate_bom_data(bom_df, ["part_tag"])
+
+    assert result.columns.tolist() == [
+        "part_tag",
+        "quantity",
+        "usage_quantity",
+        "finish_quantity",
+        "additional_info",
+    ]
+    assert result.values.tolist() == [
+        ["a", 3, 2.0, 2.0, "late"],
+        ["b", 5, 1.0, 2.0, "b"],
+    ]
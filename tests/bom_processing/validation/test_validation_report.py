@@ -0,0 +1,87 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom_processing.constants import COLUMN_RENAME_MAPS
+from bom_processing.extract.read_boms_from_excel import clean_primary_a_bom
+from bom_processing.validation.validation_report import BOMValidationError
+
+
+def make_primary_a_sheet() -> pd.DataFrame:
+    """
+    Primary A BOM as read_excel returns it, with a summary row last
+    """
+    return pd.DataFrame(
+        {
+            "Element (if app.)": ["wall", "wall", "floor", np.nan],
+            "Quantity": [2.0, 1.0, 4.0, np.nan],
+            "part#": [1.0, 2.0, 3.0, np.nan],
+            "Item#": ["2x4", "type-a", "2x6", np.nan],
+            "Designation": ["beam", np.nan, "beam", np.nan],
+            "Order#": ["spf", "spf", np.nan, np.nan],
+            "W [mm]": [38.0, 89.0, 38.0, np.nan],
+            "H [mm]": [89.0, 38.0, 140.0, np.nan],
+            "L [mm]": [2400.0, 1200.0, 3000.0, np.nan],
+            "Additional Info.": [np.nan, np.nan, np.nan, np.nan],
+            "Tot. Length [m]": [4.8, 1.2, 12.0, 18.0],
+            "Tot. Surf. Area [ft²]": [1.0, 0.5, 2.0, 3.5],
+        }
+    )
+
+
+def test_every_issue_is_reported_with_original_names_and_excel_rows():
+    sheet = make_primary_a_sheet().drop(columns="Designation")
+    sheet = sheet.astype({"W [mm]": object, "part#": object})
+    sheet.loc[0, "Quantity"] = np.nan
+    sheet.loc[2, "Quantity"] = np.nan
+    sheet.loc[1, "W [mm]"] = "wide"
+    sheet.loc[2, "part#"] = "3.5"
+    sheet.loc[1, "Item#"] = np.nan
+
+    with pytest.raises(BOMValidationError) as error:
+        clean_primary_a_bom(sheet)
+
+    issues = {
+        (issue["column"], issue["problem"]): issue["rows"]
+        for issue in error.value.issues
+    }
+    assert issues == {
+        ("Designation", "missing column"): [],
+        ("Quantity", "missing values"): [2, 4],
+        ("part#", "invalid values"): [4],
+        ("Item#", "missing values"): [3],
+        ("W [mm]", "invalid values"): [3],
+    }
+    assert str(error.value).startswith("5 problems found: ")
+
+
+def test_valid_bom_drops_summary_rows_and_converts():
+    cleaned = clean_primary_a_bom(make_primary_a_sheet())
+
+    assert cleaned.index.tolist() == [0, 1, 2]
+    assert cleaned["part_tag"].dtype == "Int64"
+    assert cleaned["width"].tolist() == [38, 89, 38]
+    assert set(COLUMN_RENAME_MAPS["primary_a"].values()) >= set(
+        cleaned.columns
+    )
+
+
+def test_validation_error_survives_pickling():
+    error = BOMValidationError(
+        [
+            {
+                "column": "Quantity",
+                "problem": "missing values",
+                "dtype": "int",
+                "rows": list(range(2, 20)),
+            }
+        ]
+    )
+
+    unpickled = pickle.loads(pickle.dumps(error))
+
+    assert unpickled.issues == error.issues
+    assert str(unpickled) == str(error)
+    assert "and 8 more" in str(unpickled)
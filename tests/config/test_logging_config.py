@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+
+def test_worker_process_logs_reach_parent_handlers(tmp_path):
+    # run in a fresh interpreter so the test's own logging setup is untouched
+    script = textwrap.dedent(
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        import logging
+        import sys
+
+        from config.logging_config import (
+            configure_logging,
+            configure_worker_logging,
+            get_worker_log_queue,
+        )
+
+        def log_from_worker(message):
+            logging.getLogger("worker").warning("from worker %s", message)
+
+        if __name__ == "__main__":
+            configure_logging()
+            with ProcessPoolExecutor(
+                max_workers=2,
+                initializer=configure_worker_logging,
+                initargs=(get_worker_log_queue(),),
+            ) as executor:
+                list(executor.map(log_from_worker, range(4)))
+            logging.getLogger("parent").debug("suppressed %s", 1)
+            logging.getLogger("parent").warning("from parent")
+        """
+    )
+    script_path = tmp_path / "log_workers.py"
+    script_path.write_text(script)
+    log_dir = tmp_path / "logs"
+
+    subprocess.run(
+        [sys.executable, str(script_path)],
+        env={
+            **os.environ,
+            "LOG_DIR": str(log_dir),
+            "LOG_TO_FILE": "True",
+            "DEBUG": "False",
+            "LOG_LEVEL": "INFO",
+        },
+        check=True,
+        capture_output=True,
+    )
+
+    log_lines = (log_dir / "app.log").read_text().splitlines()
+    assert sum("from worker" in line for line in log_lines) == 4
+    assert any("from parent" in line for line in log_lines)
+    assert not any("suppressed" in line for line in log_lines)
+
+
+def test_named_log_goes_to_its_own_file(tmp_path):
+    script = textwrap.dedent(
+        """
+        import logging
+
+        from config.logging_config import configure_logging
+
+        configure_logging("app_shard_1_of_2")
+        logging.getLogger("shard").warning("from shard")
+        """
+    )
+    log_dir = tmp_path / "logs"
+
+    subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "LOG_DIR": str(log_dir), "LOG_TO_FILE": "True"},
+        check=True,
+        capture_output=True,
+    )
+
+    assert [path.name for path in log_dir.iterdir()] == [
+        "app_shard_1_of_2.log"
+    ]
+    log_text = (log_dir / "app_shard_1_of_2.log").read_text()
+    assert "from shard" in log_text
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom_processing.constants import COLUMN_RENAME_MAPS
+
+
+MATERIAL_TYPES = [
+    "type-A-X glulam",
+    "Type-a",
+    "TYPE-B",
+    "type-a type-b",
+    "2x4",
+    "2X6",
+    "10x12 ",
+    "composite-A",
+    "Composite-b",
+    "plain ply",
+    "other",
+]
+MATERIAL_SUBTYPES = ["type-a-x", "TYPE-A-X", "spf", np.nan]
+DESIGNATIONS = ["Insert 1", "INSERTS", "beam", np.nan]
+
+
+@pytest.fixture
+def make_raw_bom():
+    """
+    Generates BOMs as read_excel returns them: original headers, floats for
+    numbers and part numbers, NaN for blanks and summary rows mixed in. Few
+    distinct parts and dimensions with halves, so rows aggregate and round
+    at the edges
+
+    Return:
+        Callable: (category, seed, rows, invalid) to the raw BOM, with a
+            random number of rows unless given and one bad value if invalid
+    """
+
+    def _make_raw_bom(
+        category: str,
+        seed: int,
+        rows: int | None = None,
+        invalid: bool = False,
+    ) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        if rows is None:
+            rows = int(rng.integers(1, 300))
+
+        def choice(values: list, p_missing: float = 0) -> np.ndarray:
+            values = rng.choice(np.array(values, dtype=object), rows)
+            values[rng.random(rows) < p_missing] = np.nan
+            return values
+
+        def dimension(low: int, high: int) -> np.ndarray:
+            fractions = rng.choice([0, 0.5, 0.25, 0.75], rows)
+            return rng.integers(low, high, rows) + fractions
+
+        bom_df = pd.DataFrame(
+            {
+                "line_number": np.arange(rows),
+                "element": choice(["wall", "floor"], p_missing=0.3),
+                "quantity": rng.integers(1, 6, rows)
+                + rng.choice([0, 0.5], rows),
+                "part_tag": rng.integers(1, 8, rows).astype(float),
+                "material_type": choice(MATERIAL_TYPES),
+                "designation": choice(DESIGNATIONS),
+                "material_subtype": choice(MATERIAL_SUBTYPES),
+                "width": dimension(38, 42),
+                "height": dimension(38, 42),
+                "length": dimension(300, 304),
+                "additional_info": choice(["pre-drilled", np.nan]),
+                "usage_quantity": np.where(
+                    rng.random(rows) < 0.2, np.nan, rng.random(rows) * 10
+                ),
+                "finish_quantity": rng.random(rows) * 5,
+            }
+        )
+
+        summary_rows = rng.random(rows) < 0.1
+        bom_df.loc[
+            summary_rows,
+            ["part_tag", "height", "width", "length", "material_type"],
+        ] = np.nan
+
+        if invalid:
+            row = int(rng.integers(0, rows))
+            problem = rng.choice(["blank quantity", "text length"])
+            if problem == "blank quantity":
+                bom_df.loc[row, "quantity"] = np.nan
+            else:
+                bom_df["length"] = bom_df["length"].astype(object)
+                bom_df.loc[row, ["length", "part_tag"]] = ["long", 1.0]
+
+        original_names = {
+            v: k for k, v in COLUMN_RENAME_MAPS[category].items()
+        }
+        return bom_df.rename(columns=original_names)
+
+    return _make_raw_bom
+
+
+@pytest.fixture
+def make_cleaned_bom():
+    """
+    Generates BOMs as cleaning returns them, to stand in for parsed
+    workbooks in sidecars
+
+    Return:
+        Callable: (rows, seed) to the cleaned BOM
+    """
+
+    def _make_cleaned_bom(rows: int, seed: int) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+
+        def choice(values: list) -> pd.arrays.StringArray:
+            return pd.array(
+                rng.choice(np.array(values, dtype=object), rows),
+                dtype="string",
+            )
+
+        return pd.DataFrame(
+            {
+                "element": choice(["wall", None]),
+                "quantity": rng.integers(1, 5, rows),
+                "part_tag": choice(["1", "2", "3"]),
+                "material_type": choice(
+                    ["type-a", "2x4", "composite-a", "plain"]
+                ),
+                "designation": choice(["beam", "Insert", None]),
+                "material_subtype": choice(["spf", "type-a-x"]),
+                "width": rng.integers(38, 200, rows),
+                "height": rng.integers(38, 200, rows),
+                "length": rng.integers(300, 3000, rows),
+                "additional_info": choice(["", None]),
+                "usage_quantity": rng.random(rows),
+                "finish_quantity": rng.random(rows),
+            }
+        )
+
+    return _make_cleaned_bom
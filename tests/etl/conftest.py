@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from bom_processing.extract.sidecar import (
+    file_checksum,
+    get_sidecar_path,
+    write_sidecar,
+)
+from bom_processing.load.sqlite_backend import create_sqlite_engine
+
+
+@pytest.fixture
+def write_bom(make_cleaned_bom):
+    """
+    Writes a BOM file with a parsed sidecar, so processing it needs no
+    Excel, or with valid=False a workbook that cannot be parsed
+
+    Return:
+        Callable: (path, pon, category, valid) to the file's BOM record
+    """
+
+    def _write_bom(
+        path: Path, pon: str, category: str = "primary_a", valid: bool = True
+    ) -> dict:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(f"{pon} {path.name}".encode())
+        record = {"pon": pon, "username": "user", "path": path}
+        if valid:
+            record["sidecar"] = get_sidecar_path(path)
+            write_sidecar(
+                {"df": make_cleaned_bom(6, int(pon)), "category": category},
+                record["sidecar"],
+                file_checksum(path),
+            )
+        return record
+
+    return _write_bom
+
+
+@pytest.fixture
+def etl_env(tmp_path, monkeypatch):
+    """
+    Settings for ETL runs in spawned processes, which read them from the
+    environment: a SQLite database, staging folder, run state and ledger in
+    tmp_path, and files extracted in process
+
+    Return:
+        Engine: engine of the SQLite database
+    """
+    db_path = tmp_path / "db" / "bom_schema.sqlite3"
+    settings = {
+        "DB_BACKEND": "sqlite",
+        "SQLITE_DB_PATH": db_path,
+        "DB_SCHEMA": "bom_schema",
+        "STAGING_DIR": tmp_path / "staging",
+        "STAGING_CLAIM_SETTLE_SECONDS": 0,
+        "RUN_STATE_DIR": tmp_path / "runs",
+        "RUN_LEDGER_PATH": tmp_path / "run_ledger.sqlite3",
+        "LOG_DIR": tmp_path / "logs",
+        "LOG_TO_FILE": False,
+        "EXTRACT_TIMEOUT_SECONDS": 0,
+        "SHARD_POLL_SECONDS": 0.2,
+    }
+    for name, value in settings.items():
+        monkeypatch.setenv(name, str(value))
+    (tmp_path / "staging").mkdir()
+
+    engine = create_sqlite_engine(db_path, "bom_schema")
+    yield engine
+    engine.dispose()
@@ -0,0 +1,266 @@
+from datetime import datetime
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import sqlalchemy as sa
+
+from bom_processing.extract.get_bom_paths import (
+    filter_bom_records,
+    shard_of,
+)
+from bom_processing.extract.sidecar import get_sidecar_path
+from bom_processing.orchestration.process_boms import process_boms
+from bom_processing.orchestration.run_journal import RunJournal
+from bom_processing.orchestration.run_ledger import RunRecorder
+from etl import folder_scraping_etl, staging_folder_etl
+
+
+def read_table(engine: sa.engine.Engine, table: str) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql(sa.text(f"SELECT * FROM bom_schema.{table}"), conn)
+
+
+def _design_records(design_dir: Path) -> list[dict]:
+    # BOMs written by write_bom into a folder per PON
+    return [
+        {
+            "pon": path.parent.name,
+            "username": "system",
+            "path": path,
+            "sidecar": get_sidecar_path(path),
+        }
+        for path in sorted(design_dir.glob("*/*.xlsx"))
+    ]
+
+
+def _wait_for(path: Path, timeout_seconds: float) -> bool:
+    deadline = time.monotonic() + timeout_seconds
+    while not path.exists():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _full_scrape(design_dir: Path, markers: Path) -> None:
+    # runs in a spawned process, configured by etl_env
+    records = _design_records(design_dir)
+    folder_scraping_etl.scrape_bom_paths_from_design_directory = (
+        lambda **_: records
+    )
+    refresh_final_bom_table = folder_scraping_etl.refresh_final_bom_table
+
+    def late_refresh(*args, **kwargs):
+        # refresh while the upload's rows are in staging, unless the upload
+        # is kept out until this run is done
+        (markers / "refreshing").touch()
+        _wait_for(markers / "uploaded", 5)
+        refresh_final_bom_table(*args, **kwargs)
+
+    folder_scraping_etl.refresh_final_bom_table = late_refresh
+    folder_scraping_etl.main(target_names=[])
+
+
+def _scrape(design_dir: Path, modified_since: datetime = None) -> None:
+    records = _design_records(design_dir)
+    folder_scraping_etl.scrape_bom_paths_from_design_directory = (
+        lambda **scope: filter_bom_records(
+            records, modified_since=scope.get("modified_since")
+        )
+    )
+    folder_scraping_etl.main(modified_since=modified_since, target_names=[])
+
+
+def _run_in_process(target, *args) -> int:
+    process = multiprocessing.get_context("spawn").Process(
+        target=target, args=args
+    )
+    process.start()
+    process.join(120)
+    return process.exitcode
+
+
+def _staging_upload(markers: Path) -> None:
+    refresh_current = staging_folder_etl.refresh_final_current_bom_table
+
+    def slow_refresh(*args, **kwargs):
+        (markers / "uploaded").touch()
+        time.sleep(3)
+        refresh_current(*args, **kwargs)
+
+    staging_folder_etl.refresh_final_current_bom_table = slow_refresh
+    staging_folder_etl.main()
+
+
+def test_run_counts_come_from_process_boms(tmp_path, write_bom):
+    records = [
+        # the same file name under two PONs
+        write_bom(tmp_path / "a" / "bom.xlsx", "10001"),
+        write_bom(tmp_path / "b" / "bom.xlsx", "10002"),
+        write_bom(tmp_path / "a" / "frame.xlsx", "10001", "secondary"),
+        write_bom(tmp_path / "a" / "broken.xlsx", "10001", valid=False),
+    ]
+
+    with RunRecorder("test_etl", "run_1", tmp_path / "ledger.db") as recorder:
+        primary_boms_df = folder_scraping_etl._process(recorder, records)
+
+    assert primary_boms_df["pon"].unique().tolist() == ["10001", "10002"]
+    assert recorder.counts["files_processed"] == 3
+    assert recorder.counts["files_failed"] == 1
+
+
+def test_upload_waits_for_full_scrape_to_refresh(tmp_path, write_bom, etl_env):
+    design_dir = tmp_path / "design"
+    for pon in ["10001", "10002"]:
+        write_bom(design_dir / pon / f"{pon}_bom.xlsx", pon)
+    write_bom(tmp_path / "staging" / "10001_bom_staging_user.xlsx", "10001")
+
+    context = multiprocessing.get_context("spawn")
+    full_scrape = context.Process(
+        target=_full_scrape, args=(design_dir, tmp_path)
+    )
+    upload = context.Process(target=_staging_upload, args=(tmp_path,))
+    full_scrape.start()
+    try:
+        # the upload starts while the full scrape's rows are in staging
+        assert _wait_for(tmp_path / "refreshing", 60)
+        upload.start()
+        upload.join(120)
+    finally:
+        full_scrape.join(120)
+    assert (full_scrape.exitcode, upload.exitcode) == (0, 0)
+
+    final = read_table(etl_env, "example_bom_final")
+    history = read_table(etl_env, "example_bom_final_history")
+    staging = read_table(etl_env, "example_bom_staging")
+    assert sorted(final["pon"].unique()) == ["10001", "10002"]
+    assert final["load_method"].unique().tolist() == ["full"]
+    assert history["pon"].unique().tolist() == ["10001"]
+    assert history["load_method"].unique().tolist() == ["upload"]
+    # the upload removed only its own rows from staging
+    assert len(staging) == len(final)
+    assert staging["load_method"].unique().tolist() == ["full"]
+
+
+def _run_shard(
+    design_dir: Path, markers: Path, shard: int, shard_count: int
+) -> None:
+    # runs in a spawned process, configured by etl_env
+    records = [
+        record
+        for record in _design_records(design_dir)
+        if shard_of(record["pon"], shard_count) == shard
+    ]
+    folder_scraping_etl.scrape_bom_paths_from_design_directory = (
+        lambda **_: records
+    )
+    record_committed = RunJournal.record_committed
+
+    def pause_after_first_batch(journal, batch_df):
+        # let the upload load between this shard's batches
+        record_committed(journal, batch_df)
+        if shard == 1 and not (markers / "batch_committed").exists():
+            (markers / "batch_committed").touch()
+            _wait_for(markers / "uploaded", 60)
+
+    RunJournal.record_committed = pause_after_first_batch
+    folder_scraping_etl.run_shard(shard, shard_count, "run_1")
+
+
+def _coordinate_shards(run_id: str, shard_count: int) -> None:
+    folder_scraping_etl.coordinate_shards(run_id, shard_count, 120)
+
+
+def test_sharded_run_loads_every_shard_alongside_uploads(
+    tmp_path, write_bom, etl_env, monkeypatch
+):
+    # a batch per PON, so uploads can load between a shard's batches
+    monkeypatch.setenv("LOAD_BATCH_SIZE", "1")
+    design_dir = tmp_path / "design"
+    pons = [str(pon) for pon in range(10001, 10009)]
+    records = [
+        write_bom(design_dir / pon / f"{pon}_bom.xlsx", pon) for pon in pons
+    ]
+    write_bom(tmp_path / "staging" / "10001_bom_staging_user.xlsx", "10001")
+    expected_df, _ = process_boms(records, "full", extract_timeout=0)
+    # rows of an earlier run, cleared by the coordinator
+    stale_df = expected_df[expected_df["pon"] == "10001"].assign(
+        pon="20001", snapshot_time_utc="2026-01-05T10:00:00+00:00"
+    )
+    with etl_env.begin() as conn:
+        stale_df.to_sql(
+            "example_bom_staging",
+            con=conn,
+            schema="bom_schema",
+            if_exists="append",
+            index=False,
+        )
+
+    shard_count = 3
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_run_shard,
+            args=(design_dir, tmp_path, shard, shard_count),
+        )
+        for shard in range(1, shard_count + 1)
+    ]
+    processes.append(
+        context.Process(target=_coordinate_shards, args=("run_1", shard_count))
+    )
+    upload = context.Process(target=staging_folder_etl.main)
+    for process in processes:
+        process.start()
+    try:
+        assert _wait_for(tmp_path / "batch_committed", 60)
+        upload.start()
+        upload.join(120)
+    finally:
+        (tmp_path / "uploaded").touch()
+        for process in processes:
+            process.join(120)
+    assert [process.exitcode for process in [*processes, upload]] == [0] * (
+        shard_count + 2
+    )
+
+    final = read_table(etl_env, "example_bom_final")
+    history = read_table(etl_env, "example_bom_final_history")
+    assert sorted(final["pon"].unique()) == pons
+    assert len(final) == len(expected_df)
+    assert final["load_method"].unique().tolist() == ["full"]
+    assert final["snapshot_time_utc"].nunique() == 1
+    assert history["pon"].unique().tolist() == ["10001"]
+    assert history["load_method"].unique().tolist() == ["upload"]
+
+
+def test_modified_since_reprocesses_every_bom_of_a_modified_pon(
+    tmp_path, write_bom, etl_env
+):
+    design_dir = tmp_path / "design"
+    paths = {
+        name: design_dir / name[:5] / f"{name}.xlsx"
+        for name in ["10001_a", "10001_b", "10002_a"]
+    }
+    for name, path in paths.items():
+        write_bom(path, name[:5])
+        os.utime(path, (0, datetime(2025, 1, 1).timestamp()))
+    assert _run_in_process(_scrape, design_dir) == 0
+    before = read_table(etl_env, "example_bom_final")
+
+    os.utime(paths["10001_b"], (0, datetime(2025, 6, 1).timestamp()))
+    # a snapshot of its own, a second after the full scrape's
+    time.sleep(1)
+    assert _run_in_process(_scrape, design_dir, datetime(2025, 3, 1)) == 0
+
+    final = read_table(etl_env, "example_bom_final")
+    rows_per_file = final.groupby("bom_filename").size().to_dict()
+    assert rows_per_file == before.groupby("bom_filename").size().to_dict()
+    assert sorted(rows_per_file) == [f"{name}.xlsx" for name in paths]
+    snapshots = final.groupby("pon")["snapshot_time_utc"].unique()
+    assert (
+        snapshots["10002"].tolist() == before["snapshot_time_utc"][:1].tolist()
+    )
+    assert snapshots["10001"].tolist() != snapshots["10002"].tolist()
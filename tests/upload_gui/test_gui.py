@@ -0,0 +1,90 @@
+from concurrent.futures import Future
+from pathlib import Path
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock
+
+
+def test_gui_import_does_not_load_heavy_modules():
+    # a fresh interpreter, as modules imported by other tests would persist
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, upload_gui.gui; "
+            "print(sorted(m for m in ('pandas', 'numpy', 'pyarrow') "
+            "if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert completed.stdout.strip() == "[]"
+
+
+class FakeRoot:
+    """
+    Records the callbacks scheduled with after, in place of a Tk window
+    """
+
+    def __init__(self):
+        self.scheduled = {}
+
+    def after(self, ms, callback):
+        after_id = f"after#{len(self.scheduled)}"
+        self.scheduled[after_id] = callback
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+
+def make_gui():
+    from upload_gui.gui import BOMUploaderGUI
+
+    # the window's state without drawing it, there is no display in tests
+    gui = BOMUploaderGUI.__new__(BOMUploaderGUI)
+    gui.root = FakeRoot()
+    gui.selected_filepaths = []
+    gui.validated_boms = {}
+    gui.executor = None
+    gui.pending_validations = {}
+    gui.failed_validations = {}
+    gui.poll_id = None
+    gui.file_list = MagicMock()
+    gui.cancel_button = MagicMock()
+    gui.upload_button = MagicMock()
+    gui.progress = MagicMock()
+    return gui
+
+
+def test_cancel_stops_running_validations_and_polling():
+    gui = make_gui()
+    executor = gui._get_executor()
+    future = executor.submit(time.sleep, 60)
+    gui.pending_validations[future] = Path("10001_bom.xlsx")
+    gui._schedule_poll()
+    while not future.running():
+        time.sleep(0.01)
+    processes = list(executor._processes.values())
+
+    gui.cancel_validation()
+
+    for process in processes:
+        process.join(10)
+        assert not process.is_alive()
+    assert gui.executor is None
+    assert gui.root.scheduled == {}
+
+
+def test_reselecting_keeps_a_single_poll_loop():
+    gui = make_gui()
+    for _ in range(2):
+        # what select_boms does for each selection
+        gui.cancel_validation()
+        gui.pending_validations[Future()] = Path("10001_bom.xlsx")
+        gui._schedule_poll()
+
+    assert list(gui.root.scheduled) == [gui.poll_id]